@@ -1,4 +1,7 @@
+from django import forms
 from django.contrib import admin
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.forms.models import BaseInlineFormSet
 
 from airport.models import (
     Country,
@@ -11,14 +14,66 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    SeatHold,
 )
+from airport.validation import find_ticket_errors
 
 
-class TicketInLine(admin.TabularInline):
+class TicketFlightMixin:
+    """
+    Loads the flights of the tickets with their airplanes, which the
+    tickets are validated against, and the cities they are shown with
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "flight":
+            kwargs["queryset"] = Flight.objects.select_related(
+                "airplane", "route__source__city", "route__destination__city"
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class TicketInLineForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the ticket is validated with the others by the formset
+        self.instance._batch_validated = True
+
+
+class TicketInLineFormSet(BaseInlineFormSet):
+    """Validates the tickets of the order together, in one query"""
+
+    def clean(self):
+        # before the unique checks, which skip the forms with errors
+        ticket_forms = [
+            form
+            for form in self.forms
+            if form.is_valid()
+            and form.cleaned_data
+            and not form.cleaned_data.get("DELETE")
+        ]
+        errors = find_ticket_errors(
+            [form.instance for form in ticket_forms],
+            non_field_errors=NON_FIELD_ERRORS,
+        )
+        for form, ticket_errors in zip(ticket_forms, errors):
+            if ticket_errors:
+                form.add_error(None, ValidationError(ticket_errors))
+        super().clean()
+
+
+class TicketInLine(TicketFlightMixin, admin.TabularInline):
     model = Ticket
+    form = TicketInLineForm
+    formset = TicketInLineFormSet
     extra = 1
 
 
+@admin.register(Ticket)
+class TicketAdmin(TicketFlightMixin, admin.ModelAdmin):
+    pass
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     inlines = (TicketInLine,)
@@ -32,4 +87,4 @@ admin.site.register(Airport)
 admin.site.register(Route)
 admin.site.register(Crew)
 admin.site.register(Flight)
-admin.site.register(Ticket)
+admin.site.register(SeatHold)
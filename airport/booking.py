@@ -0,0 +1,367 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from airport.exceptions import (
+    FlightBusy,
+    HoldExpired,
+    NotEnoughSeats,
+    SeatsTaken,
+)
+from airport.flight_cache import invalidate_flights
+from airport.metrics import (
+    booking_conflict,
+    booking_lock_retried,
+    order_created,
+)
+from airport.models import Flight, Order, SeatHold, Ticket
+from airport.seatmap import SeatMap
+from airport.validation import find_ticket_errors
+
+
+def group_seats_by_flight(tickets_data) -> dict:
+    """Groups (row, seat) pairs of the tickets by flight id"""
+    seats_by_flight = defaultdict(set)
+    for ticket_data in tickets_data:
+        seats_by_flight[ticket_data["flight"].id].add(
+            (ticket_data["row"], ticket_data["seat"])
+        )
+    return seats_by_flight
+
+
+def lock_flights(flight_ids) -> dict:
+    """
+    Locks rows of the flights in id order, so that concurrent bookings
+    of several flights can't deadlock, and returns them by id.
+    Must be called inside a transaction.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SET LOCAL lock_timeout = %s",
+                [f"{settings.BOOKING_LOCK_TIMEOUT_MS}ms"],
+            )
+    return {
+        flight.id: flight
+        for flight in Flight.objects.select_for_update(of=("self",))
+        .select_related("airplane")
+        .only("seat_map", "airplane__rows", "airplane__seats_in_row")
+        .filter(pk__in=flight_ids)
+        .order_by("pk")
+    }
+
+
+def save_occupancy(flight, seat_map: SeatMap, tickets_delta: int) -> None:
+    Flight.objects.filter(pk=flight.id).update(
+        seat_map=bytes(seat_map),
+        tickets_sold=F("tickets_sold") + tickets_delta,
+    )
+    invalidate_flights([flight.id])
+
+
+def update_occupancy(flight_id: int, taken=(), released=()) -> None:
+    """
+    Marks seats of the flight as taken or released in its seat map
+    and moves the sold tickets counter accordingly.
+    Must be called inside a transaction, the flight row stays locked.
+    """
+    flight = lock_flights([flight_id])[flight_id]
+    seat_map = SeatMap.for_flight(flight)
+    for row, seat in taken:
+        seat_map.take(row, seat)
+    for row, seat in released:
+        seat_map.release(row, seat)
+    save_occupancy(flight, seat_map, len(taken) - len(released))
+
+
+def release_seats(seats_by_flight: dict) -> None:
+    """
+    Releases (row, seat) pairs of several flights, see `update_occupancy`,
+    locking the flights at once
+    """
+    flights = lock_flights(seats_by_flight)
+    for flight_id, seats in seats_by_flight.items():
+        seat_map = SeatMap.for_flight(flights[flight_id])
+        for row, seat in seats:
+            try:
+                seat_map.release(row, seat)
+            except ValueError:
+                # the ticket does not fit a shrunk airplane anymore
+                continue
+        save_occupancy(flights[flight_id], seat_map, -len(seats))
+
+
+def rebuild_seat_maps(flight_ids) -> list:
+    """
+    Builds seat maps of the flights from their tickets in one query,
+    locking the flights first, see `lock_flights`.
+    Returns the flights whose stored seat map was different.
+    Must be called inside a transaction.
+    """
+    flights = lock_flights(flight_ids)
+    seat_maps = {
+        flight.id: SeatMap(flight.airplane.rows, flight.airplane.seats_in_row)
+        for flight in flights.values()
+    }
+    for flight_id, row, seat in Ticket.objects.filter(
+        flight_id__in=flights
+    ).values_list("flight_id", "row", "seat"):
+        try:
+            seat_maps[flight_id].take(row, seat)
+        except ValueError:
+            # the ticket does not fit a shrunk airplane anymore
+            continue
+
+    changed = []
+    for flight_id, seat_map in seat_maps.items():
+        flight = flights[flight_id]
+        if bytes(flight.seat_map) != bytes(seat_map):
+            flight.seat_map = bytes(seat_map)
+            changed.append(flight)
+    if changed:
+        Flight.objects.bulk_update(changed, ["seat_map"])
+        invalidate_flights([flight.id for flight in changed])
+    return changed
+
+
+def count_tickets_sold():
+    """Expression counting the tickets of the flight from Ticket rows"""
+    return Coalesce(
+        Subquery(
+            Ticket.objects.filter(flight=OuterRef("pk"))
+            .order_by()
+            .values("flight")
+            .annotate(count=Count("id"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+def find_taken_seats(seats_by_flight: dict) -> set:
+    """
+    Returns (flight_id, row, seat) of already sold seats,
+    using one query per flight
+    """
+    taken = set()
+    for flight_id, seats in seats_by_flight.items():
+        seats_filter = Q()
+        for row, seat in seats:
+            seats_filter |= Q(row=row, seat=seat)
+        taken.update(
+            (flight_id, row, seat)
+            for row, seat in Ticket.objects.filter(
+                seats_filter, flight_id=flight_id
+            ).values_list("row", "seat")
+        )
+    return taken
+
+
+def find_held_seats(seats_by_flight: dict) -> set:
+    """
+    Returns (flight_id, row, seat) of the seats under active holds
+    in one query
+    """
+    held = set()
+    for flight_id, hold_seats in SeatHold.objects.filter(
+        flight_id__in=seats_by_flight, expires_at__gt=timezone.now()
+    ).values_list("flight_id", "seats"):
+        held.update(
+            (flight_id, seat["row"], seat["seat"])
+            for seat in hold_seats
+            if (seat["row"], seat["seat"]) in seats_by_flight[flight_id]
+        )
+    return held
+
+
+def mark_held_seats(flight_id: int, seat_map: SeatMap) -> None:
+    """Marks the seats under active holds as taken in one query"""
+    for seats in SeatHold.objects.filter(
+        flight_id=flight_id, expires_at__gt=timezone.now()
+    ).values_list("seats", flat=True):
+        for seat in seats:
+            try:
+                seat_map.take(seat["row"], seat["seat"])
+            except ValueError:
+                # the hold does not fit a shrunk airplane anymore
+                continue
+
+
+def find_unavailable_seats(seats_by_flight: dict, seat_maps: dict) -> set:
+    """Returns (flight_id, row, seat) of the seats sold or held"""
+    unavailable = find_held_seats(seats_by_flight)
+    unavailable.update(
+        (flight_id, row, seat)
+        for flight_id, seats in seats_by_flight.items()
+        for row, seat in seats
+        if seat_maps[flight_id].is_taken(row, seat)
+    )
+    return unavailable
+
+
+def run_with_retries(booking, *args, **kwargs):
+    """
+    Runs the booking in a transaction, retrying it with a jittered
+    backoff up to BOOKING_MAX_ATTEMPTS times when it fails to lock
+    the flights. Raises FlightBusy when all the attempts have failed.
+    """
+    for attempt in range(1, settings.BOOKING_MAX_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return booking(*args, **kwargs)
+        except (SeatsTaken, NotEnoughSeats, HoldExpired) as error:
+            booking_conflict(error)
+            raise
+        except OperationalError:
+            if attempt == settings.BOOKING_MAX_ATTEMPTS:
+                error = FlightBusy()
+                booking_conflict(error)
+                raise error
+            booking_lock_retried()
+            time.sleep(
+                settings.BOOKING_RETRY_DELAY_MS
+                * attempt
+                * random.uniform(0.5, 1.5)
+                / 1000
+            )
+
+
+def book_seats(
+    seats_by_flight: dict, tickets_data, hold=None, **order_data
+) -> Order:
+    """
+    Creates the order while holding locks on its flights:
+    checks the seats against the locked airplanes, seat maps and active
+    holds, inserts all the tickets at once and marks them in the seat
+    maps. The seat maps stand for the sold seats, as they are updated
+    under the same locks, see `find_ticket_errors` for the other checks.
+    """
+    flights = lock_flights(seats_by_flight)
+    if hold is not None:
+        deleted, _ = SeatHold.objects.filter(
+            pk=hold.pk, expires_at__gt=timezone.now()
+        ).delete()
+        if not deleted:
+            raise HoldExpired()
+
+    tickets = [
+        Ticket(**{**ticket_data, "flight": flights[ticket_data["flight"].id]})
+        for ticket_data in tickets_data
+    ]
+    errors = find_ticket_errors(tickets, check_sold=False)
+    if any(errors):
+        raise ValidationError({"tickets": errors})
+
+    seat_maps = {
+        flight_id: SeatMap.for_flight(flight)
+        for flight_id, flight in flights.items()
+    }
+    unavailable = find_unavailable_seats(seats_by_flight, seat_maps)
+    if unavailable:
+        raise SeatsTaken(unavailable)
+
+    order = Order.objects.create(**order_data)
+    for ticket in tickets:
+        ticket.order = order
+    Ticket.objects.bulk_create(tickets)
+    for flight_id, seats in seats_by_flight.items():
+        for row, seat in seats:
+            seat_maps[flight_id].take(row, seat)
+        save_occupancy(flights[flight_id], seat_maps[flight_id], len(seats))
+    transaction.on_commit(lambda: order_created(len(tickets_data)))
+    return order
+
+
+def create_order(tickets_data, hold=None, **order_data) -> Order:
+    """
+    Creates an order with all of its tickets in a single bulk insert.
+    Concurrent bookings of the same flight are serialized by the flight
+    row lock, see `run_with_retries`. Seats under active holds can only
+    be booked by confirming the hold, passed as `hold`.
+    Raises SeatsTaken listing the seats sold to or held by others.
+    """
+    seats_by_flight = group_seats_by_flight(tickets_data)
+    try:
+        return run_with_retries(
+            book_seats, seats_by_flight, tickets_data, hold, **order_data
+        )
+    except IntegrityError:
+        # the seat maps missed a sold seat, the tickets are the truth
+        taken = find_taken_seats(seats_by_flight)
+        if not taken:
+            raise
+        error = SeatsTaken(taken)
+        booking_conflict(error)
+        raise error
+
+
+def auto_book(flight, passengers: int, preference: str, user) -> Order:
+    """
+    Picks free seats for the passengers on the locked seat map,
+    see `SeatMap.find_seats`, and books them in the same transaction.
+    Raises NotEnoughSeats when the flight can't fit the group.
+    """
+
+    def book():
+        flights = lock_flights([flight.id])
+        seat_map = SeatMap.for_flight(flights[flight.id])
+        mark_held_seats(flight.id, seat_map)
+        seats = seat_map.find_seats(passengers, preference)
+        if seats is None:
+            raise NotEnoughSeats()
+        return book_seats(
+            {flight.id: set(seats)},
+            [
+                {"flight": flight, "row": row, "seat": seat}
+                for row, seat in seats
+            ],
+            user=user,
+        )
+
+    return run_with_retries(book)
+
+
+def place_hold(flight, seats, seconds: int, user) -> SeatHold:
+    """Holds the seats of the flight for the user for `seconds`"""
+    seats_by_flight = {flight.id: {(row, seat) for row, seat in seats}}
+
+    def hold_seats():
+        flights = lock_flights([flight.id])
+        seat_maps = {flight.id: SeatMap.for_flight(flights[flight.id])}
+        unavailable = find_unavailable_seats(seats_by_flight, seat_maps)
+        if unavailable:
+            raise SeatsTaken(unavailable)
+        return SeatHold.objects.create(
+            flight=flight,
+            user=user,
+            seats=[{"row": row, "seat": seat} for row, seat in seats],
+            seats_count=len(seats),
+            expires_at=timezone.now() + timedelta(seconds=seconds),
+        )
+
+    return run_with_retries(hold_seats)
+
+
+def confirm_hold(hold) -> Order:
+    """Books the seats of the hold into an order of its user"""
+    tickets_data = [
+        {"flight": hold.flight, "row": seat["row"], "seat": seat["seat"]}
+        for seat in hold.seats
+    ]
+    return create_order(tickets_data, hold=hold, user=hold.user)
+
+
+def sweep_expired_holds() -> int:
+    """Deletes all the expired holds at once, returns their number"""
+    deleted, _ = SeatHold.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return deleted
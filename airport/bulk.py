@@ -0,0 +1,111 @@
+from django.db import connection, transaction
+
+from airport.connections import all_flights_changed
+from airport.flight_cache import invalidate_flight_listing
+from airport.refdata import reference_data_changed
+from airport.search import airports_changed
+from airport.versions import bump_now_and_on_commit, model_version_key
+
+REFERENCE_MODELS = {
+    "airport.country",
+    "airport.city",
+    "airport.airplanetype",
+    "airport.airport",
+}
+SEARCH_MODELS = {"airport.country", "airport.city", "airport.airport"}
+GRAPH_MODELS = {"airport.route", "airport.flight"}
+FLIGHT_RESPONSE_MODELS = GRAPH_MODELS | {
+    "airport.airplane",
+    "airport.crew",
+    "airport.ticket",
+    "airport.seathold",
+}
+
+
+def can_copy() -> bool:
+    """COPY is used through psycopg 3 on PostgreSQL"""
+    if connection.vendor != "postgresql":
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def bulk_insert(objects: list, use_copy: bool, returning_ids=True) -> None:
+    """
+    Inserts the objects of a model with their values as they are, like
+    loaddata does, so auto_now_add fields keep theirs: through COPY or
+    multi-row INSERTs. The objects get their ids unless `returning_ids`
+    is false, which many-to-many rows don't need.
+    """
+    model = type(objects[0])
+    meta = model._meta
+    fields = [field for field in meta.concrete_fields if not field.primary_key]
+    if not use_copy:
+        returning_fields = meta.db_returning_fields if returning_ids else None
+        batch_size = max(connection.ops.bulk_batch_size(fields, objects), 1)
+        for start in range(0, len(objects), batch_size):
+            batch = objects[start:start + batch_size]
+            rows = model._base_manager._insert(
+                batch, fields, returning_fields, raw=True
+            )
+            if returning_ids:
+                for obj, (pk,) in zip(batch, rows):
+                    obj.pk = pk
+        _saved(objects)
+        return
+
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if returning_ids:
+            # ids are taken from the sequence first, COPY returns none
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+                "FROM generate_series(1, %s)",
+                [meta.db_table, meta.pk.column, len(objects)],
+            )
+            for obj, (pk,) in zip(objects, cursor.fetchall()):
+                obj.pk = pk
+            fields = [meta.pk, *fields]
+        columns = ", ".join(quote(field.column) for field in fields)
+        with cursor.copy(
+            f"COPY {quote(meta.db_table)} ({columns}) FROM STDIN"
+        ) as copy:
+            for obj in objects:
+                copy.write_row(
+                    [
+                        field.get_db_prep_save(
+                            getattr(obj, field.attname), connection
+                        )
+                        for field in fields
+                    ]
+                )
+    _saved(objects)
+
+
+def _saved(objects: list) -> None:
+    for obj in objects:
+        obj._state.adding = False
+        obj._state.db = connection.alias
+
+
+def bulk_changed(labels) -> None:
+    """
+    Does what the signals of single saves would have done after bulk
+    inserts of the models: makes the changes seen by the versions,
+    the reference data, the airport search index, the connection
+    graphs and the flight response cache
+    """
+    labels = set(labels)
+    for label in labels:
+        app_label, model_name = label.split(".")
+        if app_label == "airport":
+            bump_now_and_on_commit([model_version_key(model_name)])
+    if labels & REFERENCE_MODELS:
+        reference_data_changed()
+    if labels & SEARCH_MODELS:
+        transaction.on_commit(airports_changed)
+    if labels & GRAPH_MODELS:
+        transaction.on_commit(all_flights_changed)
+    if labels & FLIGHT_RESPONSE_MODELS:
+        invalidate_flight_listing()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import time
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport.exceptions import NotModified
+from airport.versions import get_last_modified, get_versions, model_version_key
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified to GET responses and answers them with
+    304 Not Modified right after the permission checks, before any
+    queryset is built. Both come from the version counters in the cache
+    of the models named in `version_models`, bumped on every change of
+    them, instead of the rendered body. Responses changing with time
+    without a change, as holds expire, are modified every
+    `refresh_seconds` too.
+    """
+
+    version_models = ()
+    # responses differ per user
+    user_specific = False
+    refresh_seconds = None
+
+    def get_version_keys(self):
+        """
+        Keys of the versions the response depends on,
+        None if they are not known before it is rendered
+        """
+        return [model_version_key(name) for name in self.version_models]
+
+    def get_version_tokens(self) -> list:
+        """Other values the response depends on"""
+        return []
+
+    def get_refresh_seconds(self):
+        return self.refresh_seconds
+
+    def get_refreshed_at(self):
+        """Start of the current `refresh_seconds` period, if any"""
+        seconds = self.get_refresh_seconds()
+        if not seconds:
+            return None
+        now = time.time()
+        return now - now % seconds
+
+    def get_validators(self):
+        """ETag and Last-Modified timestamp, None if not known yet"""
+        keys = self.get_version_keys()
+        if keys is None:
+            return None
+        # versions first, they start the change times of new keys
+        versions = get_versions(keys)
+        last_modified = get_last_modified(keys)
+        refreshed_at = self.get_refreshed_at()
+        if refreshed_at is not None:
+            last_modified = max(last_modified or 0, refreshed_at)
+        return (
+            self.make_etag([versions, refreshed_at]),
+            last_modified,
+        )
+
+    def make_etag(self, versions) -> str:
+        raw = json.dumps(
+            [
+                self.request.get_full_path(),
+                self.request.accepted_renderer.format,
+                self.request.user.pk if self.user_specific else None,
+                versions,
+                self.get_version_tokens(),
+            ],
+            default=str,
+        )
+        return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        if request.method not in ("GET", "HEAD"):
+            return
+        self.conditional_validators = self.get_validators()
+        if self.conditional_validators is not None:
+            etag, last_modified = self.conditional_validators
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=last_modified and int(last_modified),
+            )
+            if (
+                not_modified is not None
+                and not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+            ):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        validators = getattr(self, "conditional_validators", None)
+        if validators is not None and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            etag, last_modified = validators
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
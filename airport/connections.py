@@ -0,0 +1,277 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from airport.models import Flight
+from airport.versions import initial_version
+
+VERSION_KEY = "connections:version"
+CHANGES_KEY = "connections:changes:{}"
+# rebuilding the graph is cheaper than replaying a longer change log
+MAX_REPLAYED_CHANGES = 1000
+
+
+class Leg(NamedTuple):
+    flight_id: int
+    source_id: int
+    destination_id: int
+    departure_time: object
+    arrival_time: object
+
+
+class FlightGraph:
+    """
+    Time-expanded graph of flights: every airport keeps its departures
+    sorted by time, and an arrival connects to the departures of the
+    same airport within the allowed layover.
+    A graph returned by `get_graph` is not changed anymore, so that it
+    is searched without a lock: the changes are made to a `copy`.
+    """
+
+    def __init__(self, legs=None, departures=None):
+        self.legs = dict(legs or {})
+        self.departures = defaultdict(list, departures or {})
+        # departures of the airports shared with the copied graph
+        self.shared = set(self.departures)
+        self.version = None
+
+    def copy(self) -> "FlightGraph":
+        """
+        Copies the graph, sharing the departures of every airport
+        until the copy changes them
+        """
+        return FlightGraph(self.legs, self.departures)
+
+    def _own_departures(self, airport_id: int) -> list:
+        if airport_id in self.shared:
+            self.shared.discard(airport_id)
+            self.departures[airport_id] = list(self.departures[airport_id])
+        return self.departures[airport_id]
+
+    def add(self, leg: Leg) -> None:
+        self.remove(leg.flight_id)
+        self.legs[leg.flight_id] = leg
+        insort(
+            self._own_departures(leg.source_id),
+            (leg.departure_time, leg.flight_id),
+        )
+
+    def remove(self, flight_id: int) -> None:
+        leg = self.legs.pop(flight_id, None)
+        if leg is not None:
+            departures = self._own_departures(leg.source_id)
+            departures.pop(
+                bisect_left(departures, (leg.departure_time, flight_id))
+            )
+
+    def departures_from(self, airport_id: int, after, before):
+        departures = self.departures.get(airport_id, [])
+        index = bisect_left(departures, (after, 0))
+        while index < len(departures) and departures[index][0] <= before:
+            yield self.legs[departures[index][1]]
+            index += 1
+
+    def _search(self, heap, destination_id, max_legs, layover):
+        """
+        Dijkstra over (airport, legs taken) states ordered by arrival
+        time, starting from the given (arrival, itinerary) entries.
+        Returns the itinerary arriving first, or None.
+        """
+        min_layover, max_layover = layover
+        heapq.heapify(heap)
+        # earliest arrival at the airport found with at most n legs
+        reached = defaultdict(lambda: [None] * (max_legs + 1))
+        while heap:
+            arrival, itinerary = heapq.heappop(heap)
+            airport_id = self.legs[itinerary[-1]].destination_id
+            if airport_id == destination_id:
+                return [self.legs[flight_id] for flight_id in itinerary]
+            legs = len(itinerary)
+            best = reached[airport_id]
+            if any(
+                best[n] is not None and best[n] <= arrival
+                for n in range(legs + 1)
+            ):
+                continue
+            best[legs] = arrival
+            if legs == max_legs:
+                continue
+
+            visited = {self.legs[itinerary[0]].source_id} | {
+                self.legs[flight_id].destination_id for flight_id in itinerary
+            }
+            for leg in self.departures_from(
+                airport_id, arrival + min_layover, arrival + max_layover
+            ):
+                if leg.destination_id not in visited:
+                    heapq.heappush(
+                        heap, (leg.arrival_time, itinerary + (leg.flight_id,))
+                    )
+        return None
+
+    def earliest_arrival(
+        self, source_id, destination_id, after, before, max_legs, layover
+    ):
+        """Itinerary departing in [after, before] which arrives first"""
+        return self._search(
+            [
+                (leg.arrival_time, (leg.flight_id,))
+                for leg in self.departures_from(source_id, after, before)
+            ],
+            destination_id,
+            max_legs,
+            layover,
+        )
+
+    def shortest_duration(
+        self, source_id, destination_id, after, before, max_legs, layover
+    ):
+        """
+        Itinerary departing in [after, before] with the shortest time
+        from the first departure to the last arrival: the earliest
+        arrival is searched for every first leg in turn
+        """
+        shortest = None
+        for leg in self.departures_from(source_id, after, before):
+            itinerary = self._search(
+                [(leg.arrival_time, (leg.flight_id,))],
+                destination_id,
+                max_legs,
+                layover,
+            )
+            if itinerary is not None and (
+                shortest is None
+                or duration(itinerary) < duration(shortest)
+            ):
+                shortest = itinerary
+        return shortest
+
+
+def find_itineraries(
+    source_id, destination_id, after, before, max_connections, min_layover
+) -> dict:
+    """
+    Finds the earliest arriving and the shortest itineraries departing
+    in [after, before] with up to max_connections connections
+    """
+    graph = get_graph()
+    search = (
+        source_id,
+        destination_id,
+        after,
+        before,
+        max_connections + 1,
+        (
+            min_layover,
+            timedelta(minutes=settings.CONNECTION_MAX_LAYOVER_MINUTES),
+        ),
+    )
+    return {
+        "earliest_arrival": graph.earliest_arrival(*search),
+        "shortest_duration": graph.shortest_duration(*search),
+    }
+
+
+def duration(itinerary) -> timedelta:
+    return itinerary[-1].arrival_time - itinerary[0].departure_time
+
+
+def load_legs(flights):
+    return [
+        Leg(*values)
+        for values in flights.values_list(
+            "id",
+            "route__source_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+    ]
+
+
+def searchable_flights():
+    """
+    Flights of the graph: the ones that have not departed yet
+    or still can be connected to
+    """
+    return Flight.objects.filter(
+        departure_time__gte=timezone.now()
+        - timedelta(minutes=settings.CONNECTION_MAX_LAYOVER_MINUTES)
+    ).order_by()
+
+
+_graph = FlightGraph()
+_graph_lock = threading.Lock()
+
+
+def get_graph() -> FlightGraph:
+    """
+    Returns the graph of this process brought up to date: flights
+    changed since it was built are reloaded one by one from the change
+    log kept in the cache into a copy of the graph, and the whole graph
+    is rebuilt only when the log is not available. The lock is only
+    held to replace the graph, searches run on the graph they got.
+    """
+    global _graph
+    version = cache.get_or_set(VERSION_KEY, initial_version, timeout=None)
+    if _graph.version == version:
+        return _graph
+    with _graph_lock:
+        graph = _graph
+        if graph.version == version:
+            return graph
+
+        changed = None
+        if (
+            graph.version is not None
+            and 0 < version - graph.version <= MAX_REPLAYED_CHANGES
+        ):
+            changes = cache.get_many(
+                [
+                    CHANGES_KEY.format(number)
+                    for number in range(graph.version + 1, version + 1)
+                ]
+            )
+            if len(changes) == version - graph.version:
+                changed = set().union(*changes.values())
+
+        if changed is None:
+            graph = FlightGraph()
+            flights = searchable_flights()
+        else:
+            graph = graph.copy()
+            for flight_id in changed:
+                graph.remove(flight_id)
+            flights = searchable_flights().filter(id__in=changed)
+        for leg in load_legs(flights):
+            graph.add(leg)
+        graph.version = version
+        _graph = graph
+    return graph
+
+
+def flights_changed(flight_ids) -> None:
+    """Records the change of the flights for graphs of all the processes"""
+    cache.add(VERSION_KEY, initial_version(), timeout=None)
+    version = cache.incr(VERSION_KEY)
+    cache.set(
+        CHANGES_KEY.format(version),
+        list(flight_ids),
+        timeout=settings.CONNECTION_CHANGES_TIMEOUT,
+    )
+
+
+def all_flights_changed() -> None:
+    """
+    Makes the graphs of all the processes to be rebuilt, as after a bulk
+    import: a version without a change log can't be replayed
+    """
+    cache.add(VERSION_KEY, initial_version(), timeout=None)
+    cache.incr(VERSION_KEY)
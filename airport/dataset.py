@@ -0,0 +1,448 @@
+import itertools
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from airport.bulk import bulk_changed, bulk_insert
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+    SeatHold,
+)
+from airport.seatmap import SeatMap
+
+SYLLABLES = (
+    "ka", "lo", "mi", "ra", "ven", "tor", "sa", "li", "an", "de", "mor",
+    "vi", "na", "bel", "gra", "os", "tan", "ri", "po", "lan", "ur", "es",
+)
+FIRST_NAMES = (
+    "Anna", "Maria", "Olena", "Sofia", "Emma", "Laura", "Julia", "Sarah",
+    "Ivan", "Petro", "John", "David", "Michael", "Thomas", "Daniel",
+    "Andrii", "Oleh", "James", "Robert", "Linda", "Karen", "Mark",
+)
+LAST_NAMES = (
+    "Koval", "Bondar", "Shevchenko", "Smith", "Johnson", "Brown", "Miller",
+    "Davis", "Wilson", "Moore", "Taylor", "Anderson", "Melnyk", "Tkachenko",
+    "Kravets", "Garcia", "Martinez", "Harris", "Clark", "Lewis",
+)
+# seats in a row and the range of rows of the airplane types
+CABINS = ((4, 12, 20), (6, 20, 33), (6, 25, 40), (8, 30, 45), (10, 35, 50))
+# departures are banked around the morning and the evening peaks
+HOUR_WEIGHTS = (
+    1, 1, 1, 1, 2, 5, 9, 10, 9, 7, 6, 6, 6, 6, 6, 7, 8, 9, 10, 8, 6, 4, 2, 1,
+)
+ORDER_SIZES = (1, 2, 3, 4)
+ORDER_SIZE_WEIGHTS = (50, 30, 12, 8)
+EARTH_RADIUS_KM = 6371
+CRUISE_SPEED_KMH = 800
+# flights are generated, inserted and sold out in chunks of this size
+FLIGHTS_CHUNK = 100
+
+
+def zipf_weights(count: int, exponent: float) -> list:
+    """Cumulative weights of a Zipf distribution over `count` ranks"""
+    return list(
+        itertools.accumulate(
+            1 / rank**exponent for rank in range(1, count + 1)
+        )
+    )
+
+
+def distance_km(first: tuple, second: tuple) -> int:
+    """Great-circle distance between two (latitude, longitude) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*first, *second))
+    haversine = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return round(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(haversine)))
+
+
+class DatasetGenerator:
+    """
+    Generates a dataset of every model with the same random `seed` and
+    `start` date giving the same data. The data is skewed the way real
+    traffic is: Zipf-distributed hub airports, popular routes between
+    them with more flights and fuller airplanes, and frequent flyers
+    ordering most of the tickets. Flights depart in banks around the
+    morning and evening peaks from `days_before` days before the start
+    to `days_after` after it. Sold seats are set in the seat maps and
+    the tickets_sold counters, as the bookings would have done.
+
+    Rows are inserted in batches of `batch_size` with `bulk_insert`,
+    signals are not sent and `bulk_changed` is called at the end.
+    """
+
+    def __init__(
+        self,
+        counts: dict,
+        seed: int = 0,
+        start: datetime = None,
+        days_before: int = 90,
+        days_after: int = 180,
+        load_factor: float = 0.8,
+        hub_skew: float = 1.1,
+        password: str = "password",
+        batch_size: int = 5000,
+        use_copy: bool = False,
+    ):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.start = start or datetime.now(dt_timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        self.days_before = days_before
+        self.days_after = days_after
+        self.load_factor = load_factor
+        self.hub_skew = hub_skew
+        self.password = password
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.inserted = Counter()
+        self.seconds = Counter()
+
+    def generate(self) -> None:
+        countries = self.insert(
+            Country(name=name)
+            for name in self._unique_names(self.counts["countries"], 2)
+        )
+        cities = self._generate_cities(countries)
+        airports = self._generate_airports(cities)
+        airplane_types = self.insert(
+            AirplaneType(name=f"{name} {100 + index * 10}")
+            for index, name in enumerate(
+                self._unique_names(self.counts["airplane_types"], 2)
+            )
+        )
+        airplanes = self._generate_airplanes(airplane_types)
+        crew = self.insert(
+            Crew(
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+            )
+            for _ in range(self.counts["crew"])
+        )
+        routes, route_weights = self._generate_routes(airports)
+        password = make_password(self.password)
+        users = self.insert(
+            get_user_model()(
+                email=f"user{index}@example.com",
+                password=password,
+                first_name=self.rng.choice(FIRST_NAMES),
+                last_name=self.rng.choice(LAST_NAMES),
+                date_joined=self.start - timedelta(days=self.days_before),
+            )
+            for index in range(self.counts["users"])
+        )
+        self._generate_flights(
+            routes, route_weights, airplanes, crew, [user.id for user in users]
+        )
+        bulk_changed(
+            model._meta.label_lower
+            for model in (
+                Country,
+                City,
+                AirplaneType,
+                Airplane,
+                Airport,
+                Crew,
+                Route,
+                Flight,
+                Order,
+                Ticket,
+                SeatHold,
+            )
+        )
+
+    def insert(self, objects, returning_ids: bool = True) -> list:
+        """Inserts the objects in batches, returns them if they have ids"""
+        inserted = []
+        objects = iter(objects)
+        while batch := list(itertools.islice(objects, self.batch_size)):
+            started = time.perf_counter()
+            bulk_insert(batch, self.use_copy, returning_ids)
+            label = batch[0]._meta.label_lower
+            self.inserted[label] += len(batch)
+            self.seconds[label] += time.perf_counter() - started
+            if returning_ids:
+                inserted.extend(batch)
+        return inserted
+
+    def _unique_names(self, count: int, syllables: int) -> list:
+        names = set()
+        ordered = []
+        while len(ordered) < count:
+            name = "".join(
+                self.rng.choice(SYLLABLES)
+                for _ in range(syllables + self.rng.randint(0, 1))
+            ).capitalize()
+            if name in names:
+                # the short names run out on large datasets
+                name = f"{name} {len(ordered)}"
+            names.add(name)
+            ordered.append(name)
+        return ordered
+
+    def _generate_cities(self, countries: list) -> list:
+        weights = zipf_weights(len(countries), 1.0)
+        cities = self.insert(
+            City(name=name, country=country)
+            for name, country in zip(
+                self._unique_names(self.counts["cities"], 3),
+                self.rng.choices(
+                    countries, cum_weights=weights, k=self.counts["cities"]
+                ),
+            )
+        )
+        for city in cities:
+            # uniform over the area of the inhabited latitudes
+            city.location = (
+                math.degrees(math.asin(self.rng.uniform(-0.8, 0.9))),
+                self.rng.uniform(-180, 180),
+            )
+        return cities
+
+    def _generate_airports(self, cities: list) -> list:
+        """Airports in the order of their traffic, the hubs first"""
+        weights = zipf_weights(len(cities), 0.8)
+        airports = self.insert(
+            Airport(
+                name=f"{city.name} {self.rng.choice(SYLLABLES).title()}"
+                f"{self.rng.choice(SYLLABLES)} {index}",
+                city=city,
+                closest_big_city=city.name,
+            )
+            for index, city in enumerate(
+                self.rng.choices(
+                    cities, cum_weights=weights, k=self.counts["airports"]
+                )
+            )
+        )
+        for airport in airports:
+            airport.location = airport.city.location
+        self.rng.shuffle(airports)
+        return airports
+
+    def _generate_airplanes(self, airplane_types: list) -> list:
+        cabins = {
+            airplane_type.id: self.rng.choice(CABINS)
+            for airplane_type in airplane_types
+        }
+        airplanes = []
+        for index in range(self.counts["airplanes"]):
+            airplane_type = self.rng.choice(airplane_types)
+            seats_in_row, min_rows, max_rows = cabins[airplane_type.id]
+            airplanes.append(
+                Airplane(
+                    name=f"{airplane_type.name} UR-{index:05d}",
+                    rows=self.rng.randint(min_rows, max_rows),
+                    seats_in_row=seats_in_row,
+                    airplane_type=airplane_type,
+                )
+            )
+        return self.insert(airplanes)
+
+    def _generate_routes(self, airports: list):
+        """The routes and the weights of their popularity"""
+        airport_weights = zipf_weights(len(airports), self.hub_skew)
+        count = min(self.counts["routes"], len(airports) * (len(airports) - 1))
+        pairs = {}
+        while len(pairs) < count:
+            source, destination = self.rng.choices(
+                range(len(airports)), cum_weights=airport_weights, k=2
+            )
+            if source == destination or (source, destination) in pairs:
+                continue
+            # the busier the airports, the more popular the route
+            pairs[source, destination] = 1 / ((source + 1) * (destination + 1))
+            if len(pairs) < count and (destination, source) not in pairs:
+                pairs[destination, source] = pairs[source, destination]
+        routes = self.insert(
+            Route(
+                source=airports[source],
+                destination=airports[destination],
+                distance=max(
+                    distance_km(
+                        airports[source].location,
+                        airports[destination].location,
+                    ),
+                    100,
+                ),
+            )
+            for source, destination in pairs
+        )
+        return routes, list(pairs.values())
+
+    def _generate_flights(
+        self, routes, route_weights, airplanes, crew, user_ids
+    ) -> None:
+        route_cum_weights = list(itertools.accumulate(route_weights))
+        busiest = max(route_weights)
+        user_weights = zipf_weights(len(user_ids), 1.0)
+        hour_weights = list(itertools.accumulate(HOUR_WEIGHTS))
+        # the busiest routes are flown by the largest airplanes
+        airplanes = sorted(airplanes, key=lambda airplane: -airplane.capacity)
+        crew_ids = [member.id for member in crew]
+        hold_rate = self.counts["holds"] / max(self.counts["flights"], 1)
+
+        remaining = self.counts["flights"]
+        while remaining:
+            size = min(FLIGHTS_CHUNK, remaining)
+            remaining -= size
+            flights = []
+            sold_seats = []
+            for index in self.rng.choices(
+                range(len(routes)), cum_weights=route_cum_weights, k=size
+            ):
+                share = math.sqrt(route_weights[index] / busiest)
+                flight = self._new_flight(
+                    routes[index], airplanes, share, hour_weights
+                )
+                sold_seats.append(self._sell_seats(flight, share))
+                flights.append(flight)
+            self.insert(flights)
+
+            self.insert(
+                (
+                    Flight.crew.through(flight_id=flight.id, crew_id=crew_id)
+                    for flight in flights
+                    for crew_id in self.rng.sample(
+                        crew_ids, min(len(crew_ids), self.rng.randint(2, 5))
+                    )
+                ),
+                returning_ids=False,
+            )
+            self._generate_orders(flights, sold_seats, user_ids, user_weights)
+            self.insert(
+                (
+                    self._new_hold(flight, seats, user_ids)
+                    for flight, seats in zip(flights, sold_seats)
+                    if flight.departure_time > self.start
+                    and len(seats) < flight.airplane.capacity
+                    and self.rng.random() < hold_rate
+                ),
+                returning_ids=False,
+            )
+
+    def _new_flight(self, route, airplanes, share: float, hour_weights):
+        airplane = airplanes[
+            int(self.rng.random() * len(airplanes) * (1 - 0.8 * share))
+        ]
+        departure = self.start + timedelta(
+            days=self.rng.randrange(-self.days_before, self.days_after),
+            hours=self.rng.choices(range(24), cum_weights=hour_weights)[0],
+            minutes=5 * self.rng.randrange(12),
+        )
+        return Flight(
+            route=route,
+            airplane=airplane,
+            departure_time=departure,
+            arrival_time=departure
+            + timedelta(
+                minutes=30 + round(route.distance / CRUISE_SPEED_KMH * 60)
+            ),
+        )
+
+    def _sell_seats(self, flight, share: float) -> list:
+        """
+        Sells seats of the flight, more of the busier routes and fewer
+        of the later flights, and returns them by rows and seats
+        """
+        airplane = flight.airplane
+        load = min(self.load_factor * (0.8 + 0.4 * share), 0.98)
+        days_left = (flight.departure_time - self.start).days
+        if days_left > 0:
+            load *= max(1 - days_left / (self.days_after + 30), 0.05)
+        load = self.rng.betavariate(20 * load, 20 * (1 - load))
+        positions = sorted(
+            self.rng.sample(
+                range(airplane.capacity), round(airplane.capacity * load)
+            )
+        )
+        seat_map = SeatMap(airplane.rows, airplane.seats_in_row)
+        seats = []
+        for position in positions:
+            row, seat = divmod(position, airplane.seats_in_row)
+            seat_map.take(row + 1, seat + 1)
+            seats.append((row + 1, seat + 1))
+        flight.tickets_sold = len(seats)
+        flight.seat_map = bytes(seat_map)
+        return seats
+
+    def _generate_orders(self, flights, sold_seats, user_ids, user_weights):
+        """Orders of the sold seats, neighbour seats go to one order"""
+        orders = []
+        order_seats = []
+        for flight, seats in zip(flights, sold_seats):
+            position = 0
+            while position < len(seats):
+                size = self.rng.choices(
+                    ORDER_SIZES, weights=ORDER_SIZE_WEIGHTS
+                )[0]
+                created_at = flight.departure_time - timedelta(
+                    hours=1 + self.rng.expovariate(1 / (24 * 20))
+                )
+                if created_at > self.start:
+                    created_at = self.start - timedelta(
+                        minutes=self.rng.randrange(7 * 24 * 60)
+                    )
+                orders.append(
+                    Order(
+                        user_id=self.rng.choices(
+                            user_ids, cum_weights=user_weights
+                        )[0],
+                        created_at=created_at,
+                    )
+                )
+                order_seats.append(
+                    (flight.id, seats[position:position + size])
+                )
+                position += size
+        self.insert(orders)
+        self.insert(
+            (
+                Ticket(order=order, flight_id=flight_id, row=row, seat=seat)
+                for order, (flight_id, seats) in zip(orders, order_seats)
+                for row, seat in seats
+            ),
+            returning_ids=False,
+        )
+
+    def _new_hold(self, flight, sold_seats: list, user_ids) -> SeatHold:
+        """A hold of up to two free seats of the flight, live at `start`"""
+        airplane = flight.airplane
+        sold = set(sold_seats)
+        free = [
+            (row, seat)
+            for row in range(1, airplane.rows + 1)
+            for seat in range(1, airplane.seats_in_row + 1)
+            if (row, seat) not in sold
+        ]
+        seats = self.rng.sample(free, min(len(free), self.rng.randint(1, 2)))
+        created_at = self.start - timedelta(
+            seconds=self.rng.randrange(settings.SEAT_HOLD_SECONDS)
+        )
+        return SeatHold(
+            flight=flight,
+            user_id=self.rng.choice(user_ids),
+            seats=[{"row": row, "seat": seat} for row, seat in seats],
+            seats_count=len(seats),
+            created_at=created_at,
+            expires_at=created_at
+            + timedelta(seconds=settings.SEAT_HOLD_SECONDS),
+        )
@@ -0,0 +1,44 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class SeatsTaken(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the seats are already taken."
+    default_code = "seats_taken"
+
+    def __init__(self, seats):
+        """seats is an iterable of (flight_id, row, seat)"""
+        super().__init__()
+        self.seats = sorted(seats)
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"flight": flight_id, "row": row, "seat": seat}
+                for flight_id, row, seat in self.seats
+            ],
+        }
+
+
+class NotEnoughSeats(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "There are not enough free seats on the flight."
+    default_code = "not_enough_seats"
+
+
+class FlightBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The flight is busy with other bookings, try again."
+    default_code = "flight_busy"
+
+
+class HoldExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The seat hold has expired."
+    default_code = "hold_expired"
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = "Not modified."
+    default_code = "not_modified"
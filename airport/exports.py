@@ -0,0 +1,150 @@
+import csv
+import json
+from datetime import datetime
+from functools import partial
+
+from django.conf import settings
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+from airport.models import Ticket
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# column names of the exports and the lookups of their values
+FLIGHT_EXPORT_COLUMNS = {
+    "id": "id",
+    "route": "route_id",
+    "source": "route__source__name",
+    "destination": "route__destination__name",
+    "airplane": "airplane__name",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+    "capacity": "capacity",
+    "tickets_sold": "tickets_sold",
+}
+TICKET_EXPORT_COLUMNS = {
+    "id": "id",
+    "flight": "flight_id",
+    "row": "row",
+    "seat": "seat",
+    "order": "order_id",
+    "ordered_at": "order__created_at",
+    "user": "order__user__email",
+}
+ORDER_EXPORT_COLUMNS = {
+    "order": "order_id",
+    "created_at": "order__created_at",
+    "user": "order__user__email",
+    "ticket": "id",
+    "flight": "flight_id",
+    "departure_time": "flight__departure_time",
+    "row": "row",
+    "seat": "seat",
+}
+
+_datetime = serializers.DateTimeField()
+
+
+def flight_export(queryset):
+    """The flights by departure time"""
+    return queryset.annotate(
+        capacity=F("airplane__rows") * F("airplane__seats_in_row")
+    ).order_by("departure_time", "id")
+
+
+def ticket_export(flight_id: int):
+    """Every ticket on the flight, by seat"""
+    return Ticket.objects.filter(flight_id=flight_id).order_by("row", "seat")
+
+
+def order_export(created_after=None, created_before=None):
+    """
+    The orders created in the range, one row per ticket, in the order
+    of their ids which follows the creation time
+    """
+    queryset = Ticket.objects.all()
+    if created_after is not None:
+        queryset = queryset.filter(order__created_at__gte=created_after)
+    if created_before is not None:
+        queryset = queryset.filter(order__created_at__lt=created_before)
+    return queryset.order_by("order_id", "id")
+
+
+class _Echo:
+    """File-like object returning what csv.writer writes to it"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return _datetime.to_representation(value)
+    return value
+
+
+def _json_line(names: list, row: list) -> str:
+    return json.dumps(dict(zip(names, row))) + "\n"
+
+
+def export_lines(queryset, columns: dict, export_format: str, chunk_size=None):
+    """
+    Yields the export of the columns of the queryset in chunks of
+    `chunk_size` rows. The rows are fetched as tuples by an iterator,
+    through a server-side cursor on PostgreSQL, so the memory used
+    does not grow with the number of rows.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    names = list(columns)
+    rows = (
+        queryset.prefetch_related(None)
+        .values_list(*columns.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    if export_format == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+        encode = writer.writerow
+    else:
+        encode = partial(_json_line, names)
+
+    lines = []
+    for row in rows:
+        lines.append(encode([_value(value) for value in row]))
+        if len(lines) == chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def export_response(queryset, columns: dict, export_format: str, name: str):
+    """Streams the export as an attachment named `name`"""
+    response = StreamingHttpResponse(
+        export_lines(queryset, columns, export_format),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}.{export_format}"'
+    )
+    return response
+
+
+class ExportMixin:
+    """
+    The `export_actions` stream their responses, which are neither
+    cached nor answered with 304 Not Modified
+    """
+
+    export_actions = ()
+
+    def get_validators(self):
+        if self.action in self.export_actions:
+            return None
+        return super().get_validators()
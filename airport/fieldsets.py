@@ -0,0 +1,119 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        FIELDS_PARAM,
+        type=OpenApiTypes.STR,
+        description="Return only these fields, nested ones by dotted "
+                    "paths, id is always returned "
+                    "(ex. ?fields=id,tickets.row,tickets.seat)",
+    ),
+    OpenApiParameter(
+        EXPAND_PARAM,
+        type=OpenApiTypes.STR,
+        description="Embed only these nested objects, the others are "
+                    "returned as ids (ex. ?expand=tickets)",
+    ),
+]
+
+
+def get_paths(request, param: str):
+    """
+    Dotted paths listed in the parameter of a read request,
+    None if it is not given
+    """
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return {path.strip() for path in value.split(",") if path.strip()}
+
+
+def is_requested(fields, path: str) -> bool:
+    """The field is selected by itself, with its parent or its child"""
+    return fields is None or any(
+        field == path
+        or path.startswith(f"{field}.")
+        or field.startswith(f"{path}.")
+        for field in fields
+    )
+
+
+def is_expanded(expand, path: str) -> bool:
+    """The nested object is expanded by itself or with its child"""
+    return expand is None or any(
+        field == path or field.startswith(f"{path}.") for field in expand
+    )
+
+
+def collapse(field):
+    """Primary key(s) of the objects in place of the nested serializer"""
+    return serializers.PrimaryKeyRelatedField(
+        source=field.source,
+        many=isinstance(field, serializers.ListSerializer),
+        read_only=True,
+    )
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Leaves only the fields selected by ?fields= and replaces the nested
+    serializers not selected by ?expand= with the ids of their objects
+    """
+
+    def get_path(self) -> str:
+        """Dotted path of the serializer in the response"""
+        names = []
+        field = self
+        while field.parent is not None:
+            if field.field_name:
+                names.append(field.field_name)
+            field = field.parent
+        return "".join(f"{name}." for name in reversed(names))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        selected = get_paths(request, FIELDS_PARAM)
+        expand = get_paths(request, EXPAND_PARAM)
+        if selected is None and expand is None:
+            return fields
+
+        prefix = self.get_path()
+        for name, field in list(fields.items()):
+            path = prefix + name
+            if name != "id" and not is_requested(selected, path):
+                del fields[name]
+            elif isinstance(
+                field, serializers.BaseSerializer
+            ) and not is_expanded(expand, path):
+                fields[name] = collapse(field)
+        return fields
+
+
+class SparseFieldsViewMixin:
+    """
+    Tells which fields the response of the request has,
+    so that only they are joined and prefetched
+    """
+
+    sparse_fields_actions = ("list", "retrieve")
+
+    def field_requested(self, path: str) -> bool:
+        if self.action not in self.sparse_fields_actions:
+            return True
+        return is_requested(get_paths(self.request, FIELDS_PARAM), path)
+
+    def field_expanded(self, path: str) -> bool:
+        """The field is requested and embedded as an object"""
+        if not self.field_requested(path):
+            return False
+        if self.action not in self.sparse_fields_actions:
+            return True
+        return is_expanded(get_paths(self.request, EXPAND_PARAM), path)
@@ -0,0 +1,127 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from airport.metrics import cache_lookup
+from airport.profiling import count as count_for_profile
+from airport.versions import bump_now_and_on_commit, get_versions
+
+LISTING_VERSION_KEY = "flights:listing"
+FLIGHT_VERSION_KEY = "flights:flight:{}"
+RESPONSE_KEY = "flights:response:{}"
+STATS_KEY = "flights:stats:{}"
+STATS = ("hits", "misses", "evictions")
+
+
+def response_key(request, action: str) -> str:
+    """
+    Key of the response to the request: blank parameters and the first
+    page number do not change the response, so they are dropped
+    """
+    params = sorted(
+        (name, value.strip())
+        for name, values in request.query_params.lists()
+        for value in values
+        if value.strip() and (name, value.strip()) != ("page", "1")
+    )
+    raw = f"{action}|{request.get_host()}|{request.path}|{urlencode(params)}"
+    return RESPONSE_KEY.format(hashlib.sha256(raw.encode()).hexdigest())
+
+
+def version_keys(flight_ids) -> list:
+    return [LISTING_VERSION_KEY] + [
+        FLIGHT_VERSION_KEY.format(flight_id) for flight_id in flight_ids
+    ]
+
+
+def count(stat: str) -> None:
+    count_for_profile(f"cache_{stat}")
+    cache_lookup("flight_response", stat)
+    key = STATS_KEY.format(stat)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_stats() -> dict:
+    stats = cache.get_many([STATS_KEY.format(stat) for stat in STATS])
+    return {stat: stats.get(STATS_KEY.format(stat), 0) for stat in STATS}
+
+
+def reset_stats() -> None:
+    cache.delete_many([STATS_KEY.format(stat) for stat in STATS])
+
+
+def get_entry(request, action: str):
+    """
+    Cached response to the request, None if there is none or the flight
+    listing or any flight in it has changed since it was rendered.
+    An outdated entry is counted as an eviction.
+    """
+    entry = cache.get(response_key(request, action))
+    if entry is None:
+        return None
+    if get_versions(version_keys(entry["flights"])) != entry["versions"]:
+        count("evictions")
+        return None
+    return entry
+
+
+def cached_response(request, action: str, entry, render, flight_ids):
+    """
+    Returns the response of the entry got with `get_entry`, or renders
+    it with `render` and caches it when there is no entry. `flight_ids`
+    extracts ids of the flights from the response data. The response
+    carries its entry in `flight_cache_entry`.
+    """
+    if entry is not None:
+        count("hits")
+        response = Response(entry["data"])
+        response.flight_cache_entry = entry
+        return response
+    count("misses")
+
+    # the listing version is read before rendering, so a flight added
+    # meanwhile makes the entry outdated; changes of the rendered
+    # flights in between are caught up by the timeout of the entry
+    listing_version = get_versions([LISTING_VERSION_KEY])[0]
+    response = render()
+    if response.status_code == status.HTTP_200_OK:
+        flights = flight_ids(response.data)
+        versions = get_versions(version_keys(flights))
+        versions[0] = listing_version
+        entry = {
+            "flights": flights,
+            "versions": versions,
+            "rendered_at": time.time(),
+            "data": response.data,
+        }
+        cache.set(
+            response_key(request, action),
+            entry,
+            timeout=settings.FLIGHT_CACHE_TIMEOUT,
+        )
+        response.flight_cache_entry = entry
+    return response
+
+
+def invalidate_flights(flight_ids) -> None:
+    """Outdates cached responses with the flights"""
+    bump_now_and_on_commit(
+        [FLIGHT_VERSION_KEY.format(flight_id) for flight_id in flight_ids]
+    )
+
+
+def invalidate_flight_listing() -> None:
+    """
+    Outdates all the cached flight responses, for changes that add
+    or remove flights from the lists or that are shown in every flight
+    """
+    bump_now_and_on_commit([LISTING_VERSION_KEY])
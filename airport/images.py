@@ -0,0 +1,227 @@
+import io
+import logging
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from airport.flight_cache import invalidate_flights
+from airport.models import Airplane, Flight, ImageStatus
+from airport.versions import bump_now_and_on_commit, model_version_key
+
+# Pillow formats and options of the variants by their file extension
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANTS_DIRECTORY = "uploads/airplanes/variants/"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidImage(ValueError):
+    """The file can't be decoded as an image"""
+
+
+def _area(box) -> int:
+    return box[0] * box[1]
+
+
+def make_variants(file, sizes: dict) -> dict:
+    """
+    Decodes the image once and returns copies of it fitted into every
+    box of `sizes` in every format of IMAGE_FORMATS, as bytes by size
+    and format. The copies are turned by the EXIF orientation and keep
+    no metadata. JPEGs are decoded at the smallest scale the largest
+    box fits, and every copy is resized from the next larger one.
+    """
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            if width * height > settings.AIRPLANE_IMAGE_MAX_PIXELS:
+                raise InvalidImage(
+                    f"The image has more than "
+                    f"{settings.AIRPLANE_IMAGE_MAX_PIXELS} pixels"
+                )
+            image.draft("RGB", max(sizes.values(), key=_area))
+            image = ImageOps.exif_transpose(image)
+            has_alpha = (
+                image.mode in ("RGBA", "LA", "PA")
+                or "transparency" in image.info
+            )
+            source = image.convert("RGBA" if has_alpha else "RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError) as error:
+        raise InvalidImage(str(error))
+    except OSError as error:
+        raise InvalidImage(f"The image can't be decoded: {error}")
+
+    variants = {}
+    for name, box in sorted(
+        sizes.items(), key=lambda item: _area(item[1]), reverse=True
+    ):
+        source = source.copy()
+        source.thumbnail(box, Image.Resampling.LANCZOS)
+        source.info = {}
+        variants[name] = {
+            extension: _encode(source, extension)
+            for extension in IMAGE_FORMATS
+        }
+    return variants
+
+
+def _encode(image, extension: str) -> bytes:
+    image_format, options = IMAGE_FORMATS[extension]
+    if image_format == "JPEG" and image.mode == "RGBA":
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def save_variants(airplane, variants: dict) -> dict:
+    """Stores the variants next to the image, returns their paths"""
+    storage = airplane.image.storage
+    stem, _ = os.path.splitext(os.path.basename(airplane.image.name))
+    return {
+        name: {
+            extension: storage.save(
+                f"{VARIANTS_DIRECTORY}{stem}-{name}.{extension}",
+                ContentFile(data),
+            )
+            for extension, data in formats.items()
+        }
+        for name, formats in variants.items()
+    }
+
+
+def delete_variants(storage, variants: dict) -> None:
+    for formats in variants.values():
+        for path in formats.values():
+            storage.delete(path)
+
+
+def airplane_image_changed(airplane_id: int) -> None:
+    """Outdates the responses with the airplane, as its save would"""
+    bump_now_and_on_commit([model_version_key("airplane")])
+    invalidate_flights(
+        Flight.objects.filter(airplane_id=airplane_id)
+        .values_list("id", flat=True)
+        .order_by()
+    )
+
+
+def claimable_images() -> Q:
+    """
+    Images to process: the pending ones and the ones left processing
+    for AIRPLANE_IMAGE_CLAIM_TIMEOUT by a stopped worker
+    """
+    stale = timezone.now() - timedelta(
+        seconds=settings.AIRPLANE_IMAGE_CLAIM_TIMEOUT
+    )
+    return Q(image_status=ImageStatus.PENDING) | Q(
+        image_status=ImageStatus.PROCESSING, image_claimed_at__lt=stale
+    )
+
+
+def process_airplane_image(airplane_id: int):
+    """
+    Makes the variants of the claimable image of the airplane and
+    returns the new status of the image, or None when another process
+    has taken the image or it has been replaced meanwhile. The image is
+    taken by moving it to "processing" with the time of the claim, so
+    that it is processed once, and only the process of the latest claim
+    stores its variants.
+    """
+    airplane = (
+        Airplane.objects.only("image", "image_variants")
+        .filter(claimable_images(), pk=airplane_id)
+        .first()
+    )
+    if airplane is None or not airplane.image:
+        return None
+    image = Airplane.objects.filter(pk=airplane_id, image=airplane.image.name)
+    claimed_at = timezone.now()
+    if not image.filter(claimable_images()).update(
+        image_status=ImageStatus.PROCESSING, image_claimed_at=claimed_at
+    ):
+        return None
+
+    storage = airplane.image.storage
+    try:
+        with airplane.image.open("rb") as file:
+            variants = make_variants(file, settings.AIRPLANE_IMAGE_VARIANTS)
+    except (InvalidImage, OSError) as error:
+        logger.warning("Airplane %s image failed: %s", airplane_id, error)
+        status, paths = ImageStatus.FAILED, {}
+    else:
+        status, paths = ImageStatus.READY, save_variants(airplane, variants)
+
+    with transaction.atomic():
+        updated = image.filter(
+            image_status=ImageStatus.PROCESSING, image_claimed_at=claimed_at
+        ).update(image_status=status, image_variants=paths)
+        if updated:
+            airplane_image_changed(airplane_id)
+    delete_variants(storage, airplane.image_variants if updated else paths)
+    return status if updated else None
+
+
+def process_pending_images(limit: int = None) -> Counter:
+    """
+    Processes the pending images and the ones left by stopped workers,
+    returns the number by new status
+    """
+    airplane_ids = list(
+        Airplane.objects.filter(claimable_images())
+        .order_by("pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+    return Counter(
+        status
+        for status in map(process_airplane_image, airplane_ids)
+        if status is not None
+    )
+
+
+def queue_airplane_image(airplane_id: int) -> None:
+    """
+    Processes the image in one of AIRPLANE_IMAGE_THREADS threads after
+    the commit, or leaves it to process_airplane_images with no threads
+    """
+    if settings.AIRPLANE_IMAGE_THREADS:
+        transaction.on_commit(
+            lambda: _get_executor().submit(_process_in_thread, airplane_id)
+        )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                settings.AIRPLANE_IMAGE_THREADS,
+                thread_name_prefix="airplane-images",
+            )
+        return _executor
+
+
+def _process_in_thread(airplane_id: int) -> None:
+    try:
+        process_airplane_image(airplane_id)
+    except Exception:
+        logger.exception("Airplane %s image failed", airplane_id)
+    finally:
+        connection.close()
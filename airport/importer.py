@@ -0,0 +1,253 @@
+import csv
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.utils import timezone
+
+from airport.bulk import bulk_changed, bulk_insert, can_copy
+
+# models in the order they depend on each other, with their natural keys
+IMPORT_MODELS = {
+    "airport.country": "name",
+    "airport.city": "name",
+    "airport.airplanetype": "name",
+    "airport.airplane": "name",
+    "airport.airport": "name",
+    "airport.route": None,
+    "airport.crew": None,
+    "airport.flight": None,
+    "user.user": "email",
+}
+READ_SIZE = 64 * 1024
+# the natural key of several objects, such as the name of two cities
+AMBIGUOUS = object()
+_SEPARATORS = re.compile(r"[\s,\[\]]*")
+
+
+class InvalidObject(ValueError):
+    """An object of the input can't be imported"""
+
+
+def read_json(file, read_size: int = READ_SIZE):
+    """
+    Yields the objects of a JSON array, as dumped by dumpdata, or of
+    JSON lines one by one, reading the file `read_size` characters
+    at a time
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, end_of_file = "", 0, False
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            try:
+                data, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the object continues in the next read
+                if end_of_file:
+                    raise
+            else:
+                yield data
+                continue
+        elif end_of_file:
+            return
+        chunk = file.read(read_size)
+        end_of_file = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def read_csv(file, model: str):
+    """
+    Yields the rows of a CSV file with a header of field names
+    as objects of the model
+    """
+    for row in csv.DictReader(file):
+        yield {"model": model, "fields": row}
+
+
+class BulkImporter:
+    """
+    Inserts objects of the dumpdata format in batches of `batch_size`
+    with `bulk_insert`, through COPY where it is available. Objects
+    of a model must follow the ones they refer to.
+
+    Every object gets a new id. References are either ids of objects of
+    the input, by their "pk" or their position among the objects of
+    their model like loaddata assigns them to an empty database, ids of
+    existing objects, or natural keys of IMPORT_MODELS, such as the
+    names of countries, cities and airports, resolved through in-memory
+    maps. Names shared by several objects, in the database or the input,
+    are errors: such objects are referred to by id. Many-to-many fields
+    are lists, or ";"-separated in CSV. Fields the models don't have
+    are errors unless `ignore_nonexistent`.
+
+    Signals are not sent, `finish` does what they would have done.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 5000,
+        use_copy: bool = None,
+        ignore_nonexistent: bool = False,
+    ):
+        self.batch_size = batch_size
+        self.ignore_nonexistent = ignore_nonexistent
+        self.use_copy = can_copy() if use_copy is None else use_copy
+        # ids of the objects of the input by model and their input id
+        self.ids = defaultdict(dict)
+        self.natural_keys = {}
+        self.positions = Counter()
+        self.counts = Counter()
+        self.seconds = Counter()
+        self.label = None
+        self.batch = []
+
+    def add(self, data: dict) -> None:
+        label = data.get("model", "").lower()
+        if label not in IMPORT_MODELS:
+            raise InvalidObject(f"Model {label!r} can't be imported")
+        if label != self.label:
+            self.flush()
+            self.label = label
+        model = apps.get_model(label)
+        self.positions[label] += 1
+        values, many_to_many = self._resolve(model, data.get("fields", {}))
+        self.batch.append(
+            (
+                data.get("pk", self.positions[label]),
+                model(**values),
+                many_to_many,
+            )
+        )
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.batch:
+            return
+        started = time.perf_counter()
+        label = self.label
+        objects = [obj for _, obj, _ in self.batch]
+        bulk_insert(objects, self.use_copy)
+        for input_id, obj, _ in self.batch:
+            self.ids[label][input_id] = obj.pk
+        if label in self.natural_keys:
+            key = IMPORT_MODELS[label]
+            self._add_natural_keys(
+                self.natural_keys[label],
+                ((getattr(obj, key), obj.pk) for obj in objects),
+            )
+
+        relations = defaultdict(list)
+        for _, obj, many_to_many in self.batch:
+            for field, targets in many_to_many.items():
+                through = field.remote_field.through
+                relations[through].extend(
+                    through(
+                        **{
+                            f"{field.m2m_field_name()}_id": obj.pk,
+                            f"{field.m2m_reverse_field_name()}_id": target,
+                        }
+                    )
+                    for target in targets
+                )
+        for through_objects in relations.values():
+            if through_objects:
+                bulk_insert(
+                    through_objects, self.use_copy, returning_ids=False
+                )
+
+        self.counts[label] += len(self.batch)
+        self.seconds[label] += time.perf_counter() - started
+        self.batch = []
+
+    def finish(self) -> None:
+        """
+        Inserts the last batch and makes the changes seen by the caches,
+        the versions of the models and the indexes
+        """
+        self.flush()
+        bulk_changed(self.counts)
+
+    def _resolve(self, model, fields: dict):
+        values = {}
+        many_to_many = {}
+        for name, value in fields.items():
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                if self.ignore_nonexistent:
+                    continue
+                raise InvalidObject(
+                    f"{model._meta.label_lower} has no field {name!r}"
+                )
+            if field.many_to_many:
+                if isinstance(value, str):
+                    value = [item for item in value.split(";") if item]
+                many_to_many[field] = [
+                    self._resolve_reference(field, item) for item in value
+                ]
+            elif field.is_relation:
+                values[field.attname] = self._resolve_reference(field, value)
+            else:
+                values[field.attname] = self._to_python(field, value)
+        return values, many_to_many
+
+    @staticmethod
+    def _to_python(field, value):
+        if value == "" and field.null:
+            return None
+        try:
+            value = field.to_python(value)
+        except ValidationError as error:
+            raise InvalidObject(f"{field.name}: {error.messages[0]}")
+        if (
+            settings.USE_TZ
+            and isinstance(value, datetime)
+            and timezone.is_naive(value)
+        ):
+            value = timezone.make_aware(value)
+        return value
+
+    def _resolve_reference(self, field, value):
+        if value is None or value == "":
+            return None
+        label = field.related_model._meta.label_lower
+        if isinstance(value, str) and IMPORT_MODELS.get(label):
+            pk = self._get_natural_keys(label).get(value)
+            if pk is AMBIGUOUS:
+                raise InvalidObject(
+                    f"{field.name}: several {label} objects are {value!r}, "
+                    f"refer to it by id"
+                )
+            if pk is not None:
+                return pk
+        try:
+            input_id = int(value)
+        except (TypeError, ValueError):
+            raise InvalidObject(f"{field.name}: unknown {label} {value!r}")
+        return self.ids[label].get(input_id, input_id)
+
+    def _get_natural_keys(self, label: str) -> dict:
+        """Ids by the natural keys of the model, loaded on first use"""
+        if label not in self.natural_keys:
+            self.natural_keys[label] = self._add_natural_keys(
+                {},
+                apps.get_model(label)
+                .objects.values_list(IMPORT_MODELS[label], "pk")
+                .order_by(),
+            )
+        return self.natural_keys[label]
+
+    @staticmethod
+    def _add_natural_keys(natural_keys: dict, pairs) -> dict:
+        """Adds ids by natural key, marking the keys of several ids"""
+        for key, pk in pairs:
+            natural_keys[key] = AMBIGUOUS if key in natural_keys else pk
+        return natural_keys
@@ -0,0 +1,399 @@
+import base64
+import http.client
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from urllib.parse import urlencode, urlsplit
+
+TOKEN_PATH = "/api/user/token/"
+REFRESH_PATH = "/api/user/token/refresh/"
+FLIGHTS_PATH = "/api/airport/flights/"
+AIRPORTS_PATH = "/api/airport/airports/"
+ORDERS_PATH = "/api/airport/orders/"
+# access tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 30
+# shares of the requests of the synthetic mix
+SYNTHETIC_MIX = {
+    "search": 45,
+    "flight": 10,
+    "seats": 25,
+    "connections": 5,
+    "order": 15,
+}
+# flights read from the instance for the synthetic mix
+CATALOG_PAGES = 10
+
+_ID = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """The method and the path without its query and ids"""
+    return f"{method} {_ID.sub('/{id}', urlsplit(path).path)}"
+
+
+def percentile(values: list, share: float) -> float:
+    """Nearest-rank percentile of the sorted values"""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(share * len(values)) - 1, 0)]
+
+
+def token_expiry(token: str) -> float:
+    """Expiry time of the JWT, read without verifying it"""
+    payload = token.split(".")[1]
+    return json.loads(
+        base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    )["exp"]
+
+
+class Stats:
+    """Latencies and errors of the requests by endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.statuses = defaultdict(Counter)
+
+    def add(self, name: str, status, seconds: float) -> None:
+        """`status` is None when no response has been received"""
+        with self.lock:
+            self.latencies[name].append(seconds * 1000)
+            self.statuses[name][status] += 1
+            if status is None or status >= 400:
+                self.errors[name] += 1
+
+    @property
+    def requests(self) -> int:
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+    def report(self, elapsed: float) -> list:
+        """Rows by endpoint, the busiest first, and the total row"""
+        rows = [
+            self._row(name, latencies, self.errors[name], elapsed)
+            for name, latencies in sorted(
+                self.latencies.items(), key=lambda item: -len(item[1])
+            )
+        ]
+        rows.append(
+            self._row(
+                "total",
+                [
+                    latency
+                    for latencies in self.latencies.values()
+                    for latency in latencies
+                ],
+                sum(self.errors.values()),
+                elapsed,
+            )
+        )
+        return rows
+
+    @staticmethod
+    def _row(name, latencies, errors, elapsed) -> dict:
+        latencies = sorted(latencies)
+        return {
+            "endpoint": name,
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": errors / len(latencies) if latencies else 0.0,
+            "rps": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+        }
+
+
+class Client:
+    """
+    Keep-alive connection to the instance which records every request
+    in the stats. With an email, requests are authenticated with a JWT
+    from the api/user/token/ flow, refreshed before it expires and
+    obtained again when refused.
+    """
+
+    def __init__(self, url, stats, email=None, password=None, timeout=30):
+        parts = urlsplit(url)
+        connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.connection = connection_class(parts.netloc, timeout=timeout)
+        self.prefix = parts.path.rstrip("/")
+        self.stats = stats
+        self.email = email
+        self.password = password
+        self.access = self.refresh = None
+        self.expires_at = 0.0
+
+    def request(self, method: str, path: str, body=None, name=None):
+        """The status and the JSON of the response, None on failures"""
+        if self.email and time.time() > self.expires_at - TOKEN_REFRESH_MARGIN:
+            self._authenticate()
+        status, data = self._call(method, path, body, name)
+        if status == 401 and self.email:
+            self.access = None
+            self._authenticate()
+            status, data = self._call(method, path, body, name)
+        return status, data
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _authenticate(self) -> None:
+        if self.refresh:
+            status, data = self._call(
+                "POST", REFRESH_PATH, {"refresh": self.refresh}, auth=False
+            )
+            if status == 200:
+                self._set_access(data["access"])
+                return
+        status, data = self._call(
+            "POST",
+            TOKEN_PATH,
+            {"email": self.email, "password": self.password},
+            auth=False,
+        )
+        if status != 200:
+            raise RuntimeError(f"{self.email} can't log in: {status} {data}")
+        self.refresh = data["refresh"]
+        self._set_access(data["access"])
+
+    def _set_access(self, token: str) -> None:
+        self.access = token
+        self.expires_at = token_expiry(token)
+
+    def _call(self, method, path, body=None, name=None, auth=True):
+        headers = {"Accept": "application/json"}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if auth and self.access:
+            headers["Authorization"] = f"Bearer {self.access}"
+
+        started = time.perf_counter()
+        status = data = None
+        for attempt in range(2):
+            try:
+                self.connection.request(
+                    method, self.prefix + path, body, headers
+                )
+                response = self.connection.getresponse()
+                content = response.read()
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                # the server may have closed the idle connection
+                if attempt:
+                    break
+                continue
+            status = response.status
+            try:
+                data = json.loads(content) if content else None
+            except ValueError:
+                pass
+            break
+        self.stats.add(
+            name or endpoint_name(method, path),
+            status,
+            time.perf_counter() - started,
+        )
+        return status, data
+
+
+def load_catalog(client) -> dict:
+    """Flights and airports of the instance to make the synthetic mix of"""
+    flights = []
+    path = f"{FLIGHTS_PATH}?pagination=cursor&page_size=100"
+    for _ in range(CATALOG_PAGES):
+        status, data = client.request("GET", path)
+        if status != 200:
+            raise RuntimeError(f"Flights can't be listed: {status}")
+        flights.extend(data["results"])
+        if not data["next"]:
+            break
+        next_page = urlsplit(data["next"])
+        path = (
+            f"{next_page.path[len(client.prefix):]}?{next_page.query}"
+        )
+    status, data = client.request(
+        "GET", f"{AIRPORTS_PATH}?{urlencode({'page_size': 100})}"
+    )
+    airports = [airport["id"] for airport in data["results"]] if data else []
+    if not flights or len(airports) < 2:
+        raise RuntimeError("The instance has no flights to make requests to")
+    return {"flights": flights, "airports": airports}
+
+
+def _city(airport: str) -> str:
+    """The city of an airport as the flight list shows it"""
+    return airport.rsplit(" (", 1)[0]
+
+
+class SyntheticMix:
+    """
+    Flight searches by cities and date, flight details, seat maps,
+    connection searches and orders of free seats of the seat maps, in
+    the shares of `mix`, over the flights of the catalog
+    """
+
+    def __init__(self, catalog: dict, rng, mix: dict = None):
+        self.catalog = catalog
+        self.rng = rng
+        self.kinds = list(mix or SYNTHETIC_MIX)
+        self.weights = [(mix or SYNTHETIC_MIX)[kind] for kind in self.kinds]
+
+    def __call__(self, client) -> bool:
+        kind = self.rng.choices(self.kinds, weights=self.weights)[0]
+        flight = self.rng.choice(self.catalog["flights"])
+        date = flight["departure_time"][:10]
+        if kind == "search":
+            query = {
+                "source": _city(flight["source"]),
+                "destination": _city(flight["destination"]),
+                "date": date,
+            }
+            client.request("GET", f"{FLIGHTS_PATH}?{urlencode(query)}")
+        elif kind == "flight":
+            client.request("GET", f"{FLIGHTS_PATH}{flight['id']}/")
+        elif kind == "seats":
+            client.request("GET", f"{FLIGHTS_PATH}{flight['id']}/seats/")
+        elif kind == "connections":
+            source, destination = self.rng.sample(self.catalog["airports"], 2)
+            query = {
+                "source": source,
+                "destination": destination,
+                "date": date,
+            }
+            client.request(
+                "GET", f"{FLIGHTS_PATH}connections/?{urlencode(query)}"
+            )
+        else:
+            self._order(client, flight)
+        return True
+
+    def _order(self, client, flight) -> None:
+        status, data = client.request(
+            "GET", f"{FLIGHTS_PATH}{flight['id']}/seats/?encoding=grid"
+        )
+        if status != 200:
+            return
+        free = [
+            (row, seat)
+            for row, seats in enumerate(data["seats"], start=1)
+            for seat, taken in enumerate(seats, start=1)
+            if not taken
+        ]
+        if not free:
+            return
+        seats = self.rng.sample(free, min(len(free), self.rng.randint(1, 2)))
+        client.request(
+            "POST",
+            ORDERS_PATH,
+            {
+                "tickets": [
+                    {"flight": flight["id"], "row": row, "seat": seat}
+                    for row, seat in seats
+                ]
+            },
+        )
+
+
+class Replay:
+    """
+    Requests of a log of JSON lines with the method, the path with its
+    query and optionally the JSON body and the name to report them by.
+    The JSON of the lines of the request profiling log is found after
+    their prefix, other lines are skipped. The log is replayed once,
+    or over and over with `loop`.
+    """
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self.lock = threading.Lock()
+        self.lines = self._read()
+
+    def __call__(self, client) -> bool:
+        with self.lock:
+            entry = next(self.lines, None)
+            if entry is None and self.loop:
+                self.lines = self._read()
+                entry = next(self.lines, None)
+        if entry is None:
+            return False
+        client.request(
+            entry["method"],
+            entry["path"],
+            entry.get("body"),
+            entry.get("name"),
+        )
+        return True
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                start = line.find("{")
+                if start < 0:
+                    continue
+                try:
+                    entry = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if (
+                    isinstance(entry, dict)
+                    and "method" in entry
+                    and "path" in entry
+                ):
+                    yield entry
+
+
+def run(
+    url,
+    source,
+    concurrency,
+    credentials,
+    duration=None,
+    requests=None,
+    timeout=30,
+):
+    """
+    Sends the requests of `source(client)` from `concurrency` workers
+    until `duration` seconds pass, `requests` are sent or the source
+    returns false. Worker `n` logs in with `credentials(n)`, a pair of
+    an email and a password or None. Returns the stats and the time.
+    """
+    stats = Stats()
+    deadline = time.perf_counter() + duration if duration else None
+    failures = []
+
+    def work(worker):
+        email, password = credentials(worker) or (None, None)
+        client = Client(url, stats, email, password, timeout)
+        try:
+            while (deadline is None or time.perf_counter() < deadline) and (
+                requests is None or stats.requests < requests
+            ):
+                if not source(client):
+                    break
+        except Exception as error:
+            failures.append(error)
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    workers = [
+        threading.Thread(target=work, args=(worker,))
+        for worker in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if failures:
+        raise failures[0]
+    return stats, time.perf_counter() - started
@@ -0,0 +1,511 @@
+import io
+import json
+import math
+import random
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from airport.booking import create_order
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+)
+from airport.refdata import reference_data_changed
+
+BUDGETS_PATH = Path(__file__).resolve().parents[2] / "query_budgets.json"
+PASSWORD = "benchmark"
+# milliseconds, below it the time is mostly noise
+MIN_TIME_BUDGET = 250
+# reads are timed by the fastest of their calls
+READ_REPEAT = 3
+
+
+class Command(BaseCommand):
+    """
+    Calls every endpoint of the airport and user APIs once on seeded data
+    with cold caches, reports the SQL queries and the time of each call
+    and fails when the queries exceed their budget in query_budgets.json
+    for the database vendor, or the time with --check-time.
+    All the created data is rolled back.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--flights", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Write the measured values as the new budgets of the "
+            "database vendor, with 3 times the time as the time budget",
+        )
+        parser.add_argument(
+            "--check-time",
+            action="store_true",
+            help="Fail when a call takes longer than its time budget too",
+        )
+
+    def handle(self, *args, **options):
+        budgets = {}
+        if BUDGETS_PATH.exists():
+            budgets = json.loads(BUDGETS_PATH.read_text())
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            DEBUG=False, ALLOWED_HOSTS=["testserver"], MEDIA_ROOT=media_root
+        ), transaction.atomic():
+            data = self._create_sample_data(
+                random.Random(options["seed"]),
+                options["flights"],
+                options["orders"],
+            )
+            results = [
+                (label, *self._measure(data["client"], *call))
+                for label, *call in self._get_calls(data)
+            ]
+            transaction.set_rollback(True)
+
+        vendor = connection.vendor
+        if options["record"]:
+            BUDGETS_PATH.write_text(
+                json.dumps(
+                    {
+                        label: {
+                            "queries": {
+                                **budgets.get(label, {}).get("queries", {}),
+                                vendor: queries,
+                            },
+                            "ms": max(
+                                MIN_TIME_BUDGET,
+                                math.ceil(elapsed * 3 / 10) * 10,
+                            ),
+                        }
+                        for label, queries, elapsed in results
+                    },
+                    indent=2,
+                )
+                + "\n"
+            )
+            budgets = json.loads(BUDGETS_PATH.read_text())
+
+        self.stdout.write(
+            f"{'endpoint':<48} {'queries':>8} {'budget':>7} "
+            f"{'ms':>8} {'budget':>7}"
+        )
+        exceeded = []
+        for label, queries, elapsed in results:
+            budget = budgets.get(label, {})
+            queries_budget = budget.get("queries", {}).get(vendor)
+            time_budget = budget.get("ms")
+            if queries_budget is None:
+                exceeded.append(f"{label}: no {vendor} budget")
+            elif queries > queries_budget:
+                exceeded.append(
+                    f"{label}: {queries} queries, budget {queries_budget}"
+                )
+            if (
+                options["check_time"]
+                and time_budget is not None
+                and elapsed > time_budget
+            ):
+                exceeded.append(
+                    f"{label}: {elapsed:.1f} ms, budget {time_budget}"
+                )
+            self.stdout.write(
+                f"{label:<48} {queries:>8} {queries_budget or '-':>7} "
+                f"{elapsed:>8.1f} {time_budget or '-':>7}"
+            )
+        if exceeded:
+            raise CommandError("Budgets exceeded:\n" + "\n".join(exceeded))
+
+    def _measure(
+        self, client, method, url, payload=None, payload_format="json"
+    ):
+        """Queries and milliseconds of the call with cold caches"""
+        if method != "get":
+            return self._call(client, method, url, payload, payload_format)
+        calls = [
+            self._call(client, method, url, payload)
+            for _ in range(READ_REPEAT)
+        ]
+        return calls[0][0], min(elapsed for _, elapsed in calls)
+
+    @staticmethod
+    def _call(client, method, url, payload=None, payload_format="json"):
+        reference_data_changed()
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            if method == "get":
+                response = client.get(url, payload)
+            else:
+                response = getattr(client, method)(
+                    url, payload, format=payload_format
+                )
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise CommandError(
+                f"{method.upper()} {url} failed with "
+                f"{response.status_code}: {response.content[:200]}"
+            )
+        return len(context.captured_queries), elapsed
+
+    @staticmethod
+    def _get_calls(data):
+        """Labels, methods, urls and payloads of the calls in their order"""
+        flight = data["flights"][0]
+        airplane = flight.airplane
+        route = flight.route
+        image = io.BytesIO()
+        Image.new("RGB", (10, 10)).save(image, format="PNG")
+        image.seek(0)
+        image.name = "airplane.png"
+
+        def prepare(url, payload):
+            return data["client"].post(url, payload, format="json").data
+
+        tokens = prepare(
+            reverse("user:token_obtain_pair"),
+            {"email": data["user"].email, "password": PASSWORD},
+        )
+        hold, released = (
+            prepare(
+                reverse("airport:seathold-list"),
+                {
+                    "flight": data["flights"][1].id,
+                    "seats": [{"row": 27, "seat": seat}],
+                    "seconds": 60,
+                },
+            )
+            for seat in (1, 2)
+        )
+        departure = timezone.now() + timedelta(days=30)
+
+        def url(name, *args):
+            return reverse(f"airport:{name}", args=args)
+
+        return [
+            ("GET countries", "get", url("country-list")),
+            ("GET cities", "get", url("city-list")),
+            ("GET airplanetypes", "get", url("airplanetype-list")),
+            ("GET airplanes", "get", url("airplane-list")),
+            ("GET airplanes/{id}", "get", url("airplane-detail", airplane.id)),
+            ("GET airports", "get", url("airport-list")),
+            (
+                "GET airports/autocomplete",
+                "get",
+                url("airport-autocomplete"),
+                {"q": "city"},
+            ),
+            ("GET crews", "get", url("crew-list")),
+            ("GET routes", "get", url("route-list")),
+            ("GET routes/{id}", "get", url("route-detail", route.id)),
+            ("GET flights", "get", url("flight-list")),
+            (
+                "GET flights?pagination=cursor",
+                "get",
+                url("flight-list"),
+                {"pagination": "cursor"},
+            ),
+            (
+                "GET flights?fields",
+                "get",
+                url("flight-list"),
+                {"fields": "departure_time,tickets_available"},
+            ),
+            ("GET flights/{id}", "get", url("flight-detail", flight.id)),
+            ("GET flights/{id}/seats", "get", url("flight-seats", flight.id)),
+            (
+                "GET flights/connections",
+                "get",
+                url("flight-connections"),
+                {
+                    "source": route.source_id,
+                    "destination": route.destination_id,
+                    "date": flight.departure_time.date().isoformat(),
+                },
+            ),
+            (
+                "GET flights/export",
+                "get",
+                url("flight-export"),
+                {"export_format": "csv"},
+            ),
+            (
+                "GET flights/{id}/manifest",
+                "get",
+                url("flight-manifest", flight.id),
+            ),
+            ("GET orders", "get", url("order-list")),
+            (
+                "GET orders?fields",
+                "get",
+                url("order-list"),
+                {"fields": "tickets.flight.source,tickets.flight.crew"},
+            ),
+            ("GET orders/export", "get", url("order-export")),
+            ("GET holds", "get", url("seathold-list")),
+            ("GET holds/{id}", "get", url("seathold-detail", hold["id"])),
+            (
+                "POST countries",
+                "post",
+                url("country-list"),
+                {"name": "Benchmark country"},
+            ),
+            (
+                "POST cities",
+                "post",
+                url("city-list"),
+                {
+                    "name": "Benchmark city",
+                    "country": route.source.city.country_id,
+                },
+            ),
+            (
+                "POST airplanetypes",
+                "post",
+                url("airplanetype-list"),
+                {"name": "Benchmark type"},
+            ),
+            (
+                "POST airplanes",
+                "post",
+                url("airplane-list"),
+                {
+                    "name": "Benchmark airplane",
+                    "rows": 30,
+                    "seats_in_row": 6,
+                    "airplane_type": airplane.airplane_type_id,
+                },
+            ),
+            (
+                "POST airplanes/{id}/upload-image",
+                "post",
+                url("airplane-upload-image", airplane.id),
+                {"image": image},
+                "multipart",
+            ),
+            (
+                "POST airports",
+                "post",
+                url("airport-list"),
+                {
+                    "name": "Benchmark airport",
+                    "city": route.source.city_id,
+                    "closest_big_city": "-",
+                },
+            ),
+            (
+                "POST crews",
+                "post",
+                url("crew-list"),
+                {"first_name": "Benchmark", "last_name": "Crew"},
+            ),
+            (
+                "POST routes",
+                "post",
+                url("route-list"),
+                {
+                    "source": route.destination_id,
+                    "destination": route.source_id,
+                    "distance": 1000,
+                },
+            ),
+            (
+                "POST flights",
+                "post",
+                url("flight-list"),
+                {
+                    "route": route.id,
+                    "airplane": airplane.id,
+                    "departure_time": departure.isoformat(),
+                    "arrival_time": (
+                        departure + timedelta(hours=2)
+                    ).isoformat(),
+                    "crew": [member.id for member in data["crew"][:3]],
+                },
+            ),
+            (
+                "POST orders",
+                "post",
+                url("order-list"),
+                {
+                    "tickets": [
+                        {"flight": flight.id, "row": 25, "seat": seat}
+                        for seat in range(1, 4)
+                    ]
+                },
+            ),
+            (
+                "POST orders/auto",
+                "post",
+                url("order-auto"),
+                {"flight": flight.id, "passengers": 3},
+            ),
+            (
+                "POST holds",
+                "post",
+                url("seathold-list"),
+                {
+                    "flight": flight.id,
+                    "seats": [{"row": 26, "seat": 1}],
+                    "seconds": 60,
+                },
+            ),
+            (
+                "POST holds/{id}/confirm",
+                "post",
+                url("seathold-confirm", hold["id"]),
+            ),
+            (
+                "DELETE holds/{id}",
+                "delete",
+                url("seathold-detail", released["id"]),
+            ),
+            (
+                "POST user/register",
+                "post",
+                reverse("user:create"),
+                {"email": "new@benchmark.com", "password": PASSWORD},
+            ),
+            (
+                "POST user/token",
+                "post",
+                reverse("user:token_obtain_pair"),
+                {"email": data["user"].email, "password": PASSWORD},
+            ),
+            (
+                "POST user/token/refresh",
+                "post",
+                reverse("user:token_refresh"),
+                {"refresh": tokens["refresh"]},
+            ),
+            (
+                "POST user/token/verify",
+                "post",
+                reverse("user:token_verify"),
+                {"token": tokens["access"]},
+            ),
+            ("GET user/me", "get", reverse("user:manage")),
+            (
+                "PATCH user/me",
+                "patch",
+                reverse("user:manage"),
+                {"email": "renamed@benchmark.com"},
+            ),
+        ]
+
+    @staticmethod
+    def _create_sample_data(rng, flights_count, orders_count):
+        countries = [
+            Country.objects.create(name=f"Benchmark country {index}")
+            for index in range(5)
+        ]
+        cities = [
+            City.objects.create(
+                name=f"Benchmark city {index}",
+                country=countries[index % len(countries)],
+            )
+            for index in range(20)
+        ]
+        airports = Airport.objects.bulk_create(
+            Airport(
+                name=f"Benchmark airport {index}",
+                city=cities[index % len(cities)],
+                closest_big_city="-",
+            )
+            for index in range(40)
+        )
+        airplane_types = AirplaneType.objects.bulk_create(
+            AirplaneType(name=f"Benchmark type {index}") for index in range(4)
+        )
+        airplanes = Airplane.objects.bulk_create(
+            Airplane(
+                name=f"Benchmark airplane {index}",
+                rows=30,
+                seats_in_row=6,
+                airplane_type=rng.choice(airplane_types),
+            )
+            for index in range(20)
+        )
+        crew = Crew.objects.bulk_create(
+            Crew(first_name="Benchmark", last_name=f"Crew {index}")
+            for index in range(50)
+        )
+        routes = Route.objects.bulk_create(
+            Route(
+                source=source,
+                destination=destination,
+                distance=rng.randint(300, 5000),
+            )
+            for source, destination in (
+                rng.sample(airports, 2) for _ in range(100)
+            )
+        )
+        start = timezone.now() + timedelta(days=1)
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=rng.choice(routes),
+                airplane=rng.choice(airplanes),
+                departure_time=start + timedelta(minutes=15 * index),
+                arrival_time=start + timedelta(minutes=15 * index + 150),
+            )
+            for index in range(flights_count)
+        )
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight_id=flight.id, crew_id=member.id)
+            for flight in flights
+            for member in rng.sample(crew, 4)
+        )
+        # the calls use the first flights, with routes and airplanes loaded
+        flights = list(
+            Flight.objects.select_related(
+                "route__source__city", "airplane"
+            ).order_by("departure_time")
+        )
+
+        user = get_user_model().objects.create_user(
+            "benchmark@benchmark.com", PASSWORD, is_staff=True
+        )
+        for index in range(orders_count):
+            create_order(
+                [
+                    {
+                        "flight": flight,
+                        "row": 1 + index % 24,
+                        "seat": 2 * (index // 24) + seat,
+                    }
+                    for flight in rng.sample(flights[:10], 2)
+                    for seat in range(1, 3)
+                ],
+                user=user,
+            )
+
+        client = APIClient()
+        client.force_authenticate(user)
+        return {
+            "client": client,
+            "user": user,
+            "flights": flights,
+            "crew": crew,
+        }
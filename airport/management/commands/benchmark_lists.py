@@ -0,0 +1,169 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+)
+from airport.rows import (
+    annotate_tickets_available,
+    flight_list_rows,
+    flight_list_values,
+    order_list_rows,
+    order_list_values,
+)
+from airport.serializers import FlightListSerializer, OrderListSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compares the throughput of the flight and order list pages rendered
+    by the serializers and built from values. All the created data is
+    rolled back.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--crew", type=int, default=4)
+        parser.add_argument("--tickets", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        repeat = options["repeat"]
+
+        self.stdout.write(
+            f"{'list':<8} {'path':<11} {'queries':>8} "
+            f"{'ms':>10} {'rows/s':>10}"
+        )
+        with transaction.atomic():
+            user = self._create_sample_data(
+                page_size, options["crew"], options["tickets"]
+            )
+            flights = annotate_tickets_available(
+                Flight.objects.select_related(
+                    "route__source__city",
+                    "route__destination__city",
+                    "airplane",
+                ).prefetch_related("crew")
+            )
+            orders = Order.objects.filter(user=user).prefetch_related(
+                "tickets__flight__route__source__city",
+                "tickets__flight__route__destination__city",
+                "tickets__flight__airplane",
+                "tickets__flight__crew",
+            )
+            for name, path, render in (
+                (
+                    "flights",
+                    "serializer",
+                    lambda: FlightListSerializer(
+                        flights[:page_size], many=True
+                    ).data,
+                ),
+                (
+                    "flights",
+                    "values",
+                    lambda: flight_list_rows(
+                        flight_list_values(flights)[:page_size]
+                    ),
+                ),
+                (
+                    "orders",
+                    "serializer",
+                    lambda: OrderListSerializer(
+                        orders[:page_size], many=True
+                    ).data,
+                ),
+                (
+                    "orders",
+                    "values",
+                    lambda: order_list_rows(
+                        order_list_values(orders)[:page_size]
+                    ),
+                ),
+            ):
+                self._measure(name, path, render, page_size, repeat)
+            transaction.set_rollback(True)
+
+    def _measure(self, name, path, render, page_size, repeat):
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(repeat):
+                started = time.perf_counter()
+                render()
+                elapsed += time.perf_counter() - started
+        self.stdout.write(
+            f"{name:<8} {path:<11} "
+            f"{len(context.captured_queries) / repeat:>8.1f} "
+            f"{elapsed / repeat * 1000:>10.2f} "
+            f"{page_size * repeat / elapsed:>10.0f}"
+        )
+
+    @staticmethod
+    def _create_sample_data(count, crew_size, tickets):
+        country = Country.objects.create(name="Benchmark country")
+        cities = [
+            City.objects.create(name=f"Benchmark city {index}",
+                                country=country)
+            for index in range(2)
+        ]
+        airports = [
+            Airport.objects.create(
+                name=f"Benchmark airport {index}",
+                city=city,
+                closest_big_city="-",
+            )
+            for index, city in enumerate(cities)
+        ]
+        route = Route.objects.create(
+            source=airports[0], destination=airports[1], distance=1000
+        )
+        airplane = Airplane.objects.create(
+            name="Benchmark airplane", rows=30, seats_in_row=6
+        )
+        crew = [
+            Crew.objects.create(first_name="Benchmark", last_name=str(index))
+            for index in range(crew_size)
+        ]
+        now = timezone.now()
+        flights = Flight.objects.bulk_create(
+            Flight(
+                route=route,
+                airplane=airplane,
+                departure_time=now + timedelta(hours=index),
+                arrival_time=now + timedelta(hours=index + 2),
+            )
+            for index in range(count)
+        )
+        Flight.crew.through.objects.bulk_create(
+            Flight.crew.through(flight_id=flight.id, crew_id=member.id)
+            for flight in flights
+            for member in crew
+        )
+
+        user = get_user_model().objects.create_user(
+            "benchmark@benchmark.com", "benchmark"
+        )
+        orders = Order.objects.bulk_create(
+            Order(user=user) for _ in range(count)
+        )
+        Ticket.objects.bulk_create(
+            Ticket(order=order, flight=flight, row=1, seat=seat)
+            for order, flight in zip(orders, flights)
+            for seat in range(1, tickets + 1)
+        )
+        return user
@@ -0,0 +1,91 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+)
+from airport.serializers import OrderSerializer
+
+
+class Command(BaseCommand):
+    """
+    Measures database round trips and time spent on creating orders
+    of different sizes. All the created data is rolled back.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1, 2, 4, 9, 18, 36]
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options["sizes"]
+        repeat = options["repeat"]
+
+        self.stdout.write(f"{'tickets':>8} {'queries':>8} {'ms':>10}")
+        with transaction.atomic():
+            flight, user = self._create_sample_data(
+                rows=len(sizes) * repeat, seats_in_row=max(sizes)
+            )
+            row = 1
+            for size in sizes:
+                queries = 0
+                elapsed = 0.0
+                for _ in range(repeat):
+                    tickets = [
+                        {"flight": flight.id, "row": row, "seat": seat}
+                        for seat in range(1, size + 1)
+                    ]
+                    row += 1
+                    with CaptureQueriesContext(connection) as context:
+                        started = time.perf_counter()
+                        serializer = OrderSerializer(data={"tickets": tickets})
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save(user=user)
+                        elapsed += time.perf_counter() - started
+                    queries += len(context.captured_queries)
+                self.stdout.write(
+                    f"{size:>8} {queries / repeat:>8.1f} "
+                    f"{elapsed / repeat * 1000:>10.2f}"
+                )
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _create_sample_data(rows, seats_in_row):
+        country = Country.objects.create(name="Benchmark country")
+        city = City.objects.create(name="Benchmark city", country=country)
+        source = Airport.objects.create(
+            name="Benchmark source", city=city, closest_big_city="-"
+        )
+        destination = Airport.objects.create(
+            name="Benchmark destination", city=city, closest_big_city="-"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+        airplane = Airplane.objects.create(
+            name="Benchmark airplane",
+            rows=rows,
+            seats_in_row=seats_in_row,
+        )
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now(),
+            arrival_time=timezone.now(),
+        )
+        user = get_user_model().objects.create_user(
+            "benchmark@benchmark.com", "benchmark"
+        )
+        return flight, user
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from airport.exports import (
+    EXPORT_FORMATS,
+    FLIGHT_EXPORT_COLUMNS,
+    ORDER_EXPORT_COLUMNS,
+    TICKET_EXPORT_COLUMNS,
+    export_lines,
+    flight_export,
+    order_export,
+    ticket_export,
+)
+from airport.models import Flight
+
+_datetime = serializers.DateTimeField()
+
+
+def _parse_time(value):
+    """The time in any format the API accepts"""
+    if value is None:
+        return None
+    try:
+        return _datetime.to_internal_value(value)
+    except ValidationError as error:
+        raise CommandError(f"{value}: {error.detail[0]}")
+
+
+class Command(BaseCommand):
+    """
+    Streams the flights departing in a range, every ticket on a flight
+    or the orders created in a range to a file as NDJSON or CSV, the
+    same as the export endpoints
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("data", choices=("flights", "tickets", "orders"))
+        parser.add_argument(
+            "--format", choices=EXPORT_FORMATS, default="ndjson"
+        )
+        parser.add_argument(
+            "--output", help="File to write to, the standard output if unset"
+        )
+        parser.add_argument(
+            "--flight", type=int, help="Flight of the exported tickets"
+        )
+        parser.add_argument(
+            "--after",
+            help="Flights departing or orders created at or after the time",
+        )
+        parser.add_argument(
+            "--before", help="Flights departing or orders created before"
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        queryset, columns = self._get_export(options)
+        lines = export_lines(
+            queryset, columns, options["format"], options["chunk_size"]
+        )
+        if not options["output"]:
+            for chunk in lines:
+                self.stdout.write(chunk, ending="")
+            return
+        with open(
+            options["output"], "w", newline="", encoding="utf-8"
+        ) as output:
+            for chunk in lines:
+                output.write(chunk)
+
+    @staticmethod
+    def _get_export(options):
+        if options["data"] == "tickets":
+            if options["flight"] is None:
+                raise CommandError("--flight is required to export tickets")
+            return ticket_export(options["flight"]), TICKET_EXPORT_COLUMNS
+
+        after = _parse_time(options["after"])
+        before = _parse_time(options["before"])
+        if options["data"] == "orders":
+            return order_export(after, before), ORDER_EXPORT_COLUMNS
+        queryset = Flight.objects.all()
+        if after is not None:
+            queryset = queryset.filter(departure_time__gte=after)
+        if before is not None:
+            queryset = queryset.filter(departure_time__lt=before)
+        return flight_export(queryset), FLIGHT_EXPORT_COLUMNS
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from airport.flight_cache import get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    """
+    Reports hits, misses and evictions of outdated entries
+    of the flight response cache
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the counters after reporting them",
+        )
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        requests = stats["hits"] + stats["misses"]
+        for stat, value in stats.items():
+            self.stdout.write(f"{stat}: {value}")
+        if requests:
+            self.stdout.write(f"hit ratio: {stats['hits'] / requests:.1%}")
+        if options["reset"]:
+            reset_stats()
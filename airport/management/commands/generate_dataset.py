@@ -0,0 +1,120 @@
+import time
+from datetime import date, datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.bulk import can_copy
+from airport.dataset import DatasetGenerator
+
+# counts of the default dataset, multiplied by --scale
+DEFAULT_COUNTS = {
+    "countries": 60,
+    "cities": 1500,
+    "airports": 2000,
+    "airplane_types": 20,
+    "airplanes": 600,
+    "crew": 3000,
+    "routes": 8000,
+    "users": 20000,
+    "flights": 20000,
+    "holds": 200,
+}
+
+
+class Command(BaseCommand):
+    """
+    Generates a synthetic dataset for load and scale testing, the same
+    for the same --seed and --start, see `DatasetGenerator`. The users
+    are user<n>@example.com with the --password.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Multiplier of all the default counts",
+        )
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                help=f"Number of {name.replace('_', ' ')}, {count} by default",
+            )
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            help="Date the flights depart around, today by default",
+        )
+        parser.add_argument("--days-before", type=int, default=90)
+        parser.add_argument("--days-after", type=int, default=180)
+        parser.add_argument(
+            "--load-factor",
+            type=float,
+            default=0.8,
+            help="Average share of sold seats of the departed flights",
+        )
+        parser.add_argument(
+            "--hub-skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent of the traffic of the airports",
+        )
+        parser.add_argument("--password", default="password")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counts = {
+            name: (
+                options[name]
+                if options[name] is not None
+                else max(round(count * options["scale"]), 1)
+            )
+            for name, count in DEFAULT_COUNTS.items()
+        }
+        if (
+            min(counts[name] for name in ("countries", "cities", "users")) < 1
+            or counts["airports"] < 2
+        ):
+            raise CommandError(
+                "At least a country, a city, two airports and a user "
+                "are needed"
+            )
+        if not 0 < options["load_factor"] < 1:
+            raise CommandError("--load-factor must be between 0 and 1")
+
+        start = options["start"]
+        if start is not None:
+            start = datetime.combine(start, datetime.min.time(), timezone.utc)
+        generator = DatasetGenerator(
+            counts,
+            seed=options["seed"],
+            start=start,
+            days_before=options["days_before"],
+            days_after=options["days_after"],
+            load_factor=options["load_factor"],
+            hub_skew=options["hub_skew"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+            use_copy=can_copy(),
+        )
+        started = time.perf_counter()
+        with transaction.atomic():
+            generator.generate()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'model':<22} {'rows':>10} {'rows/s':>12}")
+        for label, count in generator.inserted.items():
+            self.stdout.write(
+                f"{label:<22} {count:>10} "
+                f"{count / max(generator.seconds[label], 1e-9):>12.0f}"
+            )
+        total = sum(generator.inserted.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {total} rows in {elapsed:.2f} s, "
+                f"{total / max(elapsed, 1e-9):.0f} rows/s"
+            )
+        )
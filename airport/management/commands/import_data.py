@@ -0,0 +1,98 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from airport.importer import (
+    IMPORT_MODELS,
+    BulkImporter,
+    InvalidObject,
+    read_csv,
+    read_json,
+)
+
+
+class Command(BaseCommand):
+    """
+    Imports countries, cities, airplane types, airplanes, airports,
+    routes, crew, flights and users from JSON files in the dumpdata
+    format, such as airport_service_db_data.json, JSON lines or CSV
+    files of one model. The files are streamed and inserted in batches
+    in one transaction, see `BulkImporter`.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+")
+        parser.add_argument(
+            "--format",
+            choices=("json", "csv"),
+            help="Format of the files, by default from their extensions",
+        )
+        parser.add_argument(
+            "--model",
+            choices=list(IMPORT_MODELS),
+            help="Model of the rows of CSV files",
+        )
+        parser.add_argument(
+            "--ignorenonexistent",
+            "-i",
+            action="store_true",
+            help="Ignore fields the models don't have, as loaddata does",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Insert with INSERTs on PostgreSQL too",
+        )
+
+    def handle(self, *args, **options):
+        importer = BulkImporter(
+            options["batch_size"],
+            False if options["no_copy"] else None,
+            options["ignorenonexistent"],
+        )
+        started = time.perf_counter()
+        with transaction.atomic():
+            for path in options["paths"]:
+                self._import_file(importer, path, options)
+            importer.finish()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{'model':<22} {'rows':>10} {'rows/s':>12}")
+        for label, count in importer.counts.items():
+            self.stdout.write(
+                f"{label:<22} {count:>10} "
+                f"{count / max(importer.seconds[label], 1e-9):>12.0f}"
+            )
+        total = sum(importer.counts.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {total} rows in {elapsed:.2f} s, "
+                f"{total / max(elapsed, 1e-9):.0f} rows/s"
+            )
+        )
+
+    def _import_file(self, importer, path: str, options) -> None:
+        file_format = options["format"] or (
+            "csv" if os.path.splitext(path)[1].lower() == ".csv" else "json"
+        )
+        if file_format == "csv" and not options["model"]:
+            raise CommandError("--model is required to import CSV files")
+
+        with open(path, newline="", encoding="utf-8") as file:
+            objects = (
+                read_csv(file, options["model"])
+                if file_format == "csv"
+                else read_json(file)
+            )
+            number = 0
+            try:
+                for number, data in enumerate(objects, 1):
+                    importer.add(data)
+            except InvalidObject as error:
+                raise CommandError(f"{path}, object {number}: {error}")
+            except json.JSONDecodeError as error:
+                raise CommandError(f"{path}: {error}")
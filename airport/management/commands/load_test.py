@@ -0,0 +1,178 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airport.loadtest import (
+    SYNTHETIC_MIX,
+    Client,
+    Replay,
+    Stats,
+    SyntheticMix,
+    load_catalog,
+    run,
+)
+
+
+def _parse_mix(value: str) -> dict:
+    """Shares of the synthetic mix as kind=share,..."""
+    mix = dict.fromkeys(SYNTHETIC_MIX, 0)
+    for pair in value.split(","):
+        kind, _, share = pair.partition("=")
+        if kind.strip() not in mix or not share.strip().isdigit():
+            raise CommandError(
+                f"{pair}: the mix is kind=share,... of "
+                f"{', '.join(SYNTHETIC_MIX)}"
+            )
+        mix[kind.strip()] = int(share)
+    if not any(mix.values()):
+        raise CommandError("The mix has no requests")
+    return mix
+
+
+class Command(BaseCommand):
+    """
+    Load tests a running instance: replays the requests of a --log, or
+    sends a synthetic mix of flight searches, seat maps and orders,
+    from --concurrency workers logged in as --email users, and reports
+    the latency percentiles and the error rate of every endpoint
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url",
+            nargs="?",
+            default="http://localhost:8000",
+            help="URL of the instance",
+        )
+        parser.add_argument(
+            "--log",
+            help="JSON lines of the requests to replay, see `Replay`; "
+            "the synthetic mix is sent if unset",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Replay the log over and over until the end of the test",
+        )
+        parser.add_argument(
+            "--mix",
+            type=_parse_mix,
+            help="Shares of the synthetic requests, default: "
+            + ",".join(
+                f"{kind}={share}" for kind, share in SYNTHETIC_MIX.items()
+            ),
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            help="Seconds to run for, 30 unless --requests is set",
+        )
+        parser.add_argument(
+            "--requests", type=int, help="Number of requests to stop after"
+        )
+        parser.add_argument(
+            "--email",
+            default="user{}@example.com",
+            help="Email of the users, with {} for the number of the worker, "
+            "the users of generate_dataset by default",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="Number of users the workers take turns to log in as, "
+            "one per worker by default",
+        )
+        parser.add_argument("--password", default="password")
+        parser.add_argument(
+            "--anonymous",
+            action="store_true",
+            help="Send the requests without logging in",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument(
+            "--json", help="File to write the report to as JSON"
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be positive")
+        users = options["users"] or options["concurrency"]
+        duration = options["duration"]
+        if duration is None and options["requests"] is None:
+            duration = 30.0
+
+        def credentials(worker):
+            if options["anonymous"]:
+                return None
+            return (
+                options["email"].format(worker % users),
+                options["password"],
+            )
+
+        if options["log"]:
+            try:
+                source = Replay(options["log"], options["loop"])
+            except OSError as error:
+                raise CommandError(error)
+        else:
+            client = Client(
+                options["url"],
+                Stats(),
+                *(credentials(0) or ()),
+                timeout=options["timeout"],
+            )
+            try:
+                catalog = load_catalog(client)
+            except (RuntimeError, OSError) as error:
+                raise CommandError(error)
+            finally:
+                client.close()
+            source = SyntheticMix(
+                catalog, random.Random(options["seed"]), options["mix"]
+            )
+
+        try:
+            stats, elapsed = run(
+                options["url"],
+                source,
+                options["concurrency"],
+                credentials,
+                duration=duration,
+                requests=options["requests"],
+                timeout=options["timeout"],
+            )
+        except RuntimeError as error:
+            raise CommandError(error)
+        report = stats.report(elapsed)
+
+        self.stdout.write(
+            f"{'endpoint':<48} {'requests':>8} {'errors':>7} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for row in report:
+            self.stdout.write(
+                f"{row['endpoint']:<48} {row['requests']:>8} "
+                f"{row['error_rate']:>7.1%} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                f"{row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+            )
+        if options["json"]:
+            with open(options["json"], "w") as file:
+                json.dump(
+                    {
+                        "elapsed": elapsed,
+                        "endpoints": report,
+                        "statuses": {
+                            name: {
+                                str(status): count
+                                for status, count in statuses.items()
+                            }
+                            for name, statuses in stats.statuses.items()
+                        },
+                    },
+                    file,
+                    indent=2,
+                )
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.images import process_pending_images
+from airport.models import Airplane, ImageStatus
+
+
+class Command(BaseCommand):
+    """
+    Makes the variants of the pending airplane images and of the ones
+    left processing by a stopped worker, once or every --interval seconds
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep processing every interval seconds",
+        )
+        parser.add_argument(
+            "--retry",
+            action="store_true",
+            help="Process the failed images again",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        if options["retry"]:
+            Airplane.objects.filter(image_status=ImageStatus.FAILED).update(
+                image_status=ImageStatus.PENDING
+            )
+
+        while True:
+            statuses = process_pending_images()
+            self.stdout.write(
+                f"Images ready: {statuses[ImageStatus.READY]}, "
+                f"failed: {statuses[ImageStatus.FAILED]}"
+            )
+            if not interval:
+                break
+            time.sleep(interval)
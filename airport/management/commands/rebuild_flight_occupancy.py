@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F
+
+from airport.booking import count_tickets_sold, rebuild_seat_maps
+from airport.flight_cache import invalidate_flights
+from airport.models import Flight
+
+
+class Command(BaseCommand):
+    """
+    Verifies sold tickets counters and seat maps of flights
+    against their tickets and rebuilds the mismatched ones
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report mismatched flights, exit with 1 if any",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            invalid_counters = self._check_counters(options["check"])
+            invalid_seat_maps = self._check_seat_maps(options["batch_size"])
+            if options["check"]:
+                transaction.set_rollback(True)
+
+        invalid = invalid_counters + invalid_seat_maps
+        if not invalid:
+            self.stdout.write(self.style.SUCCESS("All flights are valid"))
+        elif options["check"]:
+            raise CommandError(
+                f"{invalid_counters} counters and "
+                f"{invalid_seat_maps} seat maps are invalid",
+                returncode=1,
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{invalid_counters} counters and "
+                    f"{invalid_seat_maps} seat maps rebuilt"
+                )
+            )
+
+    def _check_counters(self, check_only: bool) -> int:
+        mismatched = list(
+            Flight.objects.order_by()
+            .annotate(actual=Count("tickets"))
+            .exclude(tickets_sold=F("actual"))
+            .values_list("id", "tickets_sold", "actual")
+        )
+        for flight_id, tickets_sold, actual in mismatched:
+            self.stdout.write(
+                f"Flight {flight_id}: counter {tickets_sold}, "
+                f"tickets {actual}"
+            )
+        if mismatched and not check_only:
+            flight_ids = [flight_id for flight_id, _, _ in mismatched]
+            Flight.objects.filter(id__in=flight_ids).update(
+                tickets_sold=count_tickets_sold()
+            )
+            invalidate_flights(flight_ids)
+        return len(mismatched)
+
+    def _check_seat_maps(self, batch_size: int) -> int:
+        mismatched = 0
+        flight_ids = Flight.objects.order_by("id").values_list("id", flat=True)
+        last_id = 0
+        while batch := list(flight_ids.filter(id__gt=last_id)[:batch_size]):
+            last_id = batch[-1]
+            for flight in rebuild_seat_maps(batch):
+                self.stdout.write(f"Flight {flight.id}: seat map differs")
+                mismatched += 1
+        return mismatched
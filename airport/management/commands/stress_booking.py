@@ -0,0 +1,162 @@
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+from airport.booking import create_order
+from airport.exceptions import FlightBusy, SeatsTaken
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+)
+from airport.seatmap import SeatMap
+
+SEATS_IN_ROW = 6
+
+
+class Command(BaseCommand):
+    """
+    Books random seats of one flight from concurrent writers, checks that
+    no seat has been sold twice and reports throughput for every number
+    of writers. The created data is deleted afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--writers", type=int, nargs="+", default=[1, 8, 32]
+        )
+        parser.add_argument("--orders", type=int, default=320)
+        parser.add_argument("--seats-per-order", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'writers':>8} {'booked':>7} {'taken':>6} {'busy':>5} "
+            f"{'orders/s':>9} {'tickets/s':>10}"
+        )
+        for writers in options["writers"]:
+            self._run(
+                writers,
+                options["orders"],
+                options["seats_per_order"],
+                options["seed"],
+            )
+
+    def _run(self, writers, orders, seats_per_order, seed):
+        # the flight fits all the seats requested, so most of
+        # the late orders collide with the earlier ones
+        rows = -(-orders * seats_per_order // SEATS_IN_ROW)
+        flight, user = self._create_sample_data(rows)
+        results = {"booked": 0, "taken": 0, "busy": 0}
+        lock = threading.Lock()
+
+        def write(writer):
+            generator = random.Random(seed * 1000 + writer)
+            outcomes = {"booked": 0, "taken": 0, "busy": 0}
+            try:
+                for _ in range(orders // writers):
+                    seats = generator.sample(
+                        range(rows * SEATS_IN_ROW), seats_per_order
+                    )
+                    tickets_data = [
+                        {
+                            "flight": flight,
+                            "row": seat // SEATS_IN_ROW + 1,
+                            "seat": seat % SEATS_IN_ROW + 1,
+                        }
+                        for seat in seats
+                    ]
+                    try:
+                        create_order(tickets_data, user=user)
+                        outcomes["booked"] += 1
+                    except SeatsTaken:
+                        outcomes["taken"] += 1
+                    except FlightBusy:
+                        outcomes["busy"] += 1
+            finally:
+                connection.close()
+            with lock:
+                for outcome, count in outcomes.items():
+                    results[outcome] += count
+
+        threads = [
+            threading.Thread(target=write, args=(writer,))
+            for writer in range(writers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            self._verify(flight)
+        finally:
+            flight.route.source.city.country.delete()
+            flight.airplane.delete()
+            user.delete()
+
+        self.stdout.write(
+            f"{writers:>8} {results['booked']:>7} {results['taken']:>6} "
+            f"{results['busy']:>5} {results['booked'] / elapsed:>9.1f} "
+            f"{results['booked'] * seats_per_order / elapsed:>10.1f}"
+        )
+
+    @staticmethod
+    def _verify(flight):
+        if (
+            Ticket.objects.filter(flight=flight)
+            .values("row", "seat")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .exists()
+        ):
+            raise CommandError("Some seats have been sold twice")
+
+        flight = Flight.objects.select_related("airplane").get(pk=flight.pk)
+        tickets = Ticket.objects.filter(flight=flight).count()
+        marked = sum(SeatMap.for_flight(flight))
+        if not tickets == flight.tickets_sold == marked:
+            raise CommandError(
+                f"{tickets} tickets, counter {flight.tickets_sold}, "
+                f"{marked} seats marked in the seat map"
+            )
+
+    @staticmethod
+    def _create_sample_data(rows):
+        suffix = timezone.now().timestamp()
+        country = Country.objects.create(name=f"Stress country {suffix}")
+        city = City.objects.create(name="Stress city", country=country)
+        source = Airport.objects.create(
+            name="Stress source", city=city, closest_big_city="-"
+        )
+        destination = Airport.objects.create(
+            name="Stress destination", city=city, closest_big_city="-"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=1000
+        )
+        airplane = Airplane.objects.create(
+            name="Stress airplane", rows=rows, seats_in_row=SEATS_IN_ROW
+        )
+        flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time=timezone.now(),
+            arrival_time=timezone.now(),
+        )
+        user = get_user_model().objects.create_user(
+            f"stress{suffix}@stress.com", "stress"
+        )
+        return flight, user
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from airport.booking import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired seat holds in bulk,
+    once or every --interval seconds
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep sweeping every interval seconds",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+
+        while True:
+            deleted = sweep_expired_holds()
+            self.stdout.write(f"Expired holds deleted: {deleted}")
+            if not interval:
+                break
+            time.sleep(interval)
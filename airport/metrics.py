@@ -0,0 +1,123 @@
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_DURATION = Histogram(
+    "airport_request_duration_seconds",
+    "Time of the requests",
+    ["view", "method"],
+)
+RESPONSES = Counter(
+    "airport_responses_total",
+    "Responses by status code",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "airport_request_db_queries",
+    "SQL queries of the requests",
+    ["view", "method"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")),
+)
+ORDERS = Counter("airport_orders_created_total", "Committed orders")
+TICKETS = Counter("airport_tickets_created_total", "Committed tickets")
+BOOKING_CONFLICTS = Counter(
+    "airport_booking_conflicts_total",
+    "Bookings and holds refused by the seats or the flight lock",
+    ["reason"],
+)
+BOOKING_LOCK_RETRIES = Counter(
+    "airport_booking_lock_retries_total",
+    "Bookings retried after failing to lock their flights",
+)
+CACHE_LOOKUPS = Counter(
+    "airport_cache_lookups_total",
+    "Lookups of the flight response cache and the reference data",
+    ["cache", "result"],
+)
+
+
+def order_created(tickets: int) -> None:
+    ORDERS.inc()
+    TICKETS.inc(tickets)
+
+
+def booking_conflict(error) -> None:
+    BOOKING_CONFLICTS.labels(reason=error.default_code).inc()
+
+
+def booking_lock_retried() -> None:
+    BOOKING_LOCK_RETRIES.inc()
+
+
+def cache_lookup(cache: str, result: str) -> None:
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+class MetricsMiddleware:
+    """
+    Observes the time, the status code and the number of SQL queries
+    of every request, labeled by the name of its view
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else "<unmatched>"
+        REQUEST_DURATION.labels(view, request.method).observe(elapsed)
+        REQUEST_QUERIES.labels(view, request.method).observe(queries)
+        RESPONSES.labels(view, request.method, response.status_code).inc()
+        return response
+
+
+def get_registry():
+    """
+    The metrics of all the worker processes when they share
+    PROMETHEUS_MULTIPROC_DIR, of this process otherwise
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """Metrics in the Prometheus text format"""
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-18 04:50
+
+from django.db import migrations, models
+
+
+def build_seat_maps(apps, schema_editor):
+    """
+    Sets the bits of the sold seats row by row, the first seat is the
+    most significant bit of the first byte, as airport.seatmap.SeatMap
+    """
+    Flight = apps.get_model("airport", "Flight")
+    Ticket = apps.get_model("airport", "Ticket")
+    for flight in Flight.objects.select_related("airplane").iterator():
+        rows = flight.airplane.rows
+        seats_in_row = flight.airplane.seats_in_row
+        seat_map = bytearray((rows * seats_in_row + 7) // 8)
+        for row, seat in Ticket.objects.filter(flight=flight).values_list(
+            "row", "seat"
+        ):
+            if not (1 <= row <= rows and 1 <= seat <= seats_in_row):
+                # the ticket does not fit a shrunk airplane anymore
+                continue
+            index = (row - 1) * seats_in_row + seat - 1
+            seat_map[index // 8] |= 0x80 >> (index % 8)
+        flight.seat_map = bytes(seat_map)
+        flight.save(update_fields=["seat_map"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0002_flight_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="flight",
+            name="seat_map",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(build_seat_maps, migrations.RunPython.noop),
+    ]
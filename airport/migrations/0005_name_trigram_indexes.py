@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:20
+
+from django.db import migrations
+
+# icontains lookups compare UPPER(name) on PostgreSQL,
+# so the indexes are built over the same expression
+TRIGRAM_INDEXES = (
+    ("City", "airport_city_name_trgm"),
+    ("Airport", "airport_airport_name_trgm"),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for model_name, index_name in TRIGRAM_INDEXES:
+        table = apps.get_model("airport", model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {index_name} "
+            f"ON {table} USING gin (UPPER(name) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for _, index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0004_seathold"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    apps.get_model("airport", "ReferenceDataVersion").objects.create()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0007_order_user_created_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferenceDataVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-18 06:21
+
+from django.db import migrations, models
+
+
+def queue_images(apps, schema_editor):
+    """The images uploaded before get their variants too"""
+    apps.get_model("airport", "Airplane").objects.exclude(image="").exclude(
+        image__isnull=True
+    ).update(image_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0008_referencedataversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplane",
+            name="image_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                max_length=15,
+            ),
+        ),
+        migrations.AddField(
+            model_name="airplane",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(queue_images, migrations.RunPython.noop),
+    ]
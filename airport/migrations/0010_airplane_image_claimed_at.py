@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0009_airplane_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="airplane",
+            name="image_claimed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
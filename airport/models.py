@@ -2,7 +2,7 @@ import os
 import uuid
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.text import slugify
 
@@ -42,6 +42,13 @@ class AirplaneType(models.Model):
         ordering = ["name"]
 
 
+class ImageStatus(models.TextChoices):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
 def airplane_image_file_path(instance: "Airplane", filename: str) -> str:
     _, extension = os.path.splitext(filename)
     filename = f"{slugify(instance.name)}-{uuid.uuid4()}{extension}"
@@ -60,11 +67,34 @@ class Airplane(models.Model):
         related_name="airplanes"
     )
     image = models.ImageField(null=True, upload_to=airplane_image_file_path)
+    image_status = models.CharField(
+        max_length=15,
+        choices=ImageStatus.choices,
+        blank=True,
+        db_index=True,
+    )
+    # paths of the resized copies of the image by size and format
+    image_variants = models.JSONField(default=dict, blank=True)
+    # when a worker took the image for processing
+    image_claimed_at = models.DateTimeField(
+        null=True, blank=True, editable=False
+    )
 
     @property
     def capacity(self) -> int:
         return self.rows * self.seats_in_row
 
+    def save(self, *args, **kwargs):
+        """A new image is queued for its variants, see `airport.images`"""
+        if self.image and not self.image._committed:
+            self.image_status = ImageStatus.PENDING
+        elif not self.image:
+            self.image_status = ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "image" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "image_status"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
@@ -127,9 +157,37 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="flights")
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    seat_map = models.BinaryField(default=b"", editable=False)
 
     class Meta:
         ordering = ["-departure_time"]
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"],
+                name="flight_route_departure_idx",
+            ),
+            models.Index(
+                fields=["departure_time"], name="flight_departure_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Saves an existing flight without the occupancy the bookings keep,
+        see `airport.booking`, as the instance may have been loaded before
+        the last booking
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in ("tickets_sold", "seat_map")
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return (
@@ -151,6 +209,11 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"], name="order_user_created_idx"
+            ),
+        ]
 
 
 class Ticket(models.Model):
@@ -184,13 +247,25 @@ class Ticket(models.Model):
                     }
                 )
 
-    def clean(self):
-        Ticket.validate_ticket(
-            self.row,
-            self.seat,
-            self.flight.airplane,
-            ValidationError,
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        # the seat map marks the seat the ticket holds as taken
+        ticket._held_seat = tuple(
+            ticket.__dict__.get(name) for name in ("flight_id", "row", "seat")
         )
+        return ticket
+
+    def clean(self):
+        from airport.validation import check_ticket
+
+        # the tickets of an admin formset are validated together
+        if not getattr(self, "_batch_validated", False):
+            check_ticket(self)
+
+    def validate_unique(self, exclude=None):
+        # the seat is checked against the seat map by `clean`
+        super().validate_unique({*(exclude or ()), "seat"})
 
     def save(
         self,
@@ -199,10 +274,14 @@ class Ticket(models.Model):
         using=None,
         update_fields=None,
     ):
-        self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        from airport.validation import check_ticket
+
+        check_ticket(self, skip_validated=True)
+        with transaction.atomic():
+            super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+        self._held_seat = (self.flight_id, self.row, self.seat)
 
     def __str__(self):
         return f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
@@ -210,3 +289,39 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("flight", "row", "seat")
         ordering = ["row", "seat"]
+
+
+class SeatHold(models.Model):
+    """Seats of a flight reserved for a user until the hold expires"""
+
+    flight = models.ForeignKey(
+        Flight,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    seats = models.JSONField()
+    seats_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{str(self.flight)} (seats: {self.seats_count})"
+
+    class Meta:
+        ordering = ["expires_at"]
+
+
+class ReferenceDataVersion(models.Model):
+    """
+    Single row with the version of countries, cities, airplane types
+    and airports, bumped on every change of them
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return str(self.version)
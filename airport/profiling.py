@@ -0,0 +1,206 @@
+import contextvars
+import hmac
+import json
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+# fields of the logged request bodies that are left out
+HIDDEN_FIELDS = re.compile("pass|token|secret|key|access|refresh", re.I)
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_profile = contextvars.ContextVar("request_profile", default=None)
+_timers_installed = False
+_timers_lock = threading.Lock()
+
+
+class Profile:
+    """Time and counts of what a request has spent its time on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.counts = {}
+        # a timer does not count what a nested one of the same name does
+        self.running = set()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def count(self, name: str, number: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def execute(self, execute, sql, params, many, context):
+        """Database execute wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - started)
+            self.count("queries")
+
+    def timed(self, name: str, function, *args):
+        if name in self.running:
+            return function(*args)
+        self.running.add(name)
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.add(name, time.perf_counter() - started)
+            self.running.discard(name)
+
+    def stats(self) -> dict:
+        return {
+            "total_ms": (time.perf_counter() - self.started) * 1000,
+            **{
+                f"{name}_ms": seconds * 1000
+                for name, seconds in self.durations.items()
+            },
+            **self.counts,
+        }
+
+    def server_timing(self, stats: dict) -> str:
+        metrics = [f"total;dur={stats['total_ms']:.1f}"]
+        metrics.append(
+            f"db;dur={stats.get('db_ms', 0.0):.1f};"
+            f"desc=\"{self.counts.get('queries', 0)} queries\""
+        )
+        for name in ("serialize", "render"):
+            if f"{name}_ms" in stats:
+                metrics.append(f"{name};dur={stats[f'{name}_ms']:.1f}")
+        if any(name.startswith("cache_") for name in self.counts):
+            metrics.append(
+                f"cache;desc=\"{self.counts.get('cache_hits', 0)} hits, "
+                f"{self.counts.get('cache_misses', 0)} misses\""
+            )
+        return ", ".join(metrics)
+
+
+def count(name: str, number: int = 1) -> None:
+    """Counts the event for the profile of the current request, if any"""
+    profile = _profile.get()
+    if profile is not None:
+        profile.count(name, number)
+
+
+def timed(name: str, function, *args):
+    """Calls the function, timed for the profile of the current request"""
+    profile = _profile.get()
+    if profile is None:
+        return function(*args)
+    return profile.timed(name, function, *args)
+
+
+def _instrument(cls, attribute: str, name: str) -> None:
+    prop = getattr(cls, attribute)
+    setattr(
+        cls, attribute, property(lambda self: timed(name, prop.fget, self))
+    )
+
+
+def install_timers() -> None:
+    """
+    Times the serializers and the rendering from the first profiled
+    request on, the timers then cost a context variable lookup when
+    nothing is profiled
+    """
+    global _timers_installed
+    with _timers_lock:
+        if not _timers_installed:
+            _instrument(BaseSerializer, "data", "serialize")
+            _instrument(Response, "rendered_content", "render")
+            _timers_installed = True
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests when REQUEST_PROFILING is on or they have the
+    REQUEST_PROFILING_HEADER header set to REQUEST_PROFILING_SECRET, both
+    unset by default: the total time, the time and number
+    of SQL queries, the serialization and rendering time and the cache
+    hits go to the Server-Timing header, and a REQUEST_PROFILING_LOG_RATE
+    share of the profiles is logged as JSON, with the path and query and
+    the JSON body of writes but its HIDDEN_FIELDS, so that the log can be
+    replayed by load_test
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def is_profiled(self, request) -> bool:
+        if settings.REQUEST_PROFILING:
+            return True
+        header = settings.REQUEST_PROFILING_HEADER
+        secret = settings.REQUEST_PROFILING_SECRET
+        if not header or not secret:
+            return False
+        value = request.META.get(f"HTTP_{header.upper().replace('-', '_')}")
+        return value is not None and hmac.compare_digest(
+            value.encode(), secret.encode()
+        )
+
+    def __call__(self, request):
+        if not self.is_profiled(request):
+            return self.get_response(request)
+
+        if not _timers_installed:
+            install_timers()
+        logged = random.random() < settings.REQUEST_PROFILING_LOG_RATE
+        # read ahead, as the view may consume the stream
+        body = self.get_body(request) if logged else None
+        profile = Profile()
+        token = _profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+
+        stats = profile.stats()
+        response["Server-Timing"] = profile.server_timing(stats)
+        if logged:
+            entry = {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "status": response.status_code,
+                **stats,
+            }
+            if body is not None:
+                entry["body"] = body
+            logger.info(json.dumps(entry))
+        return response
+
+    @staticmethod
+    def get_body(request):
+        """The JSON body of a write without its HIDDEN_FIELDS, if any"""
+        if (
+            request.method in SAFE_METHODS
+            or request.content_type != "application/json"
+        ):
+            return None
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            return None
+        if isinstance(body, dict):
+            body = {
+                name: value
+                for name, value in body.items()
+                if not HIDDEN_FIELDS.search(name)
+            }
+        return body
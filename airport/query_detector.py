@@ -0,0 +1,106 @@
+import logging
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.fields import Field
+
+logger = logging.getLogger(__name__)
+
+IGNORED_STATEMENTS = ("SAVEPOINT", "RELEASE", "ROLLBACK", "SET ")
+# modules wrapping the code which runs the queries
+INSTRUMENTATION_MODULES = (__name__, "airport.metrics", "airport.profiling")
+
+
+class NPlusOneQueries(Exception):
+    """A query of the same shape has been repeated within one request"""
+
+
+def get_shape(sql: str) -> str:
+    """The query without its values and lengths of its value lists"""
+    shape = re.sub(r"\b\d+\b", "?", " ".join(sql.split()))
+    shape = re.sub(r"\((?:%s|\?)(?:, (?:%s|\?))*\)", "(?)", shape)
+    return re.sub(r"\(\?\)(?:, \(\?\))+", "(?)", shape)
+
+
+def get_location() -> str:
+    """
+    The serializer field being rendered and the innermost line of the
+    project code on the stack
+    """
+    field = code = None
+    frame = sys._getframe(1)
+    while frame is not None and (field is None or code is None):
+        owner = frame.f_locals.get("self")
+        if field is None and isinstance(owner, Field) and owner.field_name:
+            field = f"{type(owner.parent).__name__}.{owner.field_name}"
+        filename = frame.f_code.co_filename
+        if (
+            code is None
+            and frame.f_globals.get("__name__") not in INSTRUMENTATION_MODULES
+            and filename.startswith(str(settings.BASE_DIR))
+            and "site-packages" not in filename
+        ):
+            code = f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return ", ".join(
+        location
+        for location in (field and f"field {field}", code)
+        if location
+    ) or "unknown location"
+
+
+class QueryDetector:
+    """
+    Counts the queries by their shape and reports the shapes reaching
+    NPLUSONE_THRESHOLD, once each: logs them as warnings, or raises
+    NPlusOneQueries in the "strict" NPLUSONE_DETECTION mode
+    """
+
+    def __init__(self, strict: bool):
+        self.strict = strict
+        self.counts = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS):
+            shape = get_shape(sql)
+            self.counts[shape] = self.counts.get(shape, 0) + 1
+            if self.counts[shape] == settings.NPLUSONE_THRESHOLD:
+                self.report(shape)
+        return execute(sql, params, many, context)
+
+    def report(self, shape: str) -> None:
+        message = (
+            f"{settings.NPLUSONE_THRESHOLD} queries of the same shape "
+            f"at {get_location()}: {shape}"
+        )
+        if self.strict:
+            raise NPlusOneQueries(message)
+        logger.warning(message)
+
+
+@contextmanager
+def detect_n_plus_one(strict: bool = None):
+    """Detects repeated queries inside the block"""
+    if strict is None:
+        strict = settings.NPLUSONE_DETECTION == "strict"
+    detector = QueryDetector(strict)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector))
+        yield detector
+
+
+class QueryDetectorMiddleware:
+    """Detects repeated queries within a request, see `QueryDetector`"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.NPLUSONE_DETECTION not in ("warn", "strict"):
+            return self.get_response(request)
+        with detect_n_plus_one():
+            return self.get_response(request)
@@ -0,0 +1,96 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+from airport.metrics import cache_lookup
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airport,
+    ReferenceDataVersion,
+)
+
+
+class ReferenceData:
+    """
+    Snapshot of countries, cities, airplane types and airports
+    with the related objects linked in memory, so that rendering
+    them makes no queries
+    """
+
+    def __init__(self, version: int):
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.countries = list(Country.objects.all())
+        self.airplane_types = list(AirplaneType.objects.all())
+        self.cities = list(City.objects.all())
+        self.airports = list(Airport.objects.all())
+
+        self.by_id = {
+            model: {instance.id: instance for instance in instances}
+            for model, instances in (
+                (Country, self.countries),
+                (AirplaneType, self.airplane_types),
+                (City, self.cities),
+                (Airport, self.airports),
+            )
+        }
+        for city in self.cities:
+            city.country = self.by_id[Country][city.country_id]
+        for airport in self.airports:
+            airport.city = self.by_id[City][airport.city_id]
+
+    def get(self, model, pk):
+        return self.by_id[model].get(pk)
+
+
+def current_version() -> int:
+    return (
+        ReferenceDataVersion.objects.values_list("version", flat=True).first()
+        or 0
+    )
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_reference_data() -> ReferenceData:
+    """
+    Returns the snapshot of this process. Once it is older than
+    REFERENCE_DATA_MAX_AGE_SECONDS its version is checked with one
+    query and the data is reloaded only if the version has changed.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if (
+        snapshot is not None
+        and time.monotonic() - snapshot.checked_at
+        < settings.REFERENCE_DATA_MAX_AGE_SECONDS
+    ):
+        cache_lookup("reference_data", "hits")
+        return snapshot
+
+    with _lock:
+        version = current_version()
+        if _snapshot is not None and _snapshot.version == version:
+            cache_lookup("reference_data", "hits")
+            _snapshot.checked_at = time.monotonic()
+        else:
+            cache_lookup("reference_data", "misses")
+            _snapshot = ReferenceData(version)
+        return _snapshot
+
+
+def reference_data_changed() -> None:
+    """
+    Bumps the version for snapshots of all the processes and drops
+    the one of this process, so the change is seen here at once
+    """
+    global _snapshot
+    if not ReferenceDataVersion.objects.update(version=F("version") + 1):
+        ReferenceDataVersion.objects.create(version=1)
+    _snapshot = None
@@ -0,0 +1,176 @@
+from collections import defaultdict
+
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+from rest_framework import serializers
+
+from airport.fieldsets import EXPAND_PARAM, FIELDS_PARAM
+from airport.models import Flight, SeatHold, Ticket
+from airport.profiling import timed
+
+FLIGHT_LIST_VALUES = (
+    "id",
+    "route__source_id",
+    "route__source__name",
+    "route__source__city__name",
+    "route__destination_id",
+    "route__destination__name",
+    "route__destination__city__name",
+    "airplane__name",
+    "departure_time",
+    "arrival_time",
+)
+ORDER_LIST_VALUES = ("id", "created_at")
+
+_datetime = serializers.DateTimeField()
+
+
+def airport_name(city: str, name: str) -> str:
+    """The same as str() of the airport"""
+    return f"{city} ({name})"
+
+
+def annotate_tickets_available(queryset):
+    """Seats of the flights neither sold nor held"""
+    return queryset.annotate(
+        tickets_available=(
+            F("airplane__rows") * F("airplane__seats_in_row")
+            - F("tickets_sold")
+            - Coalesce(
+                Subquery(
+                    SeatHold.objects.filter(
+                        flight=OuterRef("pk"), expires_at__gt=Now()
+                    )
+                    .order_by()
+                    .values("flight")
+                    .annotate(held=Sum("seats_count"))
+                    .values("held")
+                ),
+                0,
+            )
+        )
+    )
+
+
+def get_crew_names(flight_ids) -> dict:
+    """Full names of the crew of every flight"""
+    names = defaultdict(list)
+    for flight_id, first_name, last_name in (
+        Flight.crew.through.objects.filter(flight_id__in=flight_ids)
+        .order_by("id")
+        .values_list("flight_id", "crew__first_name", "crew__last_name")
+    ):
+        names[flight_id].append(f"{first_name} {last_name}")
+    return names
+
+
+def flight_list_values(queryset):
+    """
+    Values of the fields of the flight list, the tickets_available
+    annotation of the queryset is taken when it has one
+    """
+    fields = FLIGHT_LIST_VALUES
+    if "tickets_available" in queryset.query.annotations:
+        fields += ("tickets_available",)
+    return queryset.prefetch_related(None).values(*fields)
+
+
+def flight_list_rows(values) -> list:
+    """
+    The flight list as rendered by FlightListSerializer,
+    made from `flight_list_values`
+    """
+    crew = get_crew_names([value["id"] for value in values])
+    airports = {}
+    rows = []
+    for value in values:
+        for prefix in ("route__source", "route__destination"):
+            airport_id = value[f"{prefix}_id"]
+            if airport_id not in airports:
+                airports[airport_id] = airport_name(
+                    value[f"{prefix}__city__name"], value[f"{prefix}__name"]
+                )
+        row = {
+            "id": value["id"],
+            "source": airports[value["route__source_id"]],
+            "destination": airports[value["route__destination_id"]],
+            "airplane": value["airplane__name"],
+            "departure_time": _datetime.to_representation(
+                value["departure_time"]
+            ),
+            "arrival_time": _datetime.to_representation(
+                value["arrival_time"]
+            ),
+            "crew": crew.get(value["id"], []),
+        }
+        if "tickets_available" in value:
+            row["tickets_available"] = value["tickets_available"]
+        rows.append(row)
+    return rows
+
+
+def order_list_values(queryset):
+    return queryset.prefetch_related(None).values(*ORDER_LIST_VALUES)
+
+
+def order_list_rows(values) -> list:
+    """
+    The order list as rendered by OrderListSerializer,
+    made from `order_list_values`
+    """
+    tickets = list(
+        Ticket.objects.filter(
+            order_id__in=[value["id"] for value in values]
+        ).values("id", "order_id", "row", "seat", "flight_id")
+    )
+    flights = {
+        row["id"]: row
+        for row in flight_list_rows(
+            flight_list_values(
+                Flight.objects.filter(
+                    id__in={ticket["flight_id"] for ticket in tickets}
+                )
+            )
+        )
+    }
+    order_tickets = defaultdict(list)
+    for ticket in tickets:
+        order_tickets[ticket["order_id"]].append(
+            {
+                "id": ticket["id"],
+                "row": ticket["row"],
+                "seat": ticket["seat"],
+                "flight": flights[ticket["flight_id"]],
+            }
+        )
+    return [
+        {
+            "id": value["id"],
+            "created_at": _datetime.to_representation(value["created_at"]),
+            "tickets": order_tickets[value["id"]],
+        }
+        for value in values
+    ]
+
+
+class ValuesListMixin:
+    """
+    Lists rows built by `list_rows` from the page of `list_values` of the
+    queryset, without model instances and serializer fields. Lists with
+    ?fields= or ?expand= are left to the serializer.
+    """
+
+    list_values = None
+    list_rows = None
+
+    def list(self, request, *args, **kwargs):
+        if (
+            FIELDS_PARAM in request.query_params
+            or EXPAND_PARAM in request.query_params
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.list_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            timed("serialize", self.list_rows, page)
+        )
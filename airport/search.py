@@ -0,0 +1,110 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from airport.models import Airport
+from airport.versions import initial_version
+
+VERSION_KEY = "airport_search:version"
+
+
+def normalize(text: str) -> str:
+    """Case and accent insensitive form of a name"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join(
+        "".join(
+            char for char in decomposed if not unicodedata.combining(char)
+        ).split()
+    )
+
+
+class AirportIndex:
+    """
+    Sorted keys for prefix search of airports. Every airport is indexed
+    under its own name and the name of its city starting from every
+    word, so both "york" and "new yo" find the New York airports.
+    """
+
+    def __init__(self, airports=()):
+        self.airports = {}
+        keys = set()
+        for airport in airports:
+            self.airports[airport["id"]] = airport
+            for name in (airport["name"], airport["city"]):
+                words = normalize(name).split()
+                for start in range(len(words)):
+                    keys.add((" ".join(words[start:]), airport["id"]))
+        self.keys = sorted(keys)
+        self.version = None
+
+    def search(self, term: str, limit: int) -> list:
+        """
+        Airports with a name starting with the term, in the order
+        of the matched names, so that an exact match comes first
+        """
+        prefix = normalize(term)
+        found = {}
+        if not prefix:
+            return []
+        index = bisect_left(self.keys, (prefix,))
+        while len(found) < limit and index < len(self.keys):
+            key, airport_id = self.keys[index]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(airport_id, self.airports[airport_id])
+            index += 1
+        return list(found.values())
+
+
+def load_airports() -> list:
+    return [
+        {"id": airport_id, "name": name, "city": city, "country": country}
+        for airport_id, name, city, country in Airport.objects.values_list(
+            "id", "name", "city__name", "city__country__name"
+        ).order_by()
+    ]
+
+
+_index = AirportIndex()
+_lock = threading.Lock()
+
+
+def get_index() -> AirportIndex:
+    """
+    Returns the index of this process, rebuilt when airports,
+    cities or countries have changed since it was built
+    """
+    global _index
+    version = cache.get_or_set(VERSION_KEY, initial_version, timeout=None)
+    if _index.version != version:
+        with _lock:
+            if _index.version != version:
+                index = AirportIndex(load_airports())
+                index.version = version
+                _index = index
+    return _index
+
+
+def autocomplete(term: str, limit: int) -> list:
+    return get_index().search(term, limit)
+
+
+def airports_changed() -> None:
+    """Makes the indexes of all the processes to be rebuilt"""
+    cache.add(VERSION_KEY, initial_version(), timeout=None)
+    cache.incr(VERSION_KEY)
+
+
+def find_airport_ids(city: str) -> list:
+    """
+    IDs of the airports of the cities which names contain the term,
+    the lookup is served by the trigram index of the city name
+    on PostgreSQL
+    """
+    return list(
+        Airport.objects.filter(city__name__icontains=city).values_list(
+            "id", flat=True
+        )
+    )
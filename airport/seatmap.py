@@ -0,0 +1,136 @@
+import base64
+
+
+class SeatMap:
+    """
+    Occupancy grid of a flight packed into a bitset, one bit per seat.
+    Seats are numbered row by row, the first seat is the most
+    significant bit of the first byte; a set bit means a taken seat.
+    """
+
+    def __init__(self, rows: int, seats_in_row: int, data: bytes = b""):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.data = bytearray(bytes(data)[:size].ljust(size, b"\0"))
+
+    @classmethod
+    def for_flight(cls, flight) -> "SeatMap":
+        return cls(
+            flight.airplane.rows,
+            flight.airplane.seats_in_row,
+            flight.seat_map,
+        )
+
+    def _position(self, row: int, seat: int) -> tuple:
+        if not (1 <= row <= self.rows and 1 <= seat <= self.seats_in_row):
+            raise ValueError(f"Seat ({row}, {seat}) is out of the grid")
+        index = (row - 1) * self.seats_in_row + seat - 1
+        return index // 8, 0x80 >> (index % 8)
+
+    def is_taken(self, row: int, seat: int) -> bool:
+        byte, mask = self._position(row, seat)
+        return bool(self.data[byte] & mask)
+
+    def take(self, row: int, seat: int) -> None:
+        byte, mask = self._position(row, seat)
+        self.data[byte] |= mask
+
+    def release(self, row: int, seat: int) -> None:
+        byte, mask = self._position(row, seat)
+        self.data[byte] &= ~mask
+
+    def __bytes__(self):
+        return bytes(self.data)
+
+    def __iter__(self):
+        """Yields occupancy of every seat row by row"""
+        for index in range(self.rows * self.seats_in_row):
+            yield bool(self.data[index // 8] & (0x80 >> (index % 8)))
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.data).decode()
+
+    def to_rle(self) -> list:
+        """
+        Lengths of alternating runs of free and taken seats,
+        always starting with a (possibly empty) run of free seats
+        """
+        runs = [0]
+        current = False
+        for taken in self:
+            if taken != current:
+                runs.append(0)
+                current = taken
+            runs[-1] += 1
+        return runs
+
+    def to_grid(self) -> list:
+        seats = [int(taken) for taken in self]
+        return [
+            seats[start:start + self.seats_in_row]
+            for start in range(0, len(seats), self.seats_in_row)
+        ]
+
+    def free_runs(self) -> list:
+        """(row, first seat, length) of every run of free seats in a row"""
+        runs = []
+        for row, seats in enumerate(self.to_grid(), start=1):
+            start = None
+            for seat, taken in enumerate(seats + [1], start=1):
+                if not taken and start is None:
+                    start = seat
+                elif taken and start is not None:
+                    runs.append((row, start, seat - start))
+                    start = None
+        return runs
+
+    def find_seats(self, count: int, preference: str = "together"):
+        """
+        Picks `count` free seats for a group, or returns None if there
+        are not enough of them.
+        "together" seats the group in one row in the tightest free run
+        that fits it, "window" also wants that run to touch a window,
+        and "any" takes the first free seats. A group that fits
+        nowhere together is split over as few runs as possible.
+        """
+        runs = self.free_runs()
+        if sum(length for _, _, length in runs) < count:
+            return None
+
+        if preference == "any":
+            return [
+                (row, seat)
+                for row, start, length in runs
+                for seat in range(start, start + length)
+            ][:count]
+
+        fitting = [run for run in runs if run[2] >= count]
+        if preference == "window":
+            fitting = [
+                run for run in fitting if self._window_side(*run) is not None
+            ] or fitting
+        if fitting:
+            row, start, length = min(
+                fitting, key=lambda run: (run[2], run[0])
+            )
+            if self._window_side(row, start, length) == "right":
+                start += length - count
+            return [(row, seat) for seat in range(start, start + count)]
+
+        seats = []
+        for row, start, length in sorted(
+            runs, key=lambda run: (-run[2], run[0])
+        ):
+            length = min(length, count - len(seats))
+            seats.extend((row, seat) for seat in range(start, start + length))
+            if len(seats) == count:
+                break
+        return sorted(seats)
+
+    def _window_side(self, row: int, start: int, length: int):
+        if start == 1:
+            return "left"
+        if start + length - 1 == self.seats_in_row:
+            return "right"
+        return None
@@ -1,7 +1,15 @@
-from django.db import transaction
+from django.conf import settings
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from airport.booking import (
+    auto_book,
+    create_order,
+    place_hold,
+)
 from airport.models import (
     Country,
     City,
@@ -13,7 +21,72 @@ from airport.models import (
     Flight,
     Ticket,
     Order,
+    SeatHold,
+    ImageStatus,
 )
+from airport.exports import EXPORT_FORMATS
+from airport.fieldsets import SparseFieldsSerializerMixin
+from airport.refdata import get_reference_data
+from airport.validation import find_ticket_errors
+
+
+class ReferencePrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves countries, cities, airplane types and airports from
+    the in-memory reference data, and from the database only the ones
+    not there yet
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, (int, str)) and str(data).isdigit():
+            instance = get_reference_data().get(
+                self.queryset.model, int(data)
+            )
+            if instance is not None:
+                return instance
+        return super().to_internal_value(data)
+
+
+class ReferenceSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Renders a related country, city, airplane type or airport
+    from the in-memory reference data instead of loading it
+    """
+
+    def get_attribute(self, instance):
+        *path, name = self.source_attrs
+        for attr in path:
+            instance = getattr(instance, attr)
+        pk = getattr(instance, f"{name}_id")
+        if pk is None:
+            return None
+        model = instance._meta.get_field(name).related_model
+        return get_reference_data().get(model, pk) or getattr(instance, name)
+
+
+@extend_schema_field(OpenApiTypes.OBJECT)
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    URLs of the resized copies of the airplane image by size and format,
+    null until they are made, see `airport.images`
+    """
+
+    def to_representation(self, airplane):
+        if airplane.image_status != ImageStatus.READY or not airplane.image:
+            return None
+        storage = airplane.image.storage
+        request = self.context.get("request")
+        return {
+            name: {
+                extension: (
+                    request.build_absolute_uri(storage.url(path))
+                    if request
+                    else storage.url(path)
+                )
+                for extension, path in formats.items()
+            }
+            for name, formats in airplane.image_variants.items()
+        }
 
 
 class CountrySerializer(serializers.ModelSerializer):
@@ -23,13 +96,15 @@ class CountrySerializer(serializers.ModelSerializer):
 
 
 class CitySerializer(serializers.ModelSerializer):
+    country = ReferencePrimaryKeyRelatedField(queryset=Country.objects.all())
+
     class Meta:
         model = City
         fields = ("id", "name", "country")
 
 
 class CityListSerializer(CitySerializer):
-    country = serializers.SlugRelatedField(read_only=True, slug_field="name")
+    country = ReferenceSlugRelatedField(read_only=True, slug_field="name")
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
@@ -39,6 +114,11 @@ class AirplaneTypeSerializer(serializers.ModelSerializer):
 
 
 class AirplaneSerializer(serializers.ModelSerializer):
+    airplane_type = ReferencePrimaryKeyRelatedField(
+        queryset=AirplaneType.objects.all(), allow_null=True, required=False
+    )
+    image_variants = ImageVariantsField(source="*")
+
     class Meta:
         model = Airplane
         fields = (
@@ -49,34 +129,60 @@ class AirplaneSerializer(serializers.ModelSerializer):
             "capacity",
             "airplane_type",
             "image",
+            "image_variants",
         )
 
 
 class AirplaneListSerializer(serializers.ModelSerializer):
-    airplane_type = serializers.SlugRelatedField(
+    airplane_type = ReferenceSlugRelatedField(
         read_only=True,
         slug_field="name"
     )
+    image_variants = ImageVariantsField(source="*")
 
     class Meta:
         model = Airplane
-        fields = ("id", "name", "capacity", "airplane_type", "image")
+        fields = (
+            "id",
+            "name",
+            "capacity",
+            "airplane_type",
+            "image",
+            "image_variants",
+        )
 
 
 class AirplaneImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airplane
-        fields = ("id", "image")
+        fields = ("id", "image", "image_status")
+        read_only_fields = ("image_status",)
 
 
 class AirportSerializer(serializers.ModelSerializer):
+    city = ReferencePrimaryKeyRelatedField(queryset=City.objects.all())
+
     class Meta:
         model = Airport
         fields = ("id", "name", "city", "closest_big_city")
 
 
 class AirportListSerializer(AirportSerializer):
-    city = serializers.SlugRelatedField(read_only=True, slug_field="name")
+    city = ReferenceSlugRelatedField(read_only=True, slug_field="name")
+
+
+class AirportAutocompleteSerializer(serializers.Serializer):
+    q = serializers.CharField(
+        help_text="Beginning of a word of the airport or city name"
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class AirportSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    city = serializers.CharField()
+    country = serializers.CharField()
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -85,15 +191,64 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("id", "first_name", "last_name")
 
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves objects from a batch preloaded with `preload`"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.preloaded = {}
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        return PreloadedManyRelatedField(
+            child_relation=cls(*args, **kwargs),
+            **{
+                key: value
+                for key, value in kwargs.items()
+                if key in MANY_RELATION_KWARGS
+            },
+        )
+
+    def preload(self, pks):
+        """Fetches all the objects of the batch in one query"""
+        pks = {str(pk) for pk in pks if str(pk).isdigit()}
+        self.preloaded = {
+            str(pk): obj
+            for pk, obj in self.get_queryset().in_bulk(pks).items()
+        }
+
+    def to_internal_value(self, data):
+        obj = self.preloaded.get(str(data))
+        if obj is None:
+            return super().to_internal_value(data)
+        return obj
+
+
+class PreloadedManyRelatedField(serializers.ManyRelatedField):
+    """Preloads all the related objects of the list at once"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child_relation.preload(data)
+        return super().to_internal_value(data)
+
+
 class RouteSerializer(serializers.ModelSerializer):
+    source = ReferencePrimaryKeyRelatedField(queryset=Airport.objects.all())
+    destination = ReferencePrimaryKeyRelatedField(
+        queryset=Airport.objects.all()
+    )
+
     class Meta:
         model = Route
         fields = ("id", "source", "destination", "distance")
 
 
-class RouteListSerializer(serializers.ModelSerializer):
-    source = serializers.SlugRelatedField(read_only=True, slug_field="name")
-    destination = serializers.SlugRelatedField(
+class RouteListSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    source = ReferenceSlugRelatedField(read_only=True, slug_field="name")
+    destination = ReferenceSlugRelatedField(
         read_only=True,
         slug_field="name"
     )
@@ -103,7 +258,11 @@ class RouteListSerializer(serializers.ModelSerializer):
         fields = ("id", "source", "destination", "distance")
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
     class Meta:
         model = Flight
         fields = (
@@ -172,6 +331,7 @@ class FlightDetailSerializer(FlightSerializer):
         source="airplane.image",
         read_only=True
     )
+    airplane_image_variants = ImageVariantsField(source="airplane")
     crew = serializers.SlugRelatedField(
         many=True, read_only=True, slug_field="full_name"
     )
@@ -183,48 +343,189 @@ class FlightDetailSerializer(FlightSerializer):
             "route",
             "airplane",
             "airplane_image",
+            "airplane_image_variants",
             "crew",
             "departure_time",
             "arrival_time",
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class FlightFilterSerializer(serializers.Serializer):
+    departure_after = serializers.DateTimeField(
+        required=False, help_text="Departure at or after the time"
+    )
+    departure_before = serializers.DateTimeField(
+        required=False, help_text="Departure before the time"
+    )
+    date = serializers.DateField(
+        required=False, help_text="Departure on the date"
+    )
+
+
+class ExportSerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(
+        choices=EXPORT_FORMATS,
+        default="ndjson",
+        help_text="One JSON object per line or CSV with a header row",
+    )
+
+
+class OrderExportSerializer(ExportSerializer):
+    created_after = serializers.DateTimeField(
+        required=False, help_text="Orders created at or after the time"
+    )
+    created_before = serializers.DateTimeField(
+        required=False, help_text="Orders created before the time"
+    )
+
+
+class ConnectionSearchSerializer(serializers.Serializer):
+    source = serializers.IntegerField(help_text="Source airport id")
+    destination = serializers.IntegerField(
+        help_text="Destination airport id"
+    )
+    date = serializers.DateField(help_text="Date of the first departure")
+    max_connections = serializers.IntegerField(
+        min_value=0, max_value=2, default=2
+    )
+    min_layover = serializers.IntegerField(
+        min_value=0,
+        default=settings.CONNECTION_MIN_LAYOVER_MINUTES,
+        help_text="Minimal time between flights in minutes",
+    )
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    duration = serializers.IntegerField(help_text="Duration in minutes")
+    connections = serializers.IntegerField()
+    flights = FlightListSerializer(many=True)
+
+
+class TicketBatchSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.child.fields["flight"].preload(
+                item.get("flight") for item in data if isinstance(item, dict)
+            )
+        return super().to_internal_value(data)
+
+
+class TicketSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
+    flight = PreloadedPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
 
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
-
-    def validate(self, attrs):
-        data = super(TicketSerializer, self).validate(attrs=attrs)
-        Ticket.validate_ticket(
-            attrs["row"],
-            attrs["seat"],
-            attrs["flight"].airplane,
-            ValidationError
-        )
-        return data
+        # seats are checked for the whole order at once
+        validators = []
+        list_serializer_class = TicketBatchSerializer
 
 
 class TicketListSerializer(TicketSerializer):
     flight = FlightListSerializer(many=False, read_only=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(
+    SparseFieldsSerializerMixin, serializers.ModelSerializer
+):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ("id", "created_at", "tickets")
 
+    def validate_tickets(self, tickets_data):
+        # sold seats are checked under the flight locks by `create_order`
+        errors = find_ticket_errors(
+            [Ticket(**ticket_data) for ticket_data in tickets_data],
+            check_sold=False,
+        )
+        if any(errors):
+            raise ValidationError(errors)
+        return tickets_data
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        tickets_data = validated_data.pop("tickets")
+        return create_order(tickets_data, **validated_data)
 
 
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
+
+
+class AutoOrderSerializer(serializers.Serializer):
+    flight = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    passengers = serializers.IntegerField(min_value=1)
+    preference = serializers.ChoiceField(
+        choices=["together", "window", "any"], default="together"
+    )
+
+    def validate(self, attrs):
+        data = super(AutoOrderSerializer, self).validate(attrs=attrs)
+        capacity = attrs["flight"].airplane.capacity
+        if attrs["passengers"] > capacity:
+            raise ValidationError(
+                {
+                    "passengers": f"passengers number must not exceed "
+                    f"the airplane capacity: {capacity}"
+                }
+            )
+        return data
+
+    def create(self, validated_data):
+        return auto_book(
+            validated_data["flight"],
+            validated_data["passengers"],
+            validated_data["preference"],
+            validated_data["user"],
+        )
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    flight = serializers.PrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
+    seats = SeatSerializer(many=True, allow_empty=False)
+    seconds = serializers.IntegerField(
+        write_only=True,
+        min_value=1,
+        max_value=settings.SEAT_HOLD_MAX_SECONDS,
+        default=settings.SEAT_HOLD_SECONDS,
+    )
+
+    class Meta:
+        model = SeatHold
+        fields = ("id", "flight", "seats", "seconds", "expires_at")
+        read_only_fields = ("expires_at",)
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        seats = [(seat["row"], seat["seat"]) for seat in attrs["seats"]]
+        if len(set(seats)) != len(seats):
+            raise ValidationError({"seats": "Seats must not repeat"})
+        for row, seat in seats:
+            Ticket.validate_ticket(
+                row, seat, attrs["flight"].airplane, ValidationError
+            )
+        return data
+
+    def create(self, validated_data):
+        return place_hold(
+            validated_data["flight"],
+            [(seat["row"], seat["seat"]) for seat in validated_data["seats"]],
+            validated_data["seconds"],
+            validated_data["user"],
+        )
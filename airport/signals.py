@@ -0,0 +1,232 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    pre_save,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.dispatch import receiver
+
+from airport.booking import (
+    rebuild_seat_maps,
+    release_seats,
+    update_occupancy,
+)
+from airport.connections import flights_changed
+from airport.flight_cache import invalidate_flights, invalidate_flight_listing
+from airport.images import queue_airplane_image
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+    SeatHold,
+    ImageStatus,
+)
+from airport.refdata import reference_data_changed
+from airport.search import airports_changed
+from airport.versions import bump_now_and_on_commit, model_version_key
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_seat(sender, instance, raw, **kwargs):
+    """Remembers the seat an existing ticket is moved from"""
+    instance._previous_seat = None
+    if not raw and not instance._state.adding:
+        instance._previous_seat = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("flight_id", "row", "seat")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def occupy_saved_ticket_seat(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    seat = (instance.flight_id, instance.row, instance.seat)
+    previous_seat = instance._previous_seat
+    if created or previous_seat is None:
+        update_occupancy(instance.flight_id, taken=[seat[1:]])
+    elif previous_seat != seat:
+        if previous_seat[0] == instance.flight_id:
+            update_occupancy(
+                instance.flight_id,
+                taken=[seat[1:]],
+                released=[previous_seat[1:]],
+            )
+        else:
+            update_occupancy(previous_seat[0], released=[previous_seat[1:]])
+            update_occupancy(instance.flight_id, taken=[seat[1:]])
+
+
+@receiver(post_delete, sender=Ticket)
+def release_deleted_ticket_seat(sender, instance, origin=None, **kwargs):
+    """
+    Releases the seat of a ticket deleted by itself: the tickets of
+    deleted orders are released by `release_deleted_order_seats`, and
+    the ones of deleted flights go with their flights
+    """
+    if isinstance(origin, QuerySet):
+        origin = origin.model
+    if origin is None or origin is Ticket or isinstance(origin, Ticket):
+        update_occupancy(
+            instance.flight_id, released=[(instance.row, instance.seat)]
+        )
+
+
+@receiver(pre_delete, sender=Order)
+def release_deleted_order_seats(sender, instance, **kwargs):
+    """Releases the seats of the order once per flight"""
+    seats_by_flight = defaultdict(list)
+    for flight_id, row, seat in instance.tickets.order_by().values_list(
+        "flight_id", "row", "seat"
+    ):
+        seats_by_flight[flight_id].append((row, seat))
+    if seats_by_flight:
+        release_seats(seats_by_flight)
+
+
+def seats_may_move(created, raw, update_fields, fields) -> bool:
+    """Whether a save of existing rows can change the seat positions"""
+    if created or raw:
+        return False
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+@receiver(post_save, sender=Flight)
+def rebuild_flight_seat_map(
+    sender, instance, created, raw, update_fields=None, **kwargs
+):
+    """Seat positions depend on the airplane of the flight"""
+    if seats_may_move(
+        created, raw, update_fields, {"airplane", "airplane_id"}
+    ):
+        with transaction.atomic(savepoint=False):
+            rebuild_seat_maps([instance.pk])
+
+
+@receiver(post_save, sender=Airplane)
+def rebuild_airplane_seat_maps(
+    sender, instance, created, raw, update_fields=None, **kwargs
+):
+    if seats_may_move(
+        created, raw, update_fields, {"rows", "seats_in_row"}
+    ):
+        with transaction.atomic(savepoint=False):
+            rebuild_seat_maps(
+                Flight.objects.filter(airplane=instance).values_list(
+                    "id", flat=True
+                )
+            )
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def update_connections_graph(sender, instance, **kwargs):
+    flight_id = instance.id
+    transaction.on_commit(lambda: flights_changed([flight_id]))
+
+
+@receiver(post_save, sender=Route)
+def update_route_connections_graph(sender, instance, created, **kwargs):
+    if not created:
+        flight_ids = list(instance.flights.values_list("id", flat=True))
+        transaction.on_commit(lambda: flights_changed(flight_ids))
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def update_airport_search_index(sender, **kwargs):
+    transaction.on_commit(airports_changed)
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=Airport)
+def invalidate_cached_flight_listing(sender, **kwargs):
+    """Changes which move flights between lists or show in all of them"""
+    invalidate_flight_listing()
+
+
+@receiver(post_save, sender=Airplane)
+def invalidate_cached_airplane_flights(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_flights(
+            instance.flight_set.values_list("id", flat=True).order_by()
+        )
+
+
+@receiver(post_save, sender=Airplane)
+def queue_uploaded_airplane_image(sender, instance, raw, **kwargs):
+    if not raw and instance.image_status == ImageStatus.PENDING:
+        queue_airplane_image(instance.id)
+
+
+@receiver(post_save, sender=Crew)
+def invalidate_cached_crew_flights(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_flights(
+            instance.flights.values_list("id", flat=True).order_by()
+        )
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def invalidate_cached_flight_crew(sender, instance, action, **kwargs):
+    if action.startswith("post_"):
+        if isinstance(instance, Flight):
+            invalidate_flights([instance.id])
+        else:
+            invalidate_flights(
+                instance.flights.values_list("id", flat=True).order_by()
+            )
+
+
+@receiver(post_save, sender=SeatHold)
+@receiver(post_delete, sender=SeatHold)
+def invalidate_cached_held_flight(sender, instance, **kwargs):
+    invalidate_flights([instance.flight_id])
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=AirplaneType)
+@receiver(post_delete, sender=AirplaneType)
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+def update_reference_data_version(sender, **kwargs):
+    reference_data_changed()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, **kwargs):
+    """Versions of the models for ETags of the responses with them"""
+    if sender._meta.app_label == "airport":
+        bump_now_and_on_commit([model_version_key(sender._meta.model_name)])
+
+
+@receiver(m2m_changed, sender=Flight.crew.through)
+def bump_flight_crew_version(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_now_and_on_commit([model_version_key("flight")])
@@ -10,6 +10,7 @@ from airport.views import (
     RouteViewSet,
     FlightViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -23,6 +24,7 @@ router.register("crews", CrewViewSet)
 router.register("routes", RouteViewSet)
 router.register("flights", FlightViewSet)
 router.register("orders", OrderViewSet)
+router.register("holds", SeatHoldViewSet)
 
 urlpatterns = router.urls
 
@@ -0,0 +1,131 @@
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db.models import Q
+
+from airport.models import Flight, Ticket
+from airport.seatmap import SeatMap
+
+UNIQUE_SEAT_MESSAGE = "The fields flight, row, seat must make a unique set."
+SOLD_SEAT_MESSAGE = "Ticket with this Flight, Row and Seat already exists."
+
+
+def load_flights(tickets, cached: bool = True) -> dict:
+    """
+    Flights of the tickets with their airplanes by id in one query.
+    With `cached`, the flights the tickets come with are used as they
+    are, which is only right for flights locked for the validation:
+    others may have been loaded before the last booking.
+    """
+    flights = {}
+    for ticket in tickets if cached else ():
+        if Ticket.flight.is_cached(ticket) and ticket.flight is not None:
+            if Flight.airplane.is_cached(ticket.flight):
+                flights[ticket.flight_id] = ticket.flight
+    missing = {
+        ticket.flight_id for ticket in tickets if ticket.flight_id
+    } - flights.keys()
+    if missing:
+        flights.update(
+            Flight.objects.select_related("airplane")
+            .only("seat_map", "airplane__rows", "airplane__seats_in_row")
+            .order_by()
+            .in_bulk(missing)
+        )
+    return flights
+
+
+def find_sold_seats(seats, exclude_ids=()) -> set:
+    """
+    Returns (flight_id, row, seat) of the seats sold to tickets other
+    than `exclude_ids` in one query
+    """
+    seats_filter = Q()
+    for flight_id, row, seat in seats:
+        seats_filter |= Q(flight_id=flight_id, row=row, seat=seat)
+    return set(
+        Ticket.objects.filter(seats_filter)
+        .exclude(pk__in=exclude_ids)
+        .values_list("flight_id", "row", "seat")
+    )
+
+
+def find_ticket_errors(
+    tickets, check_sold=True, non_field_errors="non_field_errors"
+) -> list:
+    """
+    Validates a batch of tickets in one pass and returns their errors,
+    dicts of messages by field, empty for valid tickets: rows and seats
+    must fit the airplanes of the flights, see `load_flights`, and must
+    not repeat within the batch. With `check_sold`, they must not be
+    sold to other tickets either: the seats marked in the seat maps of
+    the flights, read afresh, but the ones the tickets hold already, are
+    confirmed by one query, as the maps may lag behind the tickets.
+    Without it, the flights the tickets come with are trusted, as the
+    booking locks them.
+    Tickets without a flight, a row or a seat are left to the field
+    validation. Tickets fully validated remember the seat they were
+    validated at when it is valid.
+    """
+    flights = load_flights(tickets, cached=not check_sold)
+    seat_maps = {}
+    seen = set()
+    marked = {}
+    checked = []
+    errors = []
+    for index, ticket in enumerate(tickets):
+        errors.append({})
+        flight = flights.get(ticket.flight_id)
+        if flight is None or ticket.row is None or ticket.seat is None:
+            continue
+        try:
+            Ticket.validate_ticket(
+                ticket.row, ticket.seat, flight.airplane, ValidationError
+            )
+        except ValidationError as error:
+            errors[index] = error.message_dict
+            continue
+
+        key = (flight.id, ticket.row, ticket.seat)
+        if key in seen:
+            errors[index] = {non_field_errors: [UNIQUE_SEAT_MESSAGE]}
+            continue
+        seen.add(key)
+        if check_sold:
+            checked.append(index)
+            if key == getattr(ticket, "_held_seat", None):
+                continue
+            if flight.id not in seat_maps:
+                seat_maps[flight.id] = SeatMap.for_flight(flight)
+            if seat_maps[flight.id].is_taken(ticket.row, ticket.seat):
+                marked[key] = index
+
+    if marked:
+        for key in find_sold_seats(
+            marked, [ticket.pk for ticket in tickets if ticket.pk]
+        ):
+            errors[marked[key]] = {non_field_errors: [SOLD_SEAT_MESSAGE]}
+    for index in checked:
+        if not errors[index]:
+            ticket = tickets[index]
+            ticket._validated_seat = (
+                ticket.flight_id,
+                ticket.row,
+                ticket.seat,
+            )
+    return errors
+
+
+def check_ticket(ticket, skip_validated=False) -> None:
+    """
+    Validates a single ticket like `find_ticket_errors`, raising
+    ValidationError. With `skip_validated`, a ticket still at the seat
+    it has been validated at is not validated again.
+    """
+    if skip_validated and getattr(ticket, "_validated_seat", None) == (
+        ticket.flight_id,
+        ticket.row,
+        ticket.seat,
+    ):
+        return
+    errors = find_ticket_errors([ticket], non_field_errors=NON_FIELD_ERRORS)
+    if errors[0]:
+        raise ValidationError(errors[0])
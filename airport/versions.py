@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+CHANGED_KEY = "{}:changed"
+MODEL_VERSION_KEY = "versions:model:{}"
+
+
+def initial_version() -> int:
+    """
+    A random start of a version, so that anything stored with a version
+    seen before the cache was cleared or the key was evicted does not
+    match the new one by chance
+    """
+    return random.getrandbits(48)
+
+
+def model_version_key(model_name: str) -> str:
+    return MODEL_VERSION_KEY.format(model_name)
+
+
+def get_versions(keys) -> list:
+    """Versions stored under the keys, missing ones are started"""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            if cache.add(key, initial_version(), timeout=None):
+                cache.set(CHANGED_KEY.format(key), time.time(), timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def get_last_modified(keys):
+    """Time of the latest change of the versions, None if unknown"""
+    changes = cache.get_many([CHANGED_KEY.format(key) for key in keys])
+    return max(changes.values(), default=None)
+
+
+def bump(keys) -> None:
+    now = time.time()
+    for key in keys:
+        if not cache.add(key, initial_version(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, initial_version(), timeout=None)
+    cache.set_many(
+        {CHANGED_KEY.format(key): now for key in keys}, timeout=None
+    )
+
+
+def bump_now_and_on_commit(keys) -> None:
+    """
+    Versions are bumped once more after the commit, as anything derived
+    from the data before it could have been stored with the first bump
+    """
+    bump(keys)
+    transaction.on_commit(lambda: bump(keys))
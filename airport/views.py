@@ -1,13 +1,18 @@
-from django.db.models import F, Count
+from datetime import datetime, time, timedelta
+
+from django.db.models import F, Prefetch
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import mixins, status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.decorators import action
 
+from airport.booking import confirm_hold, mark_held_seats
+from airport.connections import duration, find_itineraries
 from airport.models import (
     Country,
     City,
@@ -17,8 +22,35 @@ from airport.models import (
     Crew,
     Route,
     Flight,
+    Ticket,
     Order,
+    SeatHold,
+)
+from airport.conditional import ConditionalGetMixin
+from airport.exports import (
+    FLIGHT_EXPORT_COLUMNS,
+    ORDER_EXPORT_COLUMNS,
+    TICKET_EXPORT_COLUMNS,
+    ExportMixin,
+    export_response,
+    flight_export,
+    order_export,
+    ticket_export,
 )
+from airport.fieldsets import FIELDSET_PARAMETERS, SparseFieldsViewMixin
+from airport.flight_cache import cached_response, get_entry, version_keys
+from airport.pagination import Pagination, KeysetPagination
+from airport.refdata import get_reference_data
+from airport.rows import (
+    ValuesListMixin,
+    annotate_tickets_available,
+    flight_list_rows,
+    flight_list_values,
+    order_list_rows,
+    order_list_values,
+)
+from airport.search import autocomplete, find_airport_ids
+from airport.seatmap import SeatMap
 from airport.serializers import (
     CountrySerializer,
     CitySerializer,
@@ -29,6 +61,8 @@ from airport.serializers import (
     AirplaneListSerializer,
     AirportSerializer,
     AirportListSerializer,
+    AirportAutocompleteSerializer,
+    AirportSuggestionSerializer,
     CrewSerializer,
     RouteSerializer,
     RouteListSerializer,
@@ -36,34 +70,84 @@ from airport.serializers import (
     FlightSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    FlightFilterSerializer,
+    ExportSerializer,
+    OrderExportSerializer,
+    ConnectionSearchSerializer,
+    ItinerarySerializer,
     OrderSerializer,
     OrderListSerializer,
+    AutoOrderSerializer,
+    SeatHoldSerializer,
 )
 
 
-class Pagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = "page_size"
-    max_page_size = 100
+def select_flight_list_related(queryset, requested):
+    """
+    Joins and prefetches the relations of the fields of FlightListSerializer
+    for which `requested(name)` is true
+    """
+    for field in ("source", "destination"):
+        if requested(field):
+            queryset = queryset.select_related(f"route__{field}__city")
+    if requested("airplane"):
+        queryset = queryset.select_related("airplane")
+    if requested("crew"):
+        queryset = queryset.prefetch_related("crew")
+    return queryset
+
+
+class ReferenceDataListMixin:
+    """Lists the objects from the in-memory reference data"""
+
+    reference_data = None
+
+    def get_reference_data(self):
+        """The same snapshot for the whole request"""
+        if not hasattr(self, "reference_snapshot"):
+            self.reference_snapshot = get_reference_data()
+        return self.reference_snapshot
+
+    def get_version_tokens(self) -> list:
+        """The list is as current as the reference data of the worker"""
+        tokens = super().get_version_tokens()
+        if self.action == "list":
+            tokens.append(self.get_reference_data().version)
+        return tokens
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(
+            getattr(self.get_reference_data(), self.reference_data)
+        )
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class CountryViewSet(
+    ReferenceDataListMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = Country.objects.all()
+    reference_data = "countries"
     serializer_class = CountrySerializer
+    version_models = ("country",)
     pagination_class = Pagination
 
 
 class CityViewSet(
+    ReferenceDataListMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = City.objects.select_related("country")
+    reference_data = "cities"
     serializer_class = CitySerializer
+    version_models = ("city", "country")
     pagination_class = Pagination
 
     def get_serializer_class(self):
@@ -73,23 +157,29 @@ class CityViewSet(
 
 
 class AirplaneTypeViewSet(
+    ReferenceDataListMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet,
 ):
     queryset = AirplaneType.objects.all()
+    reference_data = "airplane_types"
     serializer_class = AirplaneTypeSerializer
+    version_models = ("airplanetype",)
     pagination_class = Pagination
 
 
 class AirplaneViewSet(
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Airplane.objects.select_related("airplane_type")
+    queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
+    version_models = ("airplane", "airplanetype")
     pagination_class = Pagination
 
     def get_serializer_class(self):
@@ -141,12 +231,16 @@ class AirplaneViewSet(
 
 
 class AirportViewSet(
+    ReferenceDataListMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
 ):
     queryset = Airport.objects.select_related("city__country")
+    reference_data = "airports"
     serializer_class = AirportSerializer
+    version_models = ("airport", "city", "country")
     pagination_class = Pagination
 
     def get_serializer_class(self):
@@ -154,28 +248,47 @@ class AirportViewSet(
             self.serializer_class = AirportListSerializer
         return self.serializer_class
 
+    @extend_schema(
+        parameters=[AirportAutocompleteSerializer],
+        responses={200: AirportSuggestionSerializer(many=True)},
+    )
+    @action(methods=["GET"], detail=False, url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        Suggest airports which name or city name has a word
+        starting with the term (ex. ?q=new yo)
+        """
+        params = AirportAutocompleteSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(
+            autocomplete(
+                params.validated_data["q"], params.validated_data["limit"]
+            )
+        )
+
 
 class CrewViewSet(
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
 ):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    version_models = ("crew",)
     pagination_class = Pagination
 
 
 class RouteViewSet(
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Route.objects.select_related(
-        "source__city",
-        "destination__city"
-    )
+    queryset = Route.objects.all()
     serializer_class = RouteSerializer
+    version_models = ("route", "airport", "city", "flight", "crew")
     pagination_class = Pagination
 
     def get_queryset(self):
@@ -185,14 +298,16 @@ class RouteViewSet(
 
         queryset = self.queryset
         if self.action == "retrieve":
-            queryset = queryset.prefetch_related("flights", "flights__crew")
+            queryset = queryset.select_related(
+                "source__city", "destination__city"
+            ).prefetch_related("flights", "flights__crew")
 
         if source:
-            queryset = queryset.filter(source__city__name__icontains=source)
+            queryset = queryset.filter(source_id__in=find_airport_ids(source))
 
         if destination:
             queryset = queryset.filter(
-                destination__city__name__icontains=destination
+                destination_id__in=find_airport_ids(destination)
             )
 
         return queryset.distinct()
@@ -225,42 +340,108 @@ class RouteViewSet(
 
 
 class FlightViewSet(
+    ValuesListMixin,
+    SparseFieldsViewMixin,
+    ExportMixin,
+    ConditionalGetMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     GenericViewSet,
 ):
-    queryset = Flight.objects.select_related(
-        "route__source__city",
-        "route__destination__city",
-        "airplane"
-    ).prefetch_related("crew").annotate(
-        tickets_available=(
-            F("airplane__rows") * F("airplane__seats_in_row")
-            - Count("tickets")
-        )
-    )
+    queryset = Flight.objects.all()
     serializer_class = FlightSerializer
-    pagination_class = Pagination
+    version_models = ("flight", "route")
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-departure_time", "-id")
+    list_values = staticmethod(flight_list_values)
+    list_rows = staticmethod(flight_list_rows)
+    export_actions = ("export", "manifest")
+
+    seat_map_encodings = {
+        "base64": SeatMap.to_base64,
+        "rle": SeatMap.to_rle,
+        "grid": SeatMap.to_grid,
+    }
 
     def get_queryset(self):
         """Retrieve the flights with filters"""
+        if self.action == "seats":
+            return Flight.objects.select_related("airplane").only(
+                "seat_map", "airplane__rows", "airplane__seats_in_row"
+            )
+        if self.action == "manifest":
+            return Flight.objects.only("id")
+
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
 
         queryset = self.queryset
+        if self.action != "export":
+            queryset = self._select_related(queryset)
 
         if source:
             queryset = queryset.filter(
-                route__source__city__name__icontains=source
+                route__source_id__in=find_airport_ids(source)
             )
 
         if destination:
             queryset = queryset.filter(
-                route__destination__city__name__icontains=destination
+                route__destination_id__in=find_airport_ids(destination)
             )
 
-        return queryset.distinct()
+        return self._filter_by_departure(queryset)
+
+    def _select_related(self, queryset):
+        """Joins, prefetches and annotates for the requested fields only"""
+        requested = self.field_requested
+        if self.action != "retrieve":
+            queryset = select_flight_list_related(queryset, requested)
+            if requested("tickets_available"):
+                queryset = annotate_tickets_available(queryset)
+            return queryset
+
+        if self.field_expanded("route"):
+            queryset = queryset.select_related("route")
+        if (
+            requested("airplane")
+            or requested("airplane_image")
+            or requested("airplane_image_variants")
+        ):
+            queryset = queryset.select_related("airplane")
+        if requested("crew"):
+            queryset = queryset.prefetch_related("crew")
+        return queryset
+
+    def _filter_by_departure(self, queryset):
+        """
+        Filters by ranges of the departure time only,
+        so that the departure time indexes can be used
+        """
+        filters = FlightFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        params = filters.validated_data
+
+        if "departure_after" in params:
+            queryset = queryset.filter(
+                departure_time__gte=params["departure_after"]
+            )
+
+        if "departure_before" in params:
+            queryset = queryset.filter(
+                departure_time__lt=params["departure_before"]
+            )
+
+        if "date" in params:
+            start = timezone.make_aware(
+                datetime.combine(params["date"], time.min)
+            )
+            queryset = queryset.filter(
+                departure_time__gte=start,
+                departure_time__lt=start + timedelta(days=1),
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -282,35 +463,349 @@ class FlightViewSet(
                 description="Filter by destination "
                             "name (ex. ?destination=New York)",
             ),
+            FlightFilterSerializer,
+            *FIELDSET_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         """Get list of flights"""
-        return super().list(request, *args, **kwargs)
+        return self._cached_response(
+            lambda: super(FlightViewSet, self).list(request, *args, **kwargs),
+            lambda data: [flight["id"] for flight in data["results"]],
+        )
+
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    def retrieve(self, request, *args, **kwargs):
+        """Get the flight"""
+        return self._cached_response(
+            lambda: super(FlightViewSet, self).retrieve(
+                request, *args, **kwargs
+            ),
+            lambda data: [data["id"]],
+        )
+
+    def get_version_keys(self):
+        if self.action == "seats":
+            return version_keys([self.kwargs["pk"]])
+        return super().get_version_keys()
+
+    def get_refresh_seconds(self):
+        if self.action == "seats":
+            # held seats are freed on expiry without a change
+            return 60
+        return super().get_refresh_seconds()
+
+    def get_validators(self):
+        """
+        Lists and flights are validated by their cached responses,
+        which are kept up to date with versions of every flight
+        """
+        if self.action in ("list", "retrieve"):
+            self.cache_entry = get_entry(self.request, self.action)
+            return self.cache_entry and self._entry_validators(
+                self.cache_entry
+            )
+        return super().get_validators()
+
+    def _entry_validators(self, entry):
+        # a response rendered again after the entry timed out may differ
+        # by expired holds, so the render time is a part of the ETag
+        return (
+            self.make_etag([entry["versions"], entry["rendered_at"]]),
+            entry["rendered_at"],
+        )
+
+    def _cached_response(self, render, flight_ids):
+        response = cached_response(
+            self.request, self.action, self.cache_entry, render, flight_ids
+        )
+        entry = getattr(response, "flight_cache_entry", None)
+        if entry is not None:
+            self.conditional_validators = self._entry_validators(entry)
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "encoding",
+                type=OpenApiTypes.STR,
+                enum=["base64", "rle", "grid"],
+                description="Encoding of the seat map: base64 bitset "
+                            "(default), run lengths of free and taken "
+                            "seats or rows of 0/1 (ex. ?encoding=grid)",
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk: int = None):
+        """
+        Get occupancy of the flight seats,
+        sold and held seats are set bits
+        """
+        encoding = request.query_params.get("encoding", "base64")
+        if encoding not in self.seat_map_encodings:
+            raise ValidationError(
+                {"encoding": f"Must be one of: "
+                             f"{', '.join(self.seat_map_encodings)}"}
+            )
+        flight = self.get_object()
+        seat_map = SeatMap.for_flight(flight)
+        mark_held_seats(flight.id, seat_map)
+        return Response(
+            {
+                "flight": flight.id,
+                "rows": seat_map.rows,
+                "seats_in_row": seat_map.seats_in_row,
+                "encoding": encoding,
+                "seats": self.seat_map_encodings[encoding](seat_map),
+            }
+        )
+
+    @extend_schema(
+        parameters=[ConnectionSearchSerializer],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    @action(methods=["GET"], detail=False, url_path="connections")
+    def connections(self, request):
+        """
+        Find the earliest arriving and the shortest itineraries between
+        two airports with up to 2 connections
+        """
+        search = ConnectionSearchSerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        after = timezone.make_aware(datetime.combine(params["date"], time.min))
+        itineraries = find_itineraries(
+            params["source"],
+            params["destination"],
+            after,
+            after + timedelta(days=1),
+            params["max_connections"],
+            timedelta(minutes=params["min_layover"]),
+        )
+        flights = self._select_related(self.queryset).in_bulk(
+            {
+                leg.flight_id
+                for itinerary in itineraries.values()
+                if itinerary
+                for leg in itinerary
+            }
+        )
+        return Response(
+            {
+                name: itinerary and self._itinerary_data(itinerary, flights)
+                for name, itinerary in itineraries.items()
+            }
+        )
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "source",
+                type=OpenApiTypes.STR,
+                description="Filter by source name (ex. ?source=Kyiv)",
+            ),
+            OpenApiParameter(
+                "destination",
+                type=OpenApiTypes.STR,
+                description="Filter by destination "
+                            "name (ex. ?destination=New York)",
+            ),
+            FlightFilterSerializer,
+            ExportSerializer,
+        ],
+        responses={200: OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        url_path="export",
+    )
+    def export(self, request):
+        """
+        Stream all the flights filtered as the list
+        as NDJSON or CSV (ex. ?export_format=csv)
+        """
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return export_response(
+            flight_export(self.get_queryset()),
+            FLIGHT_EXPORT_COLUMNS,
+            params.validated_data["export_format"],
+            "flights",
+        )
+
+    @extend_schema(
+        parameters=[ExportSerializer], responses={200: OpenApiTypes.STR}
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        permission_classes=[IsAdminUser],
+        url_path="manifest",
+    )
+    def manifest(self, request, pk: int = None):
+        """Stream every ticket on the flight as NDJSON or CSV"""
+        params = ExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        flight = self.get_object()
+        return export_response(
+            ticket_export(flight.id),
+            TICKET_EXPORT_COLUMNS,
+            params.validated_data["export_format"],
+            f"flight-{flight.id}-manifest",
+        )
+
+    @staticmethod
+    def _itinerary_data(itinerary, flights):
+        return ItinerarySerializer(
+            {
+                "departure_time": itinerary[0].departure_time,
+                "arrival_time": itinerary[-1].arrival_time,
+                "duration": duration(itinerary) // timedelta(minutes=1),
+                "connections": len(itinerary) - 1,
+                "flights": [flights[leg.flight_id] for leg in itinerary],
+            }
+        ).data
 
 
 class OrderViewSet(
+    ValuesListMixin,
+    SparseFieldsViewMixin,
+    ExportMixin,
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
 ):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    version_models = (
+        "order",
+        "ticket",
+        "flight",
+        "route",
+        "airplane",
+        "crew",
+        "airport",
+        "city",
+    )
+    user_specific = True
     permission_classes = (IsAuthenticated,)
-    pagination_class = Pagination
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-created_at", "-id")
+    list_values = staticmethod(order_list_values)
+    list_rows = staticmethod(order_list_rows)
+    export_actions = ("export",)
 
     def get_queryset(self):
-        queryset = self.queryset.prefetch_related(
-            "tickets__flight__route",
-            "tickets__flight__airplane",
-            "tickets__flight__crew",
-        )
-        return queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        if not self.field_requested("tickets"):
+            return queryset
+
+        prefetches = [Prefetch("tickets", queryset=Ticket.objects.all())]
+        if self.field_expanded("tickets") and self.field_expanded(
+            "tickets.flight"
+        ):
+            prefetches.append(
+                Prefetch(
+                    "tickets__flight",
+                    queryset=select_flight_list_related(
+                        Flight.objects.all(),
+                        lambda name: self.field_requested(
+                            f"tickets.flight.{name}"
+                        ),
+                    ),
+                )
+            )
+        return queryset.prefetch_related(*prefetches)
+
+    @extend_schema(parameters=FIELDSET_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        """Get list of orders"""
+        return super().list(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == "list":
             self.serializer_class = OrderListSerializer
+        elif self.action == "auto":
+            self.serializer_class = AutoOrderSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(responses={201: OrderSerializer})
+    @action(methods=["POST"], detail=False, url_path="auto")
+    def auto(self, request):
+        """Order tickets for passengers on seats picked by the server"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        order = serializer.save(user=request.user)
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
+
+    @extend_schema(
+        parameters=[OrderExportSerializer], responses={200: OpenApiTypes.STR}
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=[IsAdminUser],
+        url_path="export",
+    )
+    def export(self, request):
+        """
+        Stream the orders of all the users created in the range,
+        one row per ticket, as NDJSON or CSV
+        """
+        params = OrderExportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return export_response(
+            order_export(
+                params.validated_data.get("created_after"),
+                params.validated_data.get("created_before"),
+            ),
+            ORDER_EXPORT_COLUMNS,
+            params.validated_data["export_format"],
+            "orders",
+        )
+
+
+class SeatHoldViewSet(
+    ConditionalGetMixin,
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    queryset = SeatHold.objects.select_related("flight")
+    serializer_class = SeatHoldSerializer
+    version_models = ("seathold", "flight", "route", "airport", "city")
+    user_specific = True
+    permission_classes = (IsAuthenticated,)
+    pagination_class = Pagination
+    # holds expire without a change
+    refresh_seconds = 60
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user, expires_at__gt=timezone.now()
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(request=None, responses={201: OrderSerializer})
+    @action(methods=["POST"], detail=True, url_path="confirm")
+    def confirm(self, request, pk: int = None):
+        """Book the held seats into an order"""
+        order = confirm_hold(self.get_object())
+        return Response(
+            OrderSerializer(order).data, status=status.HTTP_201_CREATED
+        )
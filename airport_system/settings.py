@@ -51,6 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "airport.profiling.ProfilingMiddleware",
+    "airport.metrics.MetricsMiddleware",
+    "airport.query_detector.QueryDetectorMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -174,6 +177,87 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Bookings wait for the flight row lock up to BOOKING_LOCK_TIMEOUT_MS
+# and are retried BOOKING_MAX_ATTEMPTS times
+BOOKING_LOCK_TIMEOUT_MS = 2000
+BOOKING_MAX_ATTEMPTS = 3
+BOOKING_RETRY_DELAY_MS = 50
+
+# Seat holds last SEAT_HOLD_SECONDS unless the client asks for less
+# or more, up to SEAT_HOLD_MAX_SECONDS
+SEAT_HOLD_SECONDS = 300
+SEAT_HOLD_MAX_SECONDS = 900
+
+# Connection search: layovers between flights of an itinerary
+# and how long flight changes are kept for the graphs of other workers
+CONNECTION_MIN_LAYOVER_MINUTES = 60
+CONNECTION_MAX_LAYOVER_MINUTES = 24 * 60
+CONNECTION_CHANGES_TIMEOUT = 24 * 60 * 60
+
+# The cache is shared by all the workers when REDIS_URL is set,
+# otherwise every process keeps its own one in memory
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
+# Every worker keeps countries, cities, airplane types and airports
+# in memory and checks their version once REFERENCE_DATA_MAX_AGE_SECONDS
+REFERENCE_DATA_MAX_AGE_SECONDS = 2
+
+# Cached flight responses are dropped as soon as their flights change,
+# FLIGHT_CACHE_TIMEOUT bounds how long held seats may take to expire
+FLIGHT_CACHE_TIMEOUT = 60
+
+# Requests are profiled into the Server-Timing header when
+# REQUEST_PROFILING is on or their REQUEST_PROFILING_HEADER header is
+# REQUEST_PROFILING_SECRET, REQUEST_PROFILING_LOG_RATE of the profiles
+# are logged
+REQUEST_PROFILING = os.getenv("REQUEST_PROFILING") == "1"
+REQUEST_PROFILING_HEADER = os.getenv("REQUEST_PROFILING_HEADER")
+REQUEST_PROFILING_SECRET = os.getenv("REQUEST_PROFILING_SECRET")
+REQUEST_PROFILING_LOG_RATE = float(
+    os.getenv("REQUEST_PROFILING_LOG_RATE", "0")
+)
+
+# Requests repeating a query of the same shape NPLUSONE_THRESHOLD times
+# have N+1 queries: "warn" logs them, "strict" raises, as in the tests
+NPLUSONE_DETECTION = os.getenv("NPLUSONE_DETECTION", "off")
+NPLUSONE_THRESHOLD = 3
+
+# The TEST_RUNNER runs the tests with TEST_SETTINGS overridden
+TEST_RUNNER = "airport_system.test_runner.TestRunner"
+TEST_SETTINGS = {"NPLUSONE_DETECTION": "strict", "AIRPLANE_IMAGE_THREADS": 0}
+
+# Exports fetch and write EXPORT_CHUNK_SIZE rows at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# Uploaded airplane images get WebP and JPEG variants fitted into the
+# AIRPLANE_IMAGE_VARIANTS boxes, made by AIRPLANE_IMAGE_THREADS threads
+# of every web process after the upload, or with 0 threads only by
+# process_airplane_images. Larger images than AIRPLANE_IMAGE_MAX_PIXELS
+# are rejected before they are decoded.
+AIRPLANE_IMAGE_VARIANTS = {"thumbnail": (320, 240), "medium": (1024, 768)}
+AIRPLANE_IMAGE_THREADS = int(os.getenv("AIRPLANE_IMAGE_THREADS", "2"))
+AIRPLANE_IMAGE_MAX_PIXELS = 50_000_000
+# Images left processing longer than AIRPLANE_IMAGE_CLAIM_TIMEOUT seconds
+# by a stopped worker are processed again
+AIRPLANE_IMAGE_CLAIM_TIMEOUT = 600
+
+# /metrics asks for "Authorization: Bearer <METRICS_TOKEN>" when it is set,
+# worker processes share their metrics through PROMETHEUS_MULTIPROC_DIR
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=10),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=3),
@@ -1,15 +1,29 @@
+import io
 import tempfile
 import os
+from datetime import timedelta
 
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from airport.models import Country, City, AirplaneType, Airplane, Airport, Route, Flight
+from airport.images import delete_variants
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    ImageStatus,
+)
 from airport.serializers import AirplaneListSerializer, AirplaneSerializer
 
 
@@ -64,23 +78,22 @@ def sample_country(**params):
 
 
 def sample_city(**params):
-    country = sample_country()
-
-    defaults = {"name": "Kyiv", "country": country}
+    defaults = {"name": "Kyiv"}
     defaults.update(params)
+    if "country" not in defaults:
+        defaults["country"] = sample_country()
 
     return City.objects.create(**defaults)
 
 
 def sample_airport(**params):
-    city = sample_country()
-
     defaults = {
         "name": "Kyiv international airport",
         "closest_big_city": "Kyiv",
-        "city": city,
     }
     defaults.update(params)
+    if "city" not in defaults:
+        defaults["city"] = sample_city()
 
     return Airport.objects.create(**defaults)
 
@@ -104,16 +117,15 @@ def sample_route(**params):
 
 
 def sample_flight(**params):
-    airplane = sample_airplane()
-    route = sample_route()
-
     defaults = {
-        "departure_time": "2024-10-02 14:00:00",
-        "arrival_time": "2024-10-02 23:00:00",
-        "airplane": airplane,
-        "route": route,
+        "departure_time": "2024-10-02 14:00:00+00:00",
+        "arrival_time": "2024-10-02 23:00:00+00:00",
     }
     defaults.update(params)
+    if "airplane" not in defaults:
+        defaults["airplane"] = sample_airplane()
+    if "route" not in defaults:
+        defaults["route"] = sample_route()
 
     return Flight.objects.create(**defaults)
 
@@ -268,8 +280,111 @@ class AirplaneImageUploadTests(TestCase):
         )
 
     def tearDown(self):
+        self.airplane.refresh_from_db()
+        delete_variants(
+            self.airplane.image.storage, self.airplane.image_variants
+        )
         self.airplane.image.delete()
 
+    def upload_photo(self, size=(1600, 1200)):
+        """Uploads a JPEG turned by its EXIF orientation, with a GPS tag"""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {2: (50.0, 27.0, 0.0)}
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            Image.new("RGB", size, "red").save(ntf, format="JPEG", exif=exif)
+            ntf.seek(0)
+            return self.client.post(
+                image_upload_url(self.airplane.id),
+                {"image": ntf},
+                format="multipart",
+            )
+
+    def test_upload_queues_image_variants(self):
+        res = self.upload_photo()
+
+        self.assertEqual(res.data["image_status"], ImageStatus.PENDING)
+        res = self.client.get(AIRPLANE_URL)
+        self.assertIsNone(res.data["results"][0]["image_variants"])
+
+        call_command("process_airplane_images", stdout=io.StringIO())
+
+        res = self.client.get(AIRPLANE_URL)
+        variants = res.data["results"][0]["image_variants"]
+        self.assertEqual(set(variants), {"thumbnail", "medium"})
+        self.assertEqual(set(variants["thumbnail"]), {"webp", "jpeg"})
+        self.assertTrue(variants["thumbnail"]["webp"].startswith("http"))
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_status, ImageStatus.READY)
+        paths = self.airplane.image_variants
+        storage = self.airplane.image.storage
+        with storage.open(paths["thumbnail"]["webp"]) as file:
+            with Image.open(file) as thumbnail:
+                self.assertEqual(thumbnail.format, "WEBP")
+                self.assertEqual(thumbnail.size, (180, 240))
+                self.assertFalse(thumbnail.getexif())
+        with storage.open(paths["medium"]["jpeg"]) as file:
+            with Image.open(file) as medium:
+                self.assertEqual(medium.size, (576, 768))
+                self.assertFalse(medium.getexif())
+
+    def test_image_variants_are_in_flight_detail(self):
+        self.upload_photo()
+        call_command("process_airplane_images", stdout=io.StringIO())
+
+        res = self.client.get(detail_flight_url(self.flight.id))
+
+        self.assertIn("medium", res.data["airplane_image_variants"])
+
+    @override_settings(AIRPLANE_IMAGE_MAX_PIXELS=1000)
+    def test_too_large_image_fails(self):
+        self.upload_photo()
+
+        with self.assertLogs("airport.images", "WARNING"):
+            call_command("process_airplane_images", stdout=io.StringIO())
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_status, ImageStatus.FAILED)
+        self.assertEqual(self.airplane.image_variants, {})
+
+    def test_new_upload_replaces_variants(self):
+        self.upload_photo()
+        call_command("process_airplane_images", stdout=io.StringIO())
+        self.airplane.refresh_from_db()
+        old_path = self.airplane.image_variants["medium"]["webp"]
+        old_image = self.airplane.image.name
+
+        self.upload_photo(size=(800, 600))
+        call_command("process_airplane_images", stdout=io.StringIO())
+
+        self.airplane.image.storage.delete(old_image)
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_status, ImageStatus.READY)
+        self.assertFalse(self.airplane.image.storage.exists(old_path))
+
+    def test_stale_claims_are_processed_again(self):
+        self.upload_photo()
+        claimed_at = timezone.now() - timedelta(minutes=5)
+        Airplane.objects.filter(pk=self.airplane.pk).update(
+            image_status=ImageStatus.PROCESSING, image_claimed_at=claimed_at
+        )
+
+        with override_settings(AIRPLANE_IMAGE_CLAIM_TIMEOUT=600):
+            call_command("process_airplane_images", stdout=io.StringIO())
+            call_command(
+                "process_airplane_images", retry=True, stdout=io.StringIO()
+            )
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_status, ImageStatus.PROCESSING)
+
+        with override_settings(AIRPLANE_IMAGE_CLAIM_TIMEOUT=60):
+            call_command("process_airplane_images", stdout=io.StringIO())
+
+        self.airplane.refresh_from_db()
+        self.assertEqual(self.airplane.image_status, ImageStatus.READY)
+        self.assertGreater(self.airplane.image_claimed_at, claimed_at)
+
     def test_upload_image_to_airplane(self):
         """Test uploading an image to airplane"""
         url = image_upload_url(self.airplane.id)
@@ -0,0 +1,217 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+)
+from airport.search import AirportIndex, normalize
+
+AUTOCOMPLETE_URL = reverse("airport:airport-autocomplete")
+FLIGHT_URL = reverse("airport:flight-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+def sample_airport(id, name, city, country="USA"):
+    return {"id": id, "name": name, "city": city, "country": country}
+
+
+class AirportIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = AirportIndex(
+            [
+                sample_airport(1, "John F. Kennedy", "New York"),
+                sample_airport(2, "LaGuardia", "New York"),
+                sample_airport(3, "Newark Liberty", "Newark"),
+                sample_airport(4, "Boryspil", "Kyiv", "Ukraine"),
+                sample_airport(5, "Zürich", "Zürich", "Switzerland"),
+            ]
+        )
+
+    def ids(self, term, limit=10):
+        return [airport["id"] for airport in self.index.search(term, limit)]
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Zürich   Kloten "), "zurich kloten")
+
+    def test_prefix_of_any_word(self):
+        self.assertEqual(self.ids("york"), [1, 2])
+        self.assertEqual(self.ids("new yo"), [1, 2])
+        self.assertEqual(self.ids("KENN"), [1])
+        self.assertEqual(self.ids("zur"), [5])
+
+    def test_exact_match_comes_first(self):
+        self.assertEqual(self.ids("newark"), [3])
+        self.assertEqual(self.ids("new"), [1, 2, 3])
+
+    def test_limit_and_empty_term(self):
+        self.assertEqual(self.ids("new", limit=1), [1])
+        self.assertEqual(self.ids(" "), [])
+        self.assertEqual(self.ids("ork"), [])
+
+    def test_world_sized_index(self):
+        index = AirportIndex(
+            sample_airport(number, f"Airport {number}", f"City {number}")
+            for number in range(60000)
+        )
+        started = time.perf_counter()
+        for number in range(1000):
+            results = index.search(f"city {number}", 10)
+        elapsed = (time.perf_counter() - started) / 1000
+        self.assertEqual(results[0]["id"], 999)
+        self.assertLess(elapsed, 0.01)
+
+
+class AirportAutocompleteApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            country = Country.objects.create(name="Ukraine")
+            self.kyiv = City.objects.create(name="Kyiv", country=country)
+            self.boryspil = Airport.objects.create(
+                name="Boryspil", city=self.kyiv, closest_big_city="Kyiv"
+            )
+
+    def test_autocomplete(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            [
+                {
+                    "id": self.boryspil.id,
+                    "name": "Boryspil",
+                    "city": "Kyiv",
+                    "country": "Ukraine",
+                }
+            ],
+        )
+
+    def test_autocomplete_makes_no_queries_once_built(self):
+        self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(AUTOCOMPLETE_URL, {"q": "bor"})
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in context.captured_queries
+                if "airport_airport" in query["sql"]
+            ],
+            [],
+        )
+
+    def test_index_is_rebuilt_on_changes(self):
+        self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Airport.objects.create(
+                name="Zhuliany", city=self.kyiv, closest_big_city="Kyiv"
+            )
+        res = self.client.get(AUTOCOMPLETE_URL, {"q": "kyi"})
+
+        self.assertEqual(
+            [airport["name"] for airport in res.data],
+            ["Boryspil", "Zhuliany"],
+        )
+
+    def test_term_is_required(self):
+        res = self.client.get(AUTOCOMPLETE_URL, {"limit": 100})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", res.data)
+        self.assertIn("limit", res.data)
+
+
+class CityFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        airports = [
+            Airport.objects.create(
+                name=f"{name} airport",
+                city=City.objects.create(name=name, country=country),
+                closest_big_city=name,
+            )
+            for name in ("Kyiv", "Lviv", "Odesa")
+        ]
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=20, seats_in_row=4
+        )
+        self.routes = [
+            Route.objects.create(
+                source=source, destination=destination, distance=500
+            )
+            for source, destination in zip(airports, airports[1:])
+        ]
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=timezone.now(),
+                arrival_time=timezone.now(),
+            )
+            for route in self.routes
+        ]
+
+    def test_flights_are_filtered_by_airport_ids(self):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(FLIGHT_URL, {"source": "viv"})
+
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            [self.flights[1].id],
+        )
+        flight_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "airport_flight"."id"')
+        ]
+        self.assertTrue(flight_queries)
+        for sql in flight_queries:
+            self.assertNotIn("LIKE", sql)
+
+    def test_unknown_city_finds_nothing(self):
+        res = self.client.get(FLIGHT_URL, {"destination": "Paris"})
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_routes_are_filtered_by_airport_ids(self):
+        res = self.client.get(
+            ROUTE_URL, {"source": "kyiv", "destination": "lviv"}
+        )
+
+        self.assertEqual(
+            [route["id"] for route in res.data["results"]],
+            [self.routes[0].id],
+        )
@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, skipUnlessDBFeature
+
+from airport.models import Ticket
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBookingTests(TransactionTestCase):
+    def test_no_double_booking(self):
+        out = StringIO()
+
+        call_command(
+            "stress_booking", writers=[1, 8, 32], orders=160, stdout=out
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertFalse(Ticket.objects.exists())
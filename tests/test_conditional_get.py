@@ -0,0 +1,198 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    SeatHold,
+)
+
+COUNTRY_URL = reverse("airport:country-list")
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+HOLD_URL = reverse("airport:seathold-list")
+LIST_URLS = [
+    reverse(f"airport:{name}-list")
+    for name in (
+        "country",
+        "city",
+        "airplanetype",
+        "airplane",
+        "airport",
+        "crew",
+        "route",
+        "flight",
+        "order",
+        "seathold",
+    )
+]
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.country = Country.objects.create(name="Ukraine")
+        city = City.objects.create(name="Kyiv", country=self.country)
+        source = Airport.objects.create(
+            name="Boryspil", city=city, closest_big_city="Kyiv"
+        )
+        destination = Airport.objects.create(
+            name="Zhuliany", city=city, closest_big_city="Kyiv"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=30
+        )
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=3, seats_in_row=4
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time="2024-10-02 14:00:00+00:00",
+            arrival_time="2024-10-02 23:00:00+00:00",
+        )
+
+    def revalidate(self, url, res, queries=0):
+        with self.assertNumQueries(queries):
+            return self.client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+
+    def test_all_read_endpoints_have_validators(self):
+        for url in LIST_URLS:
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK, url)
+            self.assertTrue(res["ETag"].startswith('W/"'), url)
+            self.assertIn("Last-Modified", res, url)
+
+    def test_reference_list_revalidation_makes_no_queries(self):
+        res = self.client.get(COUNTRY_URL)
+
+        not_modified = self.revalidate(COUNTRY_URL, res)
+
+        self.assertEqual(
+            not_modified.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+        self.assertEqual(not_modified["ETag"], res["ETag"])
+        self.assertFalse(not_modified.content)
+
+    def test_change_modifies_etag(self):
+        res = self.client.get(COUNTRY_URL)
+
+        Country.objects.create(name="Poland")
+
+        modified = self.client.get(COUNTRY_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(modified["ETag"], res["ETag"])
+        self.assertEqual(len(modified.data["results"]), 2)
+
+    def test_if_modified_since(self):
+        res = self.client.get(COUNTRY_URL)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                COUNTRY_URL, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"]
+            )
+
+        self.assertEqual(
+            not_modified.status_code, status.HTTP_304_NOT_MODIFIED
+        )
+
+    def test_flight_revalidation_makes_no_queries(self):
+        for url in (
+            FLIGHT_URL,
+            reverse("airport:flight-detail", args=[self.flight.id]),
+            reverse("airport:flight-seats", args=[self.flight.id]),
+        ):
+            res = self.client.get(url)
+
+            not_modified = self.revalidate(url, res)
+
+            self.assertEqual(
+                not_modified.status_code, status.HTTP_304_NOT_MODIFIED, url
+            )
+
+    def test_order_modifies_flight_etag(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        modified = self.client.get(FLIGHT_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(modified.status_code, status.HTTP_200_OK)
+        self.assertEqual(modified.data["results"][0]["tickets_available"], 11)
+
+    def test_user_specific_etag(self):
+        res = self.client.get(ORDER_URL)
+        other = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unauthenticated_request_is_not_revalidated(self):
+        res = self.client.get(COUNTRY_URL)
+        self.client.force_authenticate(None)
+
+        res = self.client.get(COUNTRY_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_hold_modifies_responses_since(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.user,
+            seats=[{"row": 1, "seat": 1}],
+            seats_count=1,
+            expires_at=timezone.now() + timedelta(seconds=30),
+        )
+        seats_url = reverse("airport:flight-seats", args=[self.flight.id])
+        responses = {
+            url: self.client.get(url, {"encoding": "grid"})
+            for url in (HOLD_URL, seats_url)
+        }
+        # the hold expires without a change
+        SeatHold.objects.update(expires_at=timezone.now())
+
+        with mock.patch("airport.conditional.time") as clock:
+            clock.time.return_value = time.time() + 60
+            modified = {
+                url: self.client.get(
+                    url,
+                    {"encoding": "grid"},
+                    HTTP_IF_MODIFIED_SINCE=res["Last-Modified"],
+                )
+                for url, res in responses.items()
+            }
+
+        self.assertEqual(modified[HOLD_URL].status_code, status.HTTP_200_OK)
+        self.assertEqual(modified[HOLD_URL].data["results"], [])
+        self.assertEqual(modified[seats_url].status_code, status.HTTP_200_OK)
+        self.assertEqual(modified[seats_url].data["seats"][0][0], 0)
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.connections import get_graph
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+)
+
+
+CONNECTIONS_URL = reverse("airport:flight-connections")
+
+
+class ConnectionSearchApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        self.airports = {}
+        for name in ("Kyiv", "Lviv", "Odesa", "Kharkiv"):
+            city = City.objects.create(name=name, country=country)
+            self.airports[name] = Airport.objects.create(
+                name=f"{name} airport", city=city, closest_big_city=name
+            )
+        self.airplane = Airplane.objects.create(
+            name="Embraer 190", rows=20, seats_in_row=4
+        )
+        self.day = (timezone.now() + timedelta(days=2)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def flight(self, source, destination, departure_hour, hours):
+        route, _ = Route.objects.get_or_create(
+            source=self.airports[source],
+            destination=self.airports[destination],
+            defaults={"distance": 500},
+        )
+        departure_time = self.day + timedelta(hours=departure_hour)
+        return Flight.objects.create(
+            route=route,
+            airplane=self.airplane,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=hours),
+        )
+
+    def search(self, **params):
+        defaults = {
+            "source": self.airports["Kyiv"].id,
+            "destination": self.airports["Kharkiv"].id,
+            "date": self.day.date().isoformat(),
+        }
+        defaults.update(params)
+        return self.client.get(CONNECTIONS_URL, defaults)
+
+    @staticmethod
+    def flight_ids(itinerary):
+        return [flight["id"] for flight in itinerary["flights"]]
+
+    def test_earliest_arrival_and_shortest_duration(self):
+        early_first = self.flight("Kyiv", "Lviv", 6, 1)
+        early_second = self.flight("Lviv", "Kharkiv", 8, 3)
+        self.flight("Kyiv", "Odesa", 6, 1)
+        late_direct = self.flight("Kyiv", "Kharkiv", 10, 1)
+
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.flight_ids(res.data["earliest_arrival"]),
+            [early_first.id, early_second.id],
+        )
+        self.assertEqual(res.data["earliest_arrival"]["connections"], 1)
+        self.assertEqual(res.data["earliest_arrival"]["duration"], 300)
+        self.assertEqual(
+            self.flight_ids(res.data["shortest_duration"]), [late_direct.id]
+        )
+
+    def test_min_layover(self):
+        self.flight("Kyiv", "Lviv", 6, 1)
+        self.flight("Lviv", "Kharkiv", 7, 1)
+        later = self.flight("Lviv", "Kharkiv", 9, 1)
+
+        res = self.search(min_layover=30)
+
+        self.assertEqual(
+            self.flight_ids(res.data["earliest_arrival"])[-1], later.id
+        )
+
+    def test_max_connections(self):
+        self.flight("Kyiv", "Lviv", 6, 1)
+        self.flight("Lviv", "Odesa", 8, 1)
+        self.flight("Odesa", "Kharkiv", 10, 1)
+
+        self.assertEqual(
+            len(self.search().data["earliest_arrival"]["flights"]), 3
+        )
+        self.assertIsNone(
+            self.search(max_connections=1).data["earliest_arrival"]
+        )
+
+    def test_graph_is_updated_incrementally(self):
+        self.flight("Kyiv", "Lviv", 6, 1)
+        self.assertIsNone(self.search().data["earliest_arrival"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.flight("Lviv", "Kharkiv", 8, 1)
+        with CaptureQueriesContext(connection) as context:
+            res = self.search()
+
+        self.assertEqual(
+            self.flight_ids(res.data["earliest_arrival"])[-1], second.id
+        )
+        graph_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith(
+                'SELECT "airport_flight"."id", "airport_route"."source_id"'
+            )
+        ]
+        self.assertEqual(len(graph_queries), 1)
+        self.assertIn(f"IN ({second.id})", graph_queries[0])
+
+    def test_updates_leave_searched_graph_unchanged(self):
+        first = self.flight("Kyiv", "Lviv", 6, 1)
+        graph = get_graph()
+        departures = list(graph.departures[self.airports["Kyiv"].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self.flight("Kyiv", "Odesa", 7, 1)
+        updated = get_graph()
+
+        self.assertIsNot(updated, graph)
+        self.assertEqual(set(graph.legs), {first.id})
+        self.assertEqual(
+            graph.departures[self.airports["Kyiv"].id], departures
+        )
+        self.assertEqual(set(updated.legs), {first.id, second.id})
+
+    def test_invalid_params(self):
+        res = self.search(max_connections=3, date="tomorrow")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("max_connections", res.data)
+        self.assertIn("date", res.data)
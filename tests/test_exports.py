@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+)
+
+FLIGHT_EXPORT_URL = reverse("airport:flight-export")
+ORDER_EXPORT_URL = reverse("airport:order-export")
+
+
+def manifest_url(flight_id: int) -> str:
+    return reverse("airport:flight-manifest", args=[flight_id])
+
+
+def read_ndjson(response) -> list:
+    content = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+def read_csv(response) -> list:
+    content = b"".join(response.streaming_content).decode()
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+# chunks of two rows, so that the exports are written in several chunks
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@test.com", "testpass"
+        )
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.client.force_authenticate(self.admin)
+
+        country = Country.objects.create(name="Ukraine")
+        kyiv = City.objects.create(name="Kyiv", country=country)
+        lviv = City.objects.create(name="Lviv", country=country)
+        boryspil = Airport.objects.create(
+            name="Boryspil", city=kyiv, closest_big_city="Kyiv"
+        )
+        danylo = Airport.objects.create(
+            name="Danylo Halytskyi", city=lviv, closest_big_city="Lviv"
+        )
+        route = Route.objects.create(
+            source=boryspil, destination=danylo, distance=470
+        )
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=20, seats_in_row=4
+        )
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=f"2024-10-0{day} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{day} 16:30:00+00:00",
+            )
+            for day in range(1, 5)
+        ]
+        self.orders = []
+        for index, flight in enumerate(self.flights):
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, index + 2):
+                Ticket.objects.create(
+                    order=order, flight=flight, row=3, seat=seat
+                )
+            self.orders.append(order)
+
+    def test_flights_ndjson(self):
+        response = self.client.get(
+            FLIGHT_EXPORT_URL, {"departure_after": "2024-10-02T00:00:00Z"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn(
+            'filename="flights.ndjson"', response["Content-Disposition"]
+        )
+        self.assertNotIn("ETag", response)
+        rows = read_ndjson(response)
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [flight.id for flight in self.flights[1:]],
+        )
+        self.assertEqual(
+            rows[0],
+            {
+                "id": self.flights[1].id,
+                "route": self.flights[1].route_id,
+                "source": "Boryspil",
+                "destination": "Danylo Halytskyi",
+                "airplane": "Embraer 190",
+                "departure_time": "2024-10-02T14:00:00Z",
+                "arrival_time": "2024-10-02T16:30:00Z",
+                "capacity": 80,
+                "tickets_sold": 2,
+            },
+        )
+
+    def test_manifest_csv(self):
+        flight = self.flights[2]
+
+        response = self.client.get(
+            manifest_url(flight.id), {"export_format": "csv"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = read_csv(response)
+        self.assertEqual(
+            [(row["row"], row["seat"]) for row in rows],
+            [("3", "1"), ("3", "2"), ("3", "3")],
+        )
+        self.assertEqual(rows[0]["flight"], str(flight.id))
+        self.assertEqual(rows[0]["order"], str(self.orders[2].id))
+        self.assertEqual(rows[0]["user"], "test@test.com")
+
+    def test_orders_of_range(self):
+        Order.objects.filter(id=self.orders[0].id).update(
+            created_at="2024-01-01T00:00:00Z"
+        )
+
+        response = self.client.get(
+            ORDER_EXPORT_URL, {"created_after": "2024-02-01T00:00:00Z"}
+        )
+
+        rows = read_ndjson(response)
+        self.assertEqual(len(rows), 2 + 3 + 4)
+        self.assertEqual(
+            sorted({row["order"] for row in rows}),
+            [order.id for order in self.orders[1:]],
+        )
+        self.assertEqual(rows[0]["departure_time"], "2024-10-02T14:00:00Z")
+
+    def test_export_queries_do_not_grow_with_rows(self):
+        response = self.client.get(ORDER_EXPORT_URL)
+        with self.assertNumQueries(1):
+            rows = read_ndjson(response)
+        self.assertEqual(len(rows), 1 + 2 + 3 + 4)
+
+    def test_invalid_format(self):
+        response = self.client.get(FLIGHT_EXPORT_URL, {"export_format": "xml"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_exports_are_for_admins(self):
+        self.client.force_authenticate(self.user)
+
+        for url in (
+            FLIGHT_EXPORT_URL,
+            ORDER_EXPORT_URL,
+            manifest_url(self.flights[0].id),
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_writes_the_same_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tickets.csv")
+            call_command(
+                "export",
+                "tickets",
+                flight=self.flights[3].id,
+                format="csv",
+                output=path,
+            )
+            with open(path, newline="", encoding="utf-8") as file:
+                from_command = list(csv.DictReader(file))
+
+        response = self.client.get(
+            manifest_url(self.flights[3].id), {"export_format": "csv"}
+        )
+        self.assertEqual(from_command, read_csv(response))
+        self.assertEqual(len(from_command), 4)
+
+    def test_command_filters_flights(self):
+        out = io.StringIO()
+
+        call_command(
+            "export", "flights", before="2024-10-03T00:00:00Z", stdout=out
+        )
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [flight.id for flight in self.flights[:2]],
+        )
@@ -0,0 +1,400 @@
+import base64
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    Airport,
+    Route,
+    Flight,
+    Ticket,
+)
+from airport.seatmap import SeatMap
+from test_airplane_api import sample_airplane, sample_flight
+
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def seats_url(flight_id):
+    return reverse("airport:flight-seats", args=[flight_id])
+
+
+class SeatMapTests(TestCase):
+    def test_encodings(self):
+        seat_map = SeatMap(rows=2, seats_in_row=5)
+        seat_map.take(1, 2)
+        seat_map.take(1, 3)
+        seat_map.take(2, 5)
+
+        self.assertEqual(bytes(seat_map), bytes([0b01100000, 0b01000000]))
+        self.assertEqual(seat_map.to_rle(), [1, 2, 6, 1])
+        self.assertEqual(
+            seat_map.to_grid(), [[0, 1, 1, 0, 0], [0, 0, 0, 0, 1]]
+        )
+
+        seat_map.release(1, 2)
+        self.assertFalse(seat_map.is_taken(1, 2))
+        self.assertTrue(seat_map.is_taken(1, 3))
+
+    def test_find_seats_together_prefers_tightest_run(self):
+        seat_map = SeatMap(rows=3, seats_in_row=6)
+        for seat in (1, 2):
+            seat_map.take(1, seat)
+        for seat in (1, 5):
+            seat_map.take(2, seat)
+
+        self.assertEqual(
+            seat_map.find_seats(3, "together"), [(2, 2), (2, 3), (2, 4)]
+        )
+
+    def test_find_seats_window(self):
+        seat_map = SeatMap(rows=2, seats_in_row=6)
+        seat_map.take(1, 1)
+        seat_map.take(1, 5)
+
+        self.assertEqual(seat_map.find_seats(1, "window"), [(1, 6)])
+        self.assertEqual(
+            seat_map.find_seats(2, "window"), [(2, 1), (2, 2)]
+        )
+
+    def test_find_seats_splits_group_that_does_not_fit_a_row(self):
+        seat_map = SeatMap(rows=2, seats_in_row=3)
+        seat_map.take(2, 2)
+
+        self.assertEqual(
+            seat_map.find_seats(4, "together"),
+            [(1, 1), (1, 2), (1, 3), (2, 1)],
+        )
+        self.assertIsNone(seat_map.find_seats(6, "any"))
+
+    def test_seat_out_of_grid(self):
+        seat_map = SeatMap(rows=2, seats_in_row=5)
+
+        with self.assertRaises(ValueError):
+            seat_map.take(3, 1)
+
+
+class FlightSeatsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        airplane = sample_airplane(name="Embraer 190", rows=3, seats_in_row=4)
+        self.flight = sample_flight(airplane=airplane)
+        self.client.post(
+            reverse("airport:order-list"),
+            {
+                "tickets": [
+                    {"flight": self.flight.id, "row": 1, "seat": 2},
+                    {"flight": self.flight.id, "row": 3, "seat": 4},
+                ]
+            },
+            format="json",
+        )
+
+    def test_seats_base64(self):
+        res = self.client.get(seats_url(self.flight.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["rows"], 3)
+        self.assertEqual(res.data["seats_in_row"], 4)
+        self.assertEqual(
+            base64.b64decode(res.data["seats"]),
+            bytes([0b01000000, 0b00010000]),
+        )
+
+    def test_seats_grid(self):
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "grid"})
+
+        self.assertEqual(
+            res.data["seats"], [[0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 0, 1]]
+        )
+
+    def test_seats_rle(self):
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "rle"})
+
+        self.assertEqual(res.data["seats"], [1, 1, 9, 1])
+
+    def test_seats_unknown_encoding(self):
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "png"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_seats_do_not_scan_tickets(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(seats_url(self.flight.id))
+
+        self.assertEqual(len(context.captured_queries), 2)
+        for query in context.captured_queries:
+            self.assertNotIn("airport_ticket", query["sql"])
+
+    def test_seats_follow_ticket_changes(self):
+        ticket = Ticket.objects.get(row=1, seat=2)
+        ticket.seat = 1
+        ticket.save()
+        Ticket.objects.get(row=3, seat=4).delete()
+
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "grid"})
+
+        self.assertEqual(
+            res.data["seats"], [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+
+    def test_seats_follow_airplane_change(self):
+        airplane = self.flight.airplane
+        airplane.seats_in_row = 2
+        airplane.rows = 10
+        airplane.save()
+
+        res = self.client.get(seats_url(self.flight.id), {"encoding": "grid"})
+
+        self.assertEqual(res.data["seats"][0], [0, 1])
+        self.assertEqual(sum(map(sum, res.data["seats"])), 1)
+
+
+class FlightDepartureFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        first = sample_flight(departure_time="2024-10-01 23:30:00+00:00")
+        self.flights = [first] + [
+            Flight.objects.create(
+                route=first.route,
+                airplane=first.airplane,
+                departure_time=departure_time,
+                arrival_time=departure_time,
+            )
+            for departure_time in (
+                "2024-10-02 00:00:00+00:00",
+                "2024-10-02 14:00:00+00:00",
+                "2024-10-03 00:00:00+00:00",
+            )
+        ]
+
+    def flight_ids(self, **params):
+        res = self.client.get(FLIGHT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return sorted(flight["id"] for flight in res.data["results"])
+
+    def test_filter_by_date(self):
+        self.assertEqual(
+            self.flight_ids(date="2024-10-02"),
+            [self.flights[1].id, self.flights[2].id],
+        )
+
+    def test_filter_by_departure_range(self):
+        self.assertEqual(
+            self.flight_ids(departure_after="2024-10-02T00:00:00Z"),
+            [flight.id for flight in self.flights[1:]],
+        )
+        self.assertEqual(
+            self.flight_ids(
+                departure_after="2024-10-01T12:00:00Z",
+                departure_before="2024-10-02T14:00:00Z",
+            ),
+            [self.flights[0].id, self.flights[1].id],
+        )
+
+    def test_invalid_date(self):
+        res = self.client.get(FLIGHT_URL, {"date": "tomorrow"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", res.data)
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "Query plans are checked on PostgreSQL"
+)
+class FlightDepartureIndexTests(TestCase):
+    """Query plans of the departure filters on a million flights"""
+
+    FLIGHTS = 1_000_000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        cls.flight = sample_flight()
+        country = Country.objects.create(name="Poland")
+        city = City.objects.create(name="Warsaw", country=country)
+        airports = [
+            Airport.objects.create(
+                name=f"Airport {number}", city=city, closest_big_city="-"
+            )
+            for number in range(10)
+        ]
+        route_ids = [
+            Route.objects.create(
+                source=source, destination=destination, distance=500
+            ).id
+            for source in airports
+            for destination in airports
+            if source != destination
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO airport_flight (
+                    route_id, airplane_id, departure_time, arrival_time,
+                    tickets_sold, seat_map
+                )
+                SELECT
+                    (%s::integer[])[1 + number %% %s],
+                    %s,
+                    TIMESTAMPTZ '2020-01-01' + number * INTERVAL '5 minutes',
+                    TIMESTAMPTZ '2020-01-01' + number * INTERVAL '5 minutes'
+                        + INTERVAL '2 hours',
+                    0,
+                    ''::bytea
+                FROM generate_series(1, %s) AS number
+                """,
+                [
+                    route_ids,
+                    len(route_ids),
+                    cls.flight.airplane_id,
+                    cls.FLIGHTS,
+                ],
+            )
+            cursor.execute("ANALYZE airport_flight")
+        cls.route_id = route_ids[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def plan(self, **params):
+        """Plan of the query of the flights page requested"""
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(FLIGHT_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        sql = next(
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('SELECT "airport_flight"."id"')
+            and "LIMIT" in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_date_filter_uses_departure_index(self):
+        plan = self.plan(date="2022-06-15")
+
+        self.assertIn("flight_departure_idx", plan)
+        self.assertNotIn("Seq Scan on airport_flight", plan)
+
+    def test_route_and_date_filter_uses_composite_index(self):
+        plan = (
+            Flight.objects.filter(
+                route_id=self.route_id,
+                departure_time__gte="2022-06-15T00:00:00Z",
+                departure_time__lt="2022-06-16T00:00:00Z",
+            )
+            .values("id")
+            .explain()
+        )
+
+        self.assertIn("flight_route_departure_idx", plan)
+
+
+class FlightKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        first = sample_flight()
+        # pairs of flights departing at the same time
+        self.flights = [first] + [
+            Flight.objects.create(
+                route=first.route,
+                airplane=first.airplane,
+                departure_time=f"2024-10-{day:02} 14:00:00+00:00",
+                arrival_time=f"2024-10-{day:02} 23:00:00+00:00",
+            )
+            for day in (3, 3, 4, 4, 5, 5, 6)
+        ]
+        self.expected = [
+            flight.id
+            for flight in sorted(
+                self.flights,
+                key=lambda flight: (str(flight.departure_time), flight.id),
+                reverse=True,
+            )
+        ]
+
+    def test_pages_follow_departure_time_and_id(self):
+        url = f"{FLIGHT_URL}?pagination=cursor&page_size=3"
+        ids = []
+        pages = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            ids.extend(flight["id"] for flight in res.data["results"])
+            pages.append(res.data)
+            url = res.data["next"]
+
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+        res = self.client.get(pages[2]["previous"])
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            self.expected[3:6],
+        )
+        res = self.client.get(res.data["previous"])
+        self.assertEqual(
+            [flight["id"] for flight in res.data["results"]],
+            self.expected[:3],
+        )
+        self.assertIsNone(res.data["previous"])
+
+    def test_page_is_fetched_without_count_and_offset(self):
+        res = self.client.get(
+            FLIGHT_URL, {"pagination": "cursor", "page_size": 3}
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(res.data["next"])
+
+        for query in context.captured_queries:
+            self.assertNotIn("COUNT(", query["sql"])
+            self.assertNotIn("OFFSET", query["sql"])
+
+    def test_invalid_cursor(self):
+        for cursor in ("nonsense", "eyJwIjogWzFdfQ=="):
+            res = self.client.get(FLIGHT_URL, {"cursor": cursor})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_by_default(self):
+        res = self.client.get(FLIGHT_URL)
+
+        self.assertEqual(res.data["count"], len(self.flights))
@@ -0,0 +1,182 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from airport.flight_cache import get_stats
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+)
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+HOLD_URL = reverse("airport:seathold-list")
+
+
+def detail_url(flight_id):
+    return reverse("airport:flight-detail", args=[flight_id])
+
+
+class FlightCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        self.city = City.objects.create(name="Kyiv", country=country)
+        source = Airport.objects.create(
+            name="Boryspil", city=self.city, closest_big_city="Kyiv"
+        )
+        destination = Airport.objects.create(
+            name="Zhuliany", city=self.city, closest_big_city="Kyiv"
+        )
+        self.route = Route.objects.create(
+            source=source, destination=destination, distance=30
+        )
+        self.airplane = Airplane.objects.create(
+            name="Embraer 190", rows=3, seats_in_row=4
+        )
+        self.flights = [
+            Flight.objects.create(
+                route=self.route,
+                airplane=self.airplane,
+                departure_time=f"2024-10-0{day} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{day} 23:00:00+00:00",
+            )
+            for day in (2, 3)
+        ]
+
+    def available(self, **params):
+        res = self.client.get(FLIGHT_URL, params)
+        return [flight["tickets_available"] for flight in res.data["results"]]
+
+    def book(self, flight, row=1, seat=1):
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": flight.id, "row": row, "seat": seat}]},
+            format="json",
+        )
+
+    def test_repeated_list_makes_no_flight_queries(self):
+        self.available()
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.available(), [12, 12])
+
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "airport_flight" in query["sql"]
+            ]
+        )
+        self.assertEqual(get_stats()["hits"], 1)
+
+    def test_params_are_normalized(self):
+        self.available(page_size=10, source="")
+        self.available(source=" ", page_size="10", page=1)
+
+        self.assertEqual(
+            get_stats(), {"hits": 1, "misses": 1, "evictions": 0}
+        )
+
+    def test_order_invalidates_only_its_flight(self):
+        self.available(date="2024-10-02")
+        self.available(date="2024-10-03")
+
+        self.book(self.flights[1])
+
+        self.assertEqual(self.available(date="2024-10-02"), [12])
+        self.assertEqual(self.available(date="2024-10-03"), [11])
+        self.assertEqual(
+            get_stats(), {"hits": 1, "misses": 3, "evictions": 1}
+        )
+        self.assertEqual(self.available(), [11, 12])
+
+    def test_retrieve_is_cached(self):
+        url = detail_url(self.flights[0].id)
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url)
+
+        self.assertEqual(res.data["id"], self.flights[0].id)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if "airport_flight" in query["sql"]
+            ]
+        )
+
+    def test_holds_invalidate_flight(self):
+        self.available()
+
+        self.client.post(
+            HOLD_URL,
+            {"flight": self.flights[0].id, "seats": [{"row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(self.available(), [12, 11])
+
+    def test_admin_edits_invalidate(self):
+        self.available()
+
+        self.airplane.rows = 4
+        self.airplane.save()
+        self.assertEqual(self.available(), [16, 16])
+
+        Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time="2024-10-04 14:00:00+00:00",
+            arrival_time="2024-10-04 23:00:00+00:00",
+        )
+        self.assertEqual(len(self.available()), 3)
+
+        self.city.name = "Kyiv city"
+        self.city.save()
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(
+            res.data["results"][0]["source"], "Kyiv city (Boryspil)"
+        )
+
+        url = detail_url(self.flights[0].id)
+        self.client.get(url)
+        crew = Crew.objects.create(first_name="Ivan", last_name="Franko")
+        self.flights[0].crew.add(crew)
+        self.assertEqual(self.client.get(url).data["crew"], ["Ivan Franko"])
+
+        crew.last_name = "Frank"
+        crew.save()
+        self.assertEqual(self.client.get(url).data["crew"], ["Ivan Frank"])
+
+    def test_stats_command(self):
+        self.available()
+        self.available()
+        out = StringIO()
+
+        call_command("flight_cache_stats", "--reset", stdout=out)
+
+        self.assertIn("hits: 1", out.getvalue())
+        self.assertIn("hit ratio: 50.0%", out.getvalue())
+        self.assertEqual(get_stats()["hits"], 0)
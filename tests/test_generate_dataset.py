@@ -0,0 +1,136 @@
+import io
+from datetime import date
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Count, F
+from django.test import TestCase
+
+from airport.models import Airport, Flight, Order, Route, SeatHold, Ticket
+
+COUNTS = {
+    "countries": 3,
+    "cities": 10,
+    "airports": 12,
+    "airplane_types": 3,
+    "airplanes": 6,
+    "crew": 20,
+    "routes": 30,
+    "users": 15,
+    "flights": 60,
+    "holds": 20,
+}
+
+
+def generate(**options) -> str:
+    out = io.StringIO()
+    call_command(
+        "generate_dataset",
+        start=date(2024, 10, 1),
+        batch_size=50,
+        stdout=out,
+        **{**COUNTS, **options},
+    )
+    return out.getvalue()
+
+
+def snapshot() -> list:
+    return list(
+        Flight.objects.order_by(
+            "departure_time", "route__source__name", "airplane__name"
+        ).values_list(
+            "route__source__name",
+            "route__destination__name",
+            "route__distance",
+            "airplane__name",
+            "departure_time",
+            "tickets_sold",
+            "seat_map",
+        )
+    ) + list(
+        SeatHold.objects.order_by(
+            "flight__departure_time", "created_at"
+        ).values_list("seats", "created_at", "expires_at")
+    )
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generates_every_model(self):
+        out = generate()
+
+        self.assertEqual(Airport.objects.count(), 12)
+        self.assertEqual(Route.objects.count(), 30)
+        self.assertEqual(Flight.objects.count(), 60)
+        self.assertEqual(get_user_model().objects.count(), 15)
+        self.assertGreater(Ticket.objects.count(), Order.objects.count())
+        self.assertTrue(SeatHold.objects.exists())
+        self.assertIn("airport.ticket", out)
+        self.assertTrue(
+            self.client.login(email="user0@example.com", password="password")
+        )
+
+    def test_occupancy_matches_tickets(self):
+        generate()
+        out = io.StringIO()
+
+        call_command("rebuild_flight_occupancy", check=True, stdout=out)
+
+        self.assertIn("All flights are valid", out.getvalue())
+
+    def test_same_seed_same_data(self):
+        with transaction.atomic():
+            generate(seed=7)
+            first = snapshot()
+            transaction.set_rollback(True)
+        with transaction.atomic():
+            generate(seed=8)
+            other = snapshot()
+            transaction.set_rollback(True)
+
+        generate(seed=7)
+
+        self.assertEqual(snapshot(), first)
+        self.assertNotEqual(other, first)
+
+    def test_traffic_is_skewed(self):
+        generate(flights=300, load_factor=0.2)
+
+        flights_by_route = Counter(
+            Flight.objects.values_list("route_id", flat=True)
+        )
+        busiest = flights_by_route.most_common(1)[0][1]
+        self.assertGreater(busiest, 3 * 300 / Route.objects.count())
+        orders_by_user = sorted(
+            Order.objects.values("user")
+            .annotate(orders=Count("id"))
+            .values_list("orders", flat=True),
+            reverse=True,
+        )
+        self.assertGreater(orders_by_user[0], 3 * orders_by_user[-1])
+
+    def test_orders_precede_departures(self):
+        generate()
+
+        self.assertFalse(
+            Ticket.objects.filter(
+                order__created_at__gte=F("flight__departure_time")
+            ).exists()
+        )
+        self.assertFalse(
+            Order.objects.filter(
+                created_at__gt="2024-10-01T00:00:00Z"
+            ).exists()
+        )
+
+    def test_holds_are_live_at_start(self):
+        generate()
+
+        start = "2024-10-01T00:00:00Z"
+        self.assertFalse(
+            SeatHold.objects.filter(created_at__gt=start).exists()
+        )
+        self.assertFalse(
+            SeatHold.objects.filter(expires_at__lte=start).exists()
+        )
@@ -0,0 +1,174 @@
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from airport.importer import read_json
+from airport.models import Country, City, Airport, Crew, Route, Flight
+
+FIXTURE = os.path.join(settings.BASE_DIR, "airport_service_db_data.json")
+
+
+class ImportDataTests(TestCase):
+    def setUp(self):
+        # the imported objects get other ids than the ones of the file
+        Crew.objects.create(first_name="Anna", last_name="Koval")
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def test_imports_fixture_in_batches(self):
+        out = io.StringIO()
+
+        call_command(
+            "import_data",
+            FIXTURE,
+            ignorenonexistent=True,
+            batch_size=4,
+            stdout=out,
+        )
+
+        self.assertEqual(Country.objects.count(), 15)
+        self.assertEqual(Crew.objects.count(), 16)
+        self.assertEqual(Flight.objects.count(), 3)
+        self.assertEqual(get_user_model().objects.count(), 3)
+        flight = Flight.objects.get(departure_time="2024-06-02T14:00:00Z")
+        self.assertEqual(
+            sorted(str(crew) for crew in flight.crew.all()),
+            ["Emily Johnson", "Jane Smith"],
+        )
+        self.assertEqual(flight.airplane.name, "Airbus A320-200")
+        self.assertEqual(
+            flight.route.source.name, "Los Angeles International Airport"
+        )
+        self.assertIn("Imported 111 rows", out.getvalue())
+        self.assertIn("airport.flight", out.getvalue())
+
+    def test_unknown_fields_are_errors(self):
+        with self.assertRaisesMessage(CommandError, "no field 'username'"):
+            call_command("import_data", FIXTURE, stdout=io.StringIO())
+
+        self.assertEqual(Country.objects.count(), 0)
+
+    def test_csv_references_by_natural_keys(self):
+        Country.objects.create(name="Ukraine")
+        cities = self.write(
+            "cities.csv", "name,country\nKyiv,Ukraine\nLviv,Ukraine\n"
+        )
+        airports = self.write(
+            "airports.csv",
+            "name,city,closest_big_city\n"
+            "Boryspil,Kyiv,Kyiv\n"
+            '"Danylo Halytskyi, Lviv",Lviv,Lviv\n',
+        )
+        routes = self.write(
+            "routes.json",
+            '{"model": "airport.route", "fields": {"source": "Boryspil", '
+            '"destination": "Danylo Halytskyi, Lviv", "distance": 470}}\n',
+        )
+
+        call_command(
+            "import_data", cities, model="airport.city", stdout=io.StringIO()
+        )
+        call_command(
+            "import_data",
+            airports,
+            model="airport.airport",
+            stdout=io.StringIO(),
+        )
+        call_command("import_data", routes, stdout=io.StringIO())
+
+        self.assertEqual(
+            list(City.objects.values_list("country__name", flat=True)),
+            ["Ukraine", "Ukraine"],
+        )
+        self.assertEqual(
+            Airport.objects.get(name="Boryspil").city.name, "Kyiv"
+        )
+        route = Route.objects.get()
+        self.assertEqual(route.destination.city.name, "Lviv")
+
+    def test_unknown_natural_key_imports_nothing(self):
+        cities = self.write(
+            "cities.csv", "name,country\nKyiv,Ukraine\nParis,France\n"
+        )
+        Country.objects.create(name="Ukraine")
+
+        with self.assertRaisesMessage(
+            CommandError, "object 2: country: unknown airport.country 'France'"
+        ):
+            call_command(
+                "import_data",
+                cities,
+                model="airport.city",
+                batch_size=1,
+                stdout=io.StringIO(),
+            )
+
+        self.assertFalse(City.objects.exists())
+
+    def test_ambiguous_natural_keys_are_errors(self):
+        country = Country.objects.create(name="Ukraine")
+        City.objects.create(name="Lviv", country=country)
+        cities = self.write("cities.csv", "name,country\nLviv,Ukraine\n")
+        airports = self.write(
+            "airports.csv", "name,city,closest_big_city\nSkyliv,Lviv,Lviv\n"
+        )
+
+        call_command(
+            "import_data", cities, model="airport.city", stdout=io.StringIO()
+        )
+        with self.assertRaisesMessage(
+            CommandError, "several airport.city objects are 'Lviv'"
+        ):
+            call_command(
+                "import_data",
+                airports,
+                model="airport.airport",
+                stdout=io.StringIO(),
+            )
+
+        self.assertFalse(Airport.objects.exists())
+
+    def test_ambiguous_natural_keys_of_input_are_errors(self):
+        data = self.write(
+            "data.json",
+            '{"model": "airport.country", "fields": {"name": "Ukraine"}}\n'
+            '{"model": "airport.city", "fields": '
+            '{"name": "Kyiv", "country": "Ukraine"}}\n'
+            '{"model": "airport.city", "fields": '
+            '{"name": "Kyiv", "country": "Ukraine"}}\n'
+            '{"model": "airport.airport", "fields": {"name": "Boryspil", '
+            '"city": "Kyiv", "closest_big_city": "Kyiv"}}\n',
+        )
+
+        with self.assertRaisesMessage(
+            CommandError, "several airport.city objects are 'Kyiv'"
+        ):
+            call_command("import_data", data, stdout=io.StringIO())
+
+    def test_read_json_streams_objects(self):
+        content = (
+            '[{"model": "airport.crew", "fields": {"first_name": "[a, b]"}},'
+            '\n {"model": "airport.crew", "fields": {"last_name": "}{"}}]'
+        )
+
+        objects = list(read_json(io.StringIO(content), read_size=5))
+
+        self.assertEqual(
+            objects,
+            [
+                {"model": "airport.crew", "fields": {"first_name": "[a, b]"}},
+                {"model": "airport.crew", "fields": {"last_name": "}{"}},
+            ],
+        )
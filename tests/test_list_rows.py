@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+    Order,
+    Ticket,
+)
+from airport.rows import (
+    annotate_tickets_available,
+    flight_list_rows,
+    flight_list_values,
+    order_list_rows,
+    order_list_values,
+)
+from airport.serializers import FlightListSerializer, OrderListSerializer
+
+FLIGHT_URL = reverse("airport:flight-list")
+ORDER_URL = reverse("airport:order-list")
+
+
+class ListRowsTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        country = Country.objects.create(name="Ukraine")
+        kyiv = City.objects.create(name="Kyiv", country=country)
+        lviv = City.objects.create(name="Lviv", country=country)
+        boryspil = Airport.objects.create(
+            name="Boryspil", city=kyiv, closest_big_city="Kyiv"
+        )
+        danylo = Airport.objects.create(
+            name="Danylo Halytskyi", city=lviv, closest_big_city="Lviv"
+        )
+        routes = [
+            Route.objects.create(
+                source=boryspil, destination=danylo, distance=470
+            ),
+            Route.objects.create(
+                source=danylo, destination=boryspil, distance=470
+            ),
+        ]
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=20, seats_in_row=4
+        )
+        crew = [
+            Crew.objects.create(first_name="Anna", last_name="Koval"),
+            Crew.objects.create(first_name="Petro", last_name="Bondar"),
+        ]
+        flights = []
+        for day in range(1, 5):
+            flight = Flight.objects.create(
+                route=routes[day % 2],
+                airplane=airplane,
+                departure_time=f"2024-10-0{day} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{day} 16:30:00+00:00",
+            )
+            flight.crew.set(crew[: day % 3])
+            flights.append(flight)
+
+        for index, flight in enumerate(flights):
+            order = Order.objects.create(user=self.user)
+            for seat in range(1, index + 2):
+                Ticket.objects.create(
+                    order=order, flight=flight, row=2, seat=seat
+                )
+
+    def test_flight_rows_match_serializer(self):
+        queryset = annotate_tickets_available(Flight.objects.all())
+
+        self.assertEqual(
+            flight_list_rows(flight_list_values(queryset)),
+            FlightListSerializer(queryset, many=True).data,
+        )
+        self.assertNotIn(
+            "tickets_available",
+            flight_list_rows(flight_list_values(Flight.objects.all()))[0],
+        )
+
+    def test_order_rows_match_serializer(self):
+        queryset = Order.objects.all()
+
+        self.assertEqual(
+            order_list_rows(order_list_values(queryset)),
+            OrderListSerializer(queryset, many=True).data,
+        )
+
+    def test_lists_match_serialized_lists(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        for url in (FLIGHT_URL, ORDER_URL):
+            rows = client.get(url, {"page_size": 100})
+            # lists with ?fields= are rendered by the serializers
+            serialized = client.get(
+                url,
+                {
+                    "page_size": 100,
+                    "fields": ",".join(rows.data["results"][0]),
+                },
+            )
+
+            self.assertEqual(rows.json(), serialized.json(), url)
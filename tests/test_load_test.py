@@ -0,0 +1,105 @@
+import io
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from airport.loadtest import endpoint_name, percentile
+from airport.models import Order
+
+COUNTS = {
+    "countries": 2,
+    "cities": 4,
+    "airports": 5,
+    "airplane_types": 2,
+    "airplanes": 3,
+    "crew": 5,
+    "routes": 8,
+    "users": 3,
+    "flights": 20,
+    "holds": 0,
+}
+
+
+class LoadTestHelperTests(SimpleTestCase):
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_endpoint_name_drops_ids_and_query(self):
+        self.assertEqual(
+            endpoint_name(
+                "GET", "/api/airport/flights/12/seats/?encoding=grid"
+            ),
+            "GET /api/airport/flights/{id}/seats/",
+        )
+        self.assertEqual(
+            endpoint_name("DELETE", "/api/airport/orders/3"),
+            "DELETE /api/airport/orders/{id}",
+        )
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    def setUp(self):
+        call_command(
+            "generate_dataset",
+            start=date.today(),
+            days_before=0,
+            days_after=10,
+            stdout=io.StringIO(),
+            **COUNTS,
+        )
+        self.report = Path(tempfile.mkdtemp()) / "report.json"
+
+    def load_test(self, **options) -> dict:
+        call_command(
+            "load_test",
+            self.live_server_url,
+            concurrency=1,
+            json=str(self.report),
+            stdout=io.StringIO(),
+            **options,
+        )
+        return {
+            row["endpoint"]: row
+            for row in json.loads(self.report.read_text())["endpoints"]
+        }
+
+    def test_synthetic_mix(self):
+        orders = Order.objects.count()
+
+        report = self.load_test(requests=40, users=2)
+
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertGreaterEqual(report["total"]["requests"], 40)
+        self.assertIn("GET /api/airport/flights/", report)
+        self.assertIn("GET /api/airport/flights/{id}/seats/", report)
+        self.assertIn("POST /api/user/token/", report)
+        self.assertEqual(
+            Order.objects.count() - orders,
+            report["POST /api/airport/orders/"]["requests"],
+        )
+
+    def test_replays_log(self):
+        log = Path(tempfile.mkdtemp()) / "requests.log"
+        log.write_text(
+            '{"method": "GET", "path": "/api/airport/flights/?page=1"}\n'
+            "not a request\n"
+            'INFO {"method": "GET", "path": "/api/airport/missing/1/", '
+            '"status": 404, "total_ms": 3.1}\n'
+        )
+
+        report = self.load_test(log=str(log), loop=True, requests=6)
+
+        self.assertEqual(report["GET /api/airport/flights/"]["errors"], 0)
+        self.assertEqual(report["GET /api/airport/flights/"]["requests"], 3)
+        self.assertEqual(
+            report["GET /api/airport/missing/{id}/"]["error_rate"], 1.0
+        )
@@ -0,0 +1,187 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Route,
+    Flight,
+)
+
+METRICS_URL = reverse("metrics")
+ORDER_URL = reverse("airport:order-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        city = City.objects.create(name="Kyiv", country=country)
+        source = Airport.objects.create(
+            name="Boryspil", city=city, closest_big_city="Kyiv"
+        )
+        destination = Airport.objects.create(
+            name="Zhuliany", city=city, closest_big_city="Kyiv"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=30
+        )
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=3, seats_in_row=4
+        )
+        self.flight = Flight.objects.create(
+            route=route,
+            airplane=airplane,
+            departure_time="2024-10-02 14:00:00+00:00",
+            arrival_time="2024-10-02 23:00:00+00:00",
+        )
+
+    def order(self, seats):
+        return self.client.post(
+            ORDER_URL,
+            {
+                "tickets": [
+                    {"flight": self.flight.id, "row": row, "seat": seat}
+                    for row, seat in seats
+                ]
+            },
+            format="json",
+        )
+
+    def test_requests_are_observed(self):
+        labels = {"view": "airport:flight-list", "method": "GET"}
+        requests = sample("airport_request_duration_seconds_count", **labels)
+        ok = sample("airport_responses_total", status="200", **labels)
+        queries = sample("airport_request_db_queries_sum", **labels)
+
+        self.client.get(FLIGHT_URL)
+
+        self.assertEqual(
+            sample("airport_request_duration_seconds_count", **labels),
+            requests + 1,
+        )
+        self.assertEqual(
+            sample("airport_responses_total", status="200", **labels), ok + 1
+        )
+        self.assertGreater(
+            sample("airport_request_db_queries_sum", **labels), queries
+        )
+
+    def test_bookings_are_counted_on_commit(self):
+        orders = sample("airport_orders_created_total")
+        tickets = sample("airport_tickets_created_total")
+        conflicts = sample(
+            "airport_booking_conflicts_total", reason="seats_taken"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order([(1, 1), (1, 2)])
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.order([(1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(sample("airport_orders_created_total"), orders + 1)
+        self.assertEqual(
+            sample("airport_tickets_created_total"), tickets + 2
+        )
+        self.assertEqual(
+            sample("airport_booking_conflicts_total", reason="seats_taken"),
+            conflicts + 1,
+        )
+
+    def test_flight_cache_lookups(self):
+        hits = sample(
+            "airport_cache_lookups_total",
+            cache="flight_response",
+            result="hits",
+        )
+
+        self.client.get(FLIGHT_URL, {"page_size": 7})
+        self.client.get(FLIGHT_URL, {"page_size": 7})
+
+        self.assertEqual(
+            sample(
+                "airport_cache_lookups_total",
+                cache="flight_response",
+                result="hits",
+            ),
+            hits + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get(FLIGHT_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b'airport_request_duration_seconds_bucket{le="0.005",'
+            b'method="GET",view="airport:flight-list"}',
+            res.content,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        res = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class MultiProcessMetricsTests(TestCase):
+    def test_metrics_of_processes_are_aggregated(self):
+        """Every process counts into its own file of the shared directory"""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+            for _ in range(2):
+                subprocess.run(
+                    [
+                        sys.executable,
+                        "-c",
+                        "from airport.metrics import order_created; "
+                        "order_created(3)",
+                    ],
+                    env=env,
+                    check=True,
+                )
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "from prometheus_client import generate_latest; "
+                    "from airport.metrics import get_registry; "
+                    "print(generate_latest(get_registry()).decode())",
+                ],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+
+        self.assertIn("airport_orders_created_total 2.0", output)
+        self.assertIn("airport_tickets_created_total 6.0", output)
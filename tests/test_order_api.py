@@ -0,0 +1,307 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Flight, Order, Ticket
+from airport.query_detector import detect_n_plus_one
+from airport.seatmap import SeatMap
+from test_airplane_api import sample_airplane, sample_flight
+
+
+ORDER_URL = reverse("airport:order-list")
+AUTO_ORDER_URL = reverse("airport:order-auto")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class OrderApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.flight = sample_flight(airplane=sample_airplane(rows=20))
+
+    def order_payload(self, seats, flight=None):
+        flight = flight or self.flight
+        return {
+            "tickets": [
+                {"flight": flight.id, "row": row, "seat": seat}
+                for row, seat in seats
+            ]
+        }
+
+    def test_create_order(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(
+            list(order.tickets.values_list("row", "seat")), [(1, 1), (1, 2)]
+        )
+        self.assertEqual(len(res.data["tickets"]), 2)
+
+    def test_order_queries_do_not_grow_with_order_size(self):
+        query_counts = []
+        for row, size in enumerate([1, 3, 6], start=1):
+            payload = self.order_payload(
+                [(row, seat) for seat in range(1, size + 1)]
+            )
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.post(ORDER_URL, payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(len(set(query_counts)), 1)
+
+    def test_seat_out_of_range(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (21, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("row", res.data["tickets"][1])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_seat_already_taken(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(2, 3)]), format="json"
+        )
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(2, 2), (2, 3)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"flight": self.flight.id, "row": 2, "seat": 3}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_seat_taken_behind_outdated_seat_map(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(2, 3)]), format="json"
+        )
+        Flight.objects.update(seat_map=b"")
+
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(2, 2), (2, 3)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["seats"],
+            [{"flight": self.flight.id, "row": 2, "seat": 3}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_same_seat_twice_in_order(self):
+        res = self.client.post(
+            ORDER_URL, self.order_payload([(3, 1), (3, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["tickets"][0], {})
+        self.assertIn("non_field_errors", res.data["tickets"][1])
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_unknown_flight(self):
+        payload = {"tickets": [{"flight": 999, "row": 1, "seat": 1}]}
+
+        res = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("flight", res.data["tickets"][0])
+
+    def test_tickets_sold_counter(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertTrue(SeatMap.for_flight(self.flight).is_taken(1, 2))
+
+        res = self.client.get(FLIGHT_URL)
+        self.assertEqual(res.data["results"][0]["tickets_available"], 118)
+
+        Order.objects.get().delete()
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+
+    def test_order_deletion_releases_seats_once_per_flight(self):
+        other_flight = sample_flight(
+            airplane=self.flight.airplane, route=self.flight.route
+        )
+        payload = self.order_payload([(2, seat) for seat in range(1, 6)])
+        payload["tickets"] += self.order_payload(
+            [(3, 1), (3, 2)], other_flight
+        )["tickets"]
+        self.client.post(ORDER_URL, payload, format="json")
+        self.client.post(
+            ORDER_URL, self.order_payload([(4, 1)]), format="json"
+        )
+
+        with detect_n_plus_one(strict=True):
+            Order.objects.order_by("id").first().delete()
+
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertEqual(other_flight.tickets_sold, 0)
+        seat_map = SeatMap.for_flight(self.flight)
+        self.assertFalse(seat_map.is_taken(2, 1))
+        self.assertTrue(seat_map.is_taken(4, 1))
+
+    def test_ticket_deletion_releases_seat(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+
+        Ticket.objects.get(row=1, seat=2).delete()
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 1)
+        self.assertFalse(SeatMap.for_flight(self.flight).is_taken(1, 2))
+
+    def test_tickets_sold_counter_follows_moved_ticket(self):
+        other_flight = Flight.objects.create(
+            route=self.flight.route,
+            airplane=self.flight.airplane,
+            departure_time=self.flight.departure_time,
+            arrival_time=self.flight.arrival_time,
+        )
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            order=order, flight=self.flight, row=1, seat=1
+        )
+
+        ticket.flight = other_flight
+        ticket.save()
+
+        self.flight.refresh_from_db()
+        other_flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 0)
+        self.assertEqual(other_flight.tickets_sold, 1)
+
+    def test_stale_flight_save_keeps_occupancy(self):
+        stale_flight = Flight.objects.get(pk=self.flight.pk)
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+
+        stale_flight.departure_time = "2024-10-02 15:00:00+00:00"
+        stale_flight.save()
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertTrue(SeatMap.for_flight(self.flight).is_taken(1, 2))
+        self.assertEqual(
+            self.client.get(FLIGHT_URL).data["results"][0][
+                "tickets_available"
+            ],
+            118,
+        )
+
+    def test_rebuild_flight_occupancy(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+        Flight.objects.update(tickets_sold=7, seat_map=b"")
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "rebuild_flight_occupancy", check=True, stdout=StringIO()
+            )
+        call_command("rebuild_flight_occupancy", stdout=StringIO())
+
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+        self.assertTrue(SeatMap.for_flight(self.flight).is_taken(1, 2))
+
+    def test_rebuilt_seat_map_modifies_seats_etag(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 2)]), format="json"
+        )
+        Flight.objects.update(seat_map=b"")
+        seats_url = reverse("airport:flight-seats", args=[self.flight.id])
+        res = self.client.get(seats_url)
+
+        call_command(
+            "rebuild_flight_occupancy", batch_size=1, stdout=StringIO()
+        )
+
+        res = self.client.get(seats_url, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_auto_order_seats_passengers_together(self):
+        self.client.post(
+            ORDER_URL, self.order_payload([(1, 1), (1, 4)]), format="json"
+        )
+
+        res = self.client.post(
+            AUTO_ORDER_URL,
+            {"flight": self.flight.id, "passengers": 3},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(
+            list(order.tickets.values_list("row", "seat")),
+            [(2, 1), (2, 2), (2, 3)],
+        )
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 5)
+
+    def test_orders_keyset_pagination(self):
+        for row in range(1, 6):
+            self.client.post(
+                ORDER_URL, self.order_payload([(row, 1)]), format="json"
+            )
+        expected = list(
+            Order.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+        url = f"{ORDER_URL}?pagination=cursor&page_size=2"
+        ids = []
+        while url:
+            res = self.client.get(url)
+            ids.extend(order["id"] for order in res.data["results"])
+            url = res.data["next"]
+
+        self.assertEqual(ids, expected)
+
+    def test_auto_order_not_enough_seats(self):
+        res = self.client.post(
+            AUTO_ORDER_URL,
+            {"flight": self.flight.id, "passengers": 121},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        Flight.objects.update(seat_map=b"\xff" * 14 + b"\xfe")
+        res = self.client.post(
+            AUTO_ORDER_URL,
+            {"flight": self.flight.id, "passengers": 2},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
@@ -0,0 +1,105 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from airport.models import Country
+
+COUNTRY_URL = reverse("airport:country-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def parse_server_timing(header: str) -> dict:
+    metrics = {}
+    for metric in re.split(r", (?=\w+(?:;|$))", header):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        Country.objects.create(name="Ukraine")
+
+    def test_not_profiled_by_default(self):
+        res = self.client.get(COUNTRY_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(
+        REQUEST_PROFILING_HEADER="X-Profile", REQUEST_PROFILING_SECRET="s3"
+    )
+    def test_profiled_by_header(self):
+        res = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="s3")
+
+        metrics = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(
+            set(metrics), {"total", "db", "serialize", "render", "cache"}
+        )
+        # the count only, as there are no flights
+        self.assertEqual(metrics["db"]["desc"], '"1 queries"')
+        self.assertEqual(metrics["cache"]["desc"], '"0 hits, 1 misses"')
+        self.assertGreaterEqual(
+            float(metrics["total"]["dur"]), float(metrics["db"]["dur"])
+        )
+
+        res = self.client.get(FLIGHT_URL, HTTP_X_PROFILE="s3")
+
+        metrics = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(metrics["db"]["desc"], '"0 queries"')
+        self.assertEqual(metrics["cache"]["desc"], '"1 hits, 0 misses"')
+
+    @override_settings(
+        REQUEST_PROFILING_HEADER="X-Profile", REQUEST_PROFILING_SECRET="s3"
+    )
+    def test_header_needs_secret(self):
+        for value in ("1", "s", ""):
+            res = self.client.get(COUNTRY_URL, HTTP_X_PROFILE=value)
+
+            self.assertNotIn("Server-Timing", res)
+
+    @override_settings(
+        REQUEST_PROFILING_HEADER="X-Profile", REQUEST_PROFILING_SECRET=None
+    )
+    def test_header_without_secret_is_ignored(self):
+        res = self.client.get(COUNTRY_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn("Server-Timing", res)
+
+    @override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_LOG_RATE=1)
+    def test_profiles_are_logged(self):
+        with self.assertLogs("airport.profiling") as logs:
+            res = self.client.get(COUNTRY_URL, {"page": 1})
+
+        self.assertIn("Server-Timing", res)
+        profile = json.loads(logs.records[0].getMessage())
+        self.assertEqual(profile["path"], f"{COUNTRY_URL}?page=1")
+        self.assertEqual(profile["status"], 200)
+        self.assertNotIn("body", profile)
+        self.assertIn("serialize_ms", profile)
+        self.assertIn("queries", profile)
+
+    @override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_LOG_RATE=1)
+    def test_logged_writes_keep_body_without_secrets(self):
+        with self.assertLogs("airport.profiling") as logs:
+            self.client.post(
+                COUNTRY_URL,
+                {"name": "Poland", "password": "testpass"},
+                format="json",
+            )
+
+        profile = json.loads(logs.records[0].getMessage())
+        self.assertEqual(profile["method"], "POST")
+        self.assertEqual(profile["body"], {"name": "Poland"})
@@ -0,0 +1,18 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class QueryBudgetTests(TestCase):
+    def test_endpoints_are_within_budgets(self):
+        """
+        Every endpoint is called on seeded data, see benchmark_endpoints,
+        run it with --record to update airport/query_budgets.json.
+        Only the queries are checked, the times vary from run to run.
+        """
+        out = StringIO()
+
+        call_command("benchmark_endpoints", stdout=out)
+
+        self.assertIn("GET orders", out.getvalue())
@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+)
+from airport.query_detector import (
+    NPlusOneQueries,
+    detect_n_plus_one,
+    get_shape,
+)
+from airport.serializers import FlightDetailSerializer, FlightSerializer
+from airport.views import FlightViewSet
+
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class QueryDetectorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        city = City.objects.create(name="Kyiv", country=country)
+        source = Airport.objects.create(
+            name="Boryspil", city=city, closest_big_city="Kyiv"
+        )
+        destination = Airport.objects.create(
+            name="Zhuliany", city=city, closest_big_city="Kyiv"
+        )
+        self.route = Route.objects.create(
+            source=source, destination=destination, distance=30
+        )
+        self.crew = [
+            Crew.objects.create(first_name="Crew", last_name=str(index))
+            for index in range(4)
+        ]
+        for index in range(4):
+            Flight.objects.create(
+                route=self.route,
+                airplane=Airplane.objects.create(
+                    name=f"Embraer {index}", rows=3, seats_in_row=4
+                ),
+                departure_time=f"2024-10-0{index + 1} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{index + 1} 23:00:00+00:00",
+            )
+
+    def test_shape_ignores_values(self):
+        self.assertEqual(
+            get_shape('SELECT * FROM "t" WHERE "id" IN (%s, %s) LIMIT 21'),
+            get_shape('SELECT * FROM "t" WHERE "id" IN (%s)  LIMIT 1'),
+        )
+        self.assertEqual(
+            get_shape('INSERT INTO "t" VALUES (%s, %s), (%s, %s)'),
+            get_shape('INSERT INTO "t" VALUES (%s, %s)'),
+        )
+
+    def test_reports_serializer_field(self):
+        with self.assertRaises(NPlusOneQueries) as error:
+            with detect_n_plus_one(strict=True):
+                FlightDetailSerializer(Flight.objects.all(), many=True).data
+
+        self.assertIn(
+            "field FlightDetailSerializer.route", str(error.exception)
+        )
+        self.assertIn('FROM "airport_route"', str(error.exception))
+        self.assertIn(f"{__file__}:", str(error.exception))
+
+    def test_warns_when_not_strict(self):
+        with self.assertLogs("airport.query_detector", "WARNING") as logs:
+            with detect_n_plus_one(strict=False):
+                FlightDetailSerializer(Flight.objects.all(), many=True).data
+
+        # route, airplane and crew of every flight
+        self.assertEqual(len(logs.records), 3)
+
+    def test_reports_code_location(self):
+        with self.assertRaises(NPlusOneQueries) as error:
+            with detect_n_plus_one(strict=True):
+                for flight in Flight.objects.all():
+                    flight.airplane
+
+        self.assertIn(f"{__file__}:", str(error.exception))
+
+    def test_joined_queries_pass(self):
+        with detect_n_plus_one(strict=True):
+            FlightDetailSerializer(
+                Flight.objects.select_related(
+                    "route", "airplane"
+                ).prefetch_related("crew"),
+                many=True,
+            ).data
+
+    def test_raises_in_requests(self):
+        with mock.patch.object(
+            FlightViewSet,
+            "_select_related",
+            lambda self, queryset: queryset,
+        ):
+            with self.assertRaises(NPlusOneQueries):
+                self.client.get(FLIGHT_URL, {"fields": "airplane"})
+
+    @override_settings(NPLUSONE_DETECTION="off")
+    def test_can_be_disabled(self):
+        with mock.patch.object(
+            FlightViewSet,
+            "_select_related",
+            lambda self, queryset: queryset,
+        ):
+            res = self.client.get(FLIGHT_URL, {"fields": "airplane"})
+
+        self.assertEqual(len(res.data["results"]), 4)
+
+    def test_crew_is_validated_in_one_query(self):
+        serializer = FlightSerializer(
+            data={
+                "route": self.route.id,
+                "airplane": Airplane.objects.first().id,
+                "departure_time": "2024-10-09 14:00:00+00:00",
+                "arrival_time": "2024-10-09 23:00:00+00:00",
+                "crew": [member.id for member in self.crew],
+            }
+        )
+
+        with detect_n_plus_one(strict=True):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(serializer.validated_data["crew"], self.crew)
@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    AirplaneType,
+    Airplane,
+    Airport,
+    Route,
+    ReferenceDataVersion,
+)
+
+COUNTRY_URL = reverse("airport:country-list")
+CITY_URL = reverse("airport:city-list")
+AIRPLANE_TYPE_URL = reverse("airport:airplanetype-list")
+AIRPLANE_URL = reverse("airport:airplane-list")
+AIRPORT_URL = reverse("airport:airport-list")
+ROUTE_URL = reverse("airport:route-list")
+
+
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@test.com",
+            "testpass",
+            is_staff=True,
+        )
+        self.client.force_authenticate(self.user)
+
+        self.country = Country.objects.create(name="Ukraine")
+        self.city = City.objects.create(name="Kyiv", country=self.country)
+        self.airports = [
+            Airport.objects.create(
+                name=name, city=self.city, closest_big_city="Kyiv"
+            )
+            for name in ("Boryspil", "Zhuliany")
+        ]
+        self.airplane_type = AirplaneType.objects.create(name="Jet")
+
+    def test_reference_lists_make_no_queries(self):
+        urls = (COUNTRY_URL, CITY_URL, AIRPLANE_TYPE_URL, AIRPORT_URL)
+        for url in urls:
+            self.client.get(url)
+
+        for url in urls:
+            with self.assertNumQueries(0):
+                res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        airports = self.client.get(AIRPORT_URL).data["results"]
+        self.assertEqual(
+            [(airport["name"], airport["city"]) for airport in airports],
+            [("Boryspil", "Kyiv"), ("Zhuliany", "Kyiv")],
+        )
+
+    def test_related_names_are_rendered_from_reference_data(self):
+        Airplane.objects.create(
+            name="Embraer 190",
+            rows=20,
+            seats_in_row=4,
+            airplane_type=self.airplane_type,
+        )
+        Route.objects.create(
+            source=self.airports[0], destination=self.airports[1], distance=30
+        )
+        self.client.get(COUNTRY_URL)
+
+        for url, field, name in (
+            (AIRPLANE_URL, "airplane_type", "Jet"),
+            (ROUTE_URL, "source", "Boryspil"),
+        ):
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.get(url)
+            self.assertEqual(res.data["results"][0][field], name)
+            for query in context.captured_queries:
+                self.assertNotIn("JOIN", query["sql"])
+
+    def test_write_is_seen_at_once(self):
+        self.client.get(CITY_URL)
+
+        res = self.client.post(
+            CITY_URL, {"name": "Lviv", "country": self.country.id}
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(CITY_URL)
+        self.assertEqual(
+            [city["name"] for city in res.data["results"]], ["Kyiv", "Lviv"]
+        )
+
+    def test_related_ids_are_resolved_from_reference_data(self):
+        self.client.get(AIRPORT_URL)
+
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(
+                ROUTE_URL,
+                {
+                    "source": self.airports[0].id,
+                    "destination": self.airports[1].id,
+                    "distance": 30,
+                },
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if query["sql"].startswith("SELECT")
+                and "airport_airport" in query["sql"]
+            ]
+        )
+
+        res = self.client.post(
+            ROUTE_URL,
+            {"source": 0, "destination": self.airports[1].id, "distance": 3},
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REFERENCE_DATA_MAX_AGE_SECONDS=0)
+    def test_change_by_another_worker_is_revalidated(self):
+        self.client.get(COUNTRY_URL)
+
+        with self.assertNumQueries(1):
+            self.client.get(COUNTRY_URL)
+
+        # a change made without signals, as by another worker
+        Country.objects.filter(pk=self.country.pk).update(name="Ukrajina")
+        ReferenceDataVersion.objects.update(version=F("version") + 1)
+
+        res = self.client.get(COUNTRY_URL)
+        self.assertEqual(res.data["results"][0]["name"], "Ukrajina")
@@ -0,0 +1,206 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import Airplane, Order, SeatHold
+from test_airplane_api import sample_airplane, sample_flight
+
+
+HOLD_URL = reverse("airport:seathold-list")
+ORDER_URL = reverse("airport:order-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+def confirm_url(hold_id):
+    return reverse("airport:seathold-confirm", args=[hold_id])
+
+
+class SeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        airplane = sample_airplane(name="Embraer 190", rows=3, seats_in_row=4)
+        self.flight = sample_flight(airplane=airplane)
+
+    def hold_payload(self, seats, **params):
+        payload = {
+            "flight": self.flight.id,
+            "seats": [{"row": row, "seat": seat} for row, seat in seats],
+        }
+        payload.update(params)
+        return payload
+
+    def test_place_hold(self):
+        res = self.client.post(
+            HOLD_URL,
+            self.hold_payload([(1, 1), (1, 2)], seconds=60),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        hold = SeatHold.objects.get(id=res.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertEqual(hold.seats_count, 2)
+        self.assertAlmostEqual(
+            hold.expires_at,
+            timezone.now() + timedelta(seconds=60),
+            delta=timedelta(seconds=5),
+        )
+
+    def test_hold_seat_out_of_range(self):
+        res = self.client.post(
+            HOLD_URL, self.hold_payload([(4, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_held_seats_are_unavailable_to_others(self):
+        self.client.post(HOLD_URL, self.hold_payload([(1, 1)]), format="json")
+        self.client.force_authenticate(self.other_user)
+
+        hold_res = self.client.post(
+            HOLD_URL, self.hold_payload([(1, 1), (1, 2)]), format="json"
+        )
+        order_res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"flight": self.flight.id, "row": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(hold_res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            hold_res.data["seats"],
+            [{"flight": self.flight.id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(order_res.status_code, status.HTTP_409_CONFLICT)
+
+    def test_confirm_hold(self):
+        hold_res = self.client.post(
+            HOLD_URL, self.hold_payload([(2, 1), (2, 2)]), format="json"
+        )
+
+        res = self.client.post(confirm_url(hold_res.data["id"]))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(id=res.data["id"])
+        self.assertEqual(
+            sorted(order.tickets.values_list("row", "seat")),
+            [(2, 1), (2, 2)],
+        )
+        self.assertFalse(SeatHold.objects.exists())
+        self.flight.refresh_from_db()
+        self.assertEqual(self.flight.tickets_sold, 2)
+
+    def test_confirm_hold_out_of_shrunk_airplane(self):
+        hold_res = self.client.post(
+            HOLD_URL, self.hold_payload([(3, 1)]), format="json"
+        )
+        Airplane.objects.filter(pk=self.flight.airplane_id).update(rows=2)
+
+        res = self.client.post(confirm_url(hold_res.data["id"]))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data["tickets"][0]), ["row"])
+        self.assertFalse(Order.objects.exists())
+        self.assertTrue(SeatHold.objects.exists())
+
+    def test_confirm_expired_hold(self):
+        hold = SeatHold.objects.create(
+            flight=self.flight,
+            user=self.user,
+            seats=[{"row": 1, "seat": 1}],
+            seats_count=1,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        res = self.client.post(confirm_url(hold.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Order.objects.exists())
+
+    def test_expired_hold_does_not_block_seats(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            seats=[{"row": 1, "seat": 1}],
+            seats_count=1,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        res = self.client.post(
+            HOLD_URL, self.hold_payload([(1, 1)]), format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_holds_count_toward_availability(self):
+        self.client.post(
+            HOLD_URL, self.hold_payload([(1, 1), (1, 2)]), format="json"
+        )
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            seats=[{"row": 3, "seat": 1}],
+            seats_count=1,
+            expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        flights_res = self.client.get(FLIGHT_URL)
+        seats_res = self.client.get(
+            reverse("airport:flight-seats", args=[self.flight.id]),
+            {"encoding": "grid"},
+        )
+
+        self.assertEqual(
+            flights_res.data["results"][0]["tickets_available"], 10
+        )
+        self.assertEqual(seats_res.data["seats"][0], [1, 1, 0, 0])
+        self.assertEqual(seats_res.data["seats"][2], [0, 0, 0, 0])
+
+    def test_hold_out_of_shrunk_airplane_is_skipped(self):
+        SeatHold.objects.create(
+            flight=self.flight,
+            user=self.other_user,
+            seats=[{"row": 1, "seat": 2}, {"row": 4, "seat": 1}],
+            seats_count=2,
+            expires_at=timezone.now() + timedelta(seconds=60),
+        )
+
+        res = self.client.get(
+            reverse("airport:flight-seats", args=[self.flight.id]),
+            {"encoding": "grid"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["seats"]), 3)
+        self.assertEqual(res.data["seats"][0], [0, 1, 0, 0])
+
+    def test_sweep_seat_holds(self):
+        for seconds in (-10, -1, 60):
+            SeatHold.objects.create(
+                flight=self.flight,
+                user=self.user,
+                seats=[{"row": 1, "seat": 1}],
+                seats_count=1,
+                expires_at=timezone.now() + timedelta(seconds=seconds),
+            )
+
+        call_command("sweep_seat_holds", stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.count(), 1)
@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from airport.models import (
+    Country,
+    City,
+    Airplane,
+    Airport,
+    Crew,
+    Route,
+    Flight,
+)
+
+ORDER_URL = reverse("airport:order-list")
+FLIGHT_URL = reverse("airport:flight-list")
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        country = Country.objects.create(name="Ukraine")
+        city = City.objects.create(name="Kyiv", country=country)
+        source = Airport.objects.create(
+            name="Boryspil", city=city, closest_big_city="Kyiv"
+        )
+        destination = Airport.objects.create(
+            name="Zhuliany", city=city, closest_big_city="Kyiv"
+        )
+        route = Route.objects.create(
+            source=source, destination=destination, distance=30
+        )
+        airplane = Airplane.objects.create(
+            name="Embraer 190", rows=20, seats_in_row=4
+        )
+        crew = Crew.objects.create(first_name="Anna", last_name="Koval")
+        self.flights = []
+        for day in range(1, 4):
+            flight = Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=f"2024-10-0{day} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{day} 23:00:00+00:00",
+            )
+            flight.crew.add(crew)
+            self.flights.append(flight)
+
+        for flight in self.flights:
+            self.client.post(
+                ORDER_URL,
+                {
+                    "tickets": [
+                        {"flight": flight.id, "row": 1, "seat": seat}
+                        for seat in (1, 2)
+                    ]
+                },
+                format="json",
+            )
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(context.captured_queries)
+
+    def test_order_fields(self):
+        full, full_queries = self.get(ORDER_URL, {})
+        res, queries = self.get(
+            ORDER_URL, {"fields": "tickets.row,tickets.seat"}
+        )
+
+        self.assertEqual(
+            res.data["results"][0]["tickets"],
+            [
+                {"id": ticket["id"], "row": 1, "seat": ticket["seat"]}
+                for ticket in full.data["results"][0]["tickets"]
+            ],
+        )
+        self.assertEqual(set(res.data["results"][0]), {"id", "tickets"})
+        # count, orders and tickets only
+        self.assertEqual(queries, 3)
+        self.assertLess(queries, full_queries)
+
+    def test_order_expand(self):
+        res, queries = self.get(ORDER_URL, {"expand": "tickets"})
+
+        ticket = res.data["results"][0]["tickets"][0]
+        self.assertEqual(ticket["flight"], self.flights[-1].id)
+        self.assertEqual(queries, 3)
+
+        res, queries = self.get(ORDER_URL, {"expand": ""})
+
+        self.assertEqual(len(res.data["results"][0]["tickets"]), 2)
+        self.assertIsInstance(res.data["results"][0]["tickets"][0], int)
+        self.assertEqual(queries, 3)
+
+    def test_order_nested_flight_fields(self):
+        res, queries = self.get(
+            ORDER_URL, {"fields": "tickets.flight.departure_time"}
+        )
+
+        self.assertEqual(
+            res.data["results"][0]["tickets"][0],
+            {
+                "id": res.data["results"][0]["tickets"][0]["id"],
+                "flight": {
+                    "id": self.flights[-1].id,
+                    "departure_time": "2024-10-03T14:00:00Z",
+                },
+            },
+        )
+        # count, orders, tickets and flights without joins
+        self.assertEqual(queries, 4)
+
+    def test_full_order_list_queries_do_not_grow_with_flights(self):
+        _, queries = self.get(ORDER_URL, {})
+
+        # count, orders, tickets, flights with joins and crew
+        self.assertEqual(queries, 5)
+
+    def test_flight_fields(self):
+        with CaptureQueriesContext(connection) as context:
+            res, queries = self.get(
+                FLIGHT_URL, {"fields": "departure_time,tickets_available"}
+            )
+
+        self.assertEqual(
+            set(res.data["results"][0]),
+            {"id", "departure_time", "tickets_available"},
+        )
+        self.assertEqual(res.data["results"][0]["tickets_available"], 78)
+        flight_queries = [
+            query["sql"]
+            for query in context.captured_queries
+            if "airport_crew" in query["sql"] or "airport_city" in query["sql"]
+        ]
+        self.assertFalse(flight_queries)
+
+    def test_flight_detail_route_collapsed(self):
+        url = reverse("airport:flight-detail", args=[self.flights[0].id])
+
+        res, _ = self.get(url, {"expand": "", "fields": "route,airplane"})
+
+        self.assertEqual(
+            res.data,
+            {
+                "id": self.flights[0].id,
+                "route": self.flights[0].route_id,
+                "airplane": "Embraer 190",
+            },
+        )
+
+        res, _ = self.get(url, {"fields": "route.distance"})
+
+        self.assertEqual(
+            res.data["route"], {"id": self.flights[0].route_id, "distance": 30}
+        )
+
+    def test_fields_are_ignored_on_write(self):
+        res = self.client.post(
+            f"{ORDER_URL}?fields=id",
+            {"tickets": [{"flight": self.flights[0].id, "row": 2, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data["tickets"][0]["row"], 2)
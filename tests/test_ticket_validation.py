@@ -0,0 +1,189 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.forms import inlineformset_factory
+from django.test import TestCase
+
+from airport import validation
+from airport.admin import TicketInLineForm, TicketInLineFormSet
+from airport.models import (
+    Airplane,
+    Airport,
+    City,
+    Country,
+    Flight,
+    Order,
+    Route,
+    Ticket,
+)
+from airport.validation import find_ticket_errors
+
+TicketFormSet = inlineformset_factory(
+    Order,
+    Ticket,
+    form=TicketInLineForm,
+    formset=TicketInLineFormSet,
+    fields=("flight", "row", "seat"),
+)
+
+
+class TicketValidationTests(TestCase):
+    def setUp(self):
+        city = City.objects.create(
+            name="Kyiv", country=Country.objects.create(name="Ukraine")
+        )
+        route = Route.objects.create(
+            source=Airport.objects.create(name="Boryspil", city=city),
+            destination=Airport.objects.create(name="Zhuliany", city=city),
+            distance=30,
+        )
+        airplane = Airplane.objects.create(
+            name="Boeing 737-800", rows=20, seats_in_row=6
+        )
+        self.flight, self.other_flight = [
+            Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=f"2024-10-0{day} 14:00:00+00:00",
+                arrival_time=f"2024-10-0{day} 23:00:00+00:00",
+            )
+            for day in (2, 3)
+        ]
+        self.order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                "test@test.com", "testpass"
+            )
+        )
+        self.sold = Ticket.objects.create(
+            order=self.order, flight=self.flight, row=1, seat=1
+        )
+
+    def ticket(self, row, seat, flight=None):
+        return Ticket(
+            order=self.order,
+            flight_id=(flight or self.flight).id,
+            row=row,
+            seat=seat,
+        )
+
+    def test_batch_is_validated_in_one_query(self):
+        tickets = [
+            self.ticket(row, seat, flight)
+            for flight in (self.flight, self.other_flight)
+            for row in range(2, 6)
+            for seat in range(1, 7)
+        ]
+
+        with self.assertNumQueries(1):
+            errors = find_ticket_errors(tickets)
+
+        self.assertEqual(errors, [{}] * len(tickets))
+
+    def test_batch_errors(self):
+        errors = find_ticket_errors(
+            [
+                self.ticket(2, 1),
+                self.ticket(21, 1),
+                self.ticket(2, 7),
+                self.ticket(2, 1),
+                self.ticket(1, 1),
+                self.ticket(1, 1, self.other_flight),
+            ]
+        )
+
+        self.assertEqual(errors[0], {})
+        self.assertEqual(list(errors[1]), ["row"])
+        self.assertEqual(list(errors[2]), ["seat"])
+        self.assertEqual(list(errors[3]), ["non_field_errors"])
+        self.assertEqual(list(errors[4]), ["non_field_errors"])
+        self.assertEqual(errors[5], {})
+
+    def test_sold_seat_stale_in_seat_map_is_free(self):
+        Flight.objects.filter(pk=self.flight.pk).update(seat_map=b"\xff")
+
+        with self.assertNumQueries(2):
+            errors = find_ticket_errors([self.ticket(1, 2)])
+
+        self.assertEqual(errors, [{}])
+
+    def test_stale_flight_of_ticket_is_not_trusted(self):
+        flight = Flight.objects.select_related("airplane").get(
+            pk=self.other_flight.pk
+        )
+        Ticket.objects.create(
+            order=self.order, flight=self.other_flight, row=2, seat=2
+        )
+
+        with self.assertRaises(ValidationError):
+            Ticket.objects.create(
+                order=self.order, flight=flight, row=2, seat=2
+            )
+
+    def test_saved_ticket_keeps_its_seat(self):
+        ticket = Ticket.objects.get(pk=self.sold.pk)
+
+        with self.assertNumQueries(1):
+            ticket.clean()
+
+        self.assertEqual(Ticket.objects.get().seat, 1)
+
+    def test_save_raises_on_sold_seat(self):
+        ticket = self.ticket(1, 2)
+        ticket.save()
+
+        ticket.seat = 1
+        with self.assertRaises(ValidationError) as error:
+            ticket.save()
+
+        self.assertIn("__all__", error.exception.message_dict)
+        self.assertEqual(
+            list(Ticket.objects.order_by("seat").values_list("seat")),
+            [(1,), (2,)],
+        )
+
+    def test_save_after_clean_validates_once(self):
+        ticket = self.ticket(3, 3)
+        ticket.full_clean()
+
+        with mock.patch(
+            "airport.validation.find_ticket_errors"
+        ) as find_ticket_errors:
+            ticket.save()
+
+        find_ticket_errors.assert_not_called()
+        self.assertTrue(Ticket.objects.filter(row=3, seat=3).exists())
+
+    def test_admin_formset_is_validated_in_one_pass(self):
+        rows = [(self.sold.id, 1, 1), ("", 2, 1), ("", 2, 1), ("", 21, 1)]
+        data = {
+            "tickets-TOTAL_FORMS": len(rows),
+            "tickets-INITIAL_FORMS": 1,
+        }
+        for index, (ticket_id, row, seat) in enumerate(rows):
+            data.update(
+                {
+                    f"tickets-{index}-id": ticket_id,
+                    f"tickets-{index}-order": self.order.id,
+                    f"tickets-{index}-flight": self.flight.id,
+                    f"tickets-{index}-row": row,
+                    f"tickets-{index}-seat": seat,
+                }
+            )
+        formset = TicketFormSet(data, instance=self.order)
+
+        with mock.patch(
+            "airport.admin.find_ticket_errors",
+            wraps=validation.find_ticket_errors,
+        ) as find_errors, mock.patch(
+            "airport.validation.check_ticket"
+        ) as check_ticket:
+            self.assertFalse(formset.is_valid())
+
+        find_errors.assert_called_once()
+        check_ticket.assert_not_called()
+        self.assertEqual(
+            [list(form.errors) for form in formset.forms],
+            [[], [], ["__all__"], ["row"]],
+        )
+        self.assertEqual(formset.non_form_errors(), [])